@@ -11,6 +11,8 @@ from data.loader import load_geojson_data, load_state_data, load_district_data,
 from layouts.main_layout import create_main_layout
 from layouts.comparison import create_comparison_layout
 from callbacks import register_all_callbacks
+from utils.compression import register_compression
+from data.watcher import start_data_watcher
 
 print("🚀 Starting India Demographics Dashboard - Complete Refactored Version")
 print("=" * 70)
@@ -25,6 +27,9 @@ app = dash.Dash(
     ]
 )
 
+# Compress callback/layout responses and serve boundary files with ETags
+register_compression(app.server)
+
 # Add beautiful custom CSS for enhanced UI
 app.index_string = '''
 <!DOCTYPE html>
@@ -97,6 +102,9 @@ app.layout = create_main_layout()
 # Register all callbacks
 register_all_callbacks(app)
 
+# Reload changed data files in the background without restarting the server
+start_data_watcher()
+
 # Load and verify all data
 print("📊 Loading and verifying all data sources...")
 try:
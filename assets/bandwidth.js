@@ -0,0 +1,44 @@
+// ===========================================
+// BANDWIDTH ESTIMATE
+// ===========================================
+// Estimates the viewer's download bandwidth for the progressive maps
+// (data/boundaries.geometry_tier). Resources the page has already fetched
+// are timed from their first to their last byte (Resource Timing), so no
+// extra download is made; the Network Information API estimate is used when
+// nothing large enough has been fetched yet. Data-saver mode counts as slow.
+
+(function () {
+    const MIN_SAMPLE_BYTES = 32 * 1024;    // Smaller transfers are dominated by latency
+
+    function median(values) {
+        const sorted = values.slice().sort(function (a, b) { return a - b; });
+        const middle = Math.floor(sorted.length / 2);
+        return sorted.length % 2 ? sorted[middle] : (sorted[middle - 1] + sorted[middle]) / 2;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        bandwidth: {
+            measure: function () {
+                const connection = navigator.connection || {};
+                if (connection.saveData) {
+                    return {mbps: 0, source: 'save-data'};
+                }
+                const samples = performance.getEntriesByType('resource')
+                    .filter(function (entry) {
+                        return entry.transferSize >= MIN_SAMPLE_BYTES && entry.responseEnd > entry.responseStart;
+                    })
+                    .map(function (entry) {
+                        // bits per millisecond / 1000 = Mbit/s
+                        return entry.transferSize * 8 / (entry.responseEnd - entry.responseStart) / 1000;
+                    });
+                if (samples.length) {
+                    return {mbps: median(samples), source: 'resource-timing'};
+                }
+                if (connection.downlink) {
+                    return {mbps: connection.downlink, source: 'network-information'};
+                }
+                return null;
+            }
+        }
+    });
+})();
@@ -0,0 +1,134 @@
+// ===========================================
+// TOPOLOGY DECODER
+// ===========================================
+// Map figures built on the server reference boundaries as
+// trace.topology = {url, coarse, object} instead of embedding GeoJSON
+// (utils/figures.topology_reference). Each topology file is fetched once per
+// page, its delta-encoded arcs are decoded once, and every object is turned
+// into a GeoJSON FeatureCollection once; later figures reuse the same layer.
+//
+// Progressive rendering: when a figure names both tiers and the full layer
+// is not loaded yet, the coarse layer is returned straight away and the full
+// one is pushed to the graph with set_props once it arrives, unless a newer
+// figure has reached that graph in the meantime.
+
+(function () {
+    const topologies = {};  // url -> Promise of the parsed topology
+    const layers = {};      // url + object -> Promise of a GeoJSON FeatureCollection
+    const ready = {};       // url + object -> true once the layer has been decoded
+    const renders = {};     // graph id -> number of the latest figure sent to it
+
+    function decodeArcs(topology) {
+        const [sx, sy] = topology.transform.scale;
+        const [tx, ty] = topology.transform.translate;
+        return topology.arcs.map(function (arc) {
+            let x = 0, y = 0;
+            return arc.map(function (delta) {
+                x += delta[0];
+                y += delta[1];
+                return [x * sx + tx, y * sy + ty];
+            });
+        });
+    }
+
+    function ring(arcs, references) {
+        // Consecutive arcs share their joining vertex; ~i is arc i backwards
+        const points = [];
+        references.forEach(function (ref, position) {
+            const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+            for (let i = position ? 1 : 0; i < arc.length; i++) {
+                points.push(arc[i]);
+            }
+        });
+        return points;
+    }
+
+    function toGeoJSON(topology, arcs, name) {
+        const features = topology.objects[name].geometries.map(function (geometry) {
+            const polygons = geometry.type === 'MultiPolygon' ? geometry.arcs : [geometry.arcs];
+            return {
+                type: 'Feature',
+                properties: geometry.properties || {},
+                geometry: {
+                    type: 'MultiPolygon',
+                    coordinates: polygons.map(function (polygon) {
+                        return polygon.map(function (refs) { return ring(arcs, refs); });
+                    })
+                }
+            };
+        });
+        return {type: 'FeatureCollection', features: features};
+    }
+
+    function load(url) {
+        if (!topologies[url]) {
+            topologies[url] = fetch(url)
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error('Failed to load ' + url + ': ' + response.status);
+                    }
+                    return response.json();
+                })
+                .then(function (topology) {
+                    return {topology: topology, arcs: decodeArcs(topology)};
+                });
+            topologies[url].catch(function () { delete topologies[url]; });
+        }
+        return topologies[url];
+    }
+
+    function layer(url, name) {
+        const key = url + '#' + name;
+        if (!layers[key]) {
+            layers[key] = load(url).then(function (loaded) {
+                const geojson = toGeoJSON(loaded.topology, loaded.arcs, name);
+                ready[key] = true;
+                return geojson;
+            });
+            layers[key].catch(function () { delete layers[key]; });
+        }
+        return layers[key];
+    }
+
+    async function resolve(figure, tier) {
+        // Figure with every topology reference replaced by the layer of a tier ('url' or 'coarse')
+        const data = await Promise.all(figure.data.map(async function (trace) {
+            if (!trace.topology) {
+                return trace;
+            }
+            const reference = trace.topology;
+            const resolved = Object.assign({}, trace);
+            delete resolved.topology;
+            resolved.geojson = await layer(reference[tier] || reference.url || reference.coarse, reference.object);
+            return resolved;
+        }));
+        return Object.assign({}, figure, {data: data});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        topology: {
+            attach: async function (figure) {
+                if (!figure || !figure.data) {
+                    return figure;
+                }
+                const graph = window.dash_clientside.callback_context.outputs_list.id;
+                const render = renders[graph] = (renders[graph] || 0) + 1;
+                const references = figure.data.filter(function (trace) { return trace.topology; })
+                    .map(function (trace) { return trace.topology; });
+                const progressive = references.some(function (reference) {
+                    return reference.url && reference.coarse && !ready[reference.url + '#' + reference.object];
+                });
+                if (!progressive) {
+                    return resolve(figure, 'url');
+                }
+
+                resolve(figure, 'url').then(function (full) {
+                    if (renders[graph] === render) {
+                        window.dash_clientside.set_props(graph, {figure: full});
+                    }
+                }).catch(function (error) { console.warn(error); });
+                return resolve(figure, 'coarse');
+            }
+        }
+    });
+})();
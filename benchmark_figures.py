@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# ===========================================
+# FIGURE BUILD BENCHMARK
+# ===========================================
+# Compares the per-figure cost of the old plotly.express + update_* path
+# against the lean builder in utils/figures.py, including JSON serialization
+# (which Dash performs for every callback response).
+
+import timeit
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from config.settings import STATE_NAME_MAPPING, CSV_TO_GEOJSON_MAPPING
+from data.loader import (load_geojson_data, load_state_data, load_district_data,
+                         get_india_geo, get_state_data, get_district_data, load_state_geojson)
+from utils.figures import choropleth_figure, bar_figure, tier_colors
+from utils.serialization import compact_figure
+
+REPEATS = 20
+STATE_ATTRIBUTE = 'Male_Literate_pct'
+DISTRICT_STATE = 'BIHAR'
+DISTRICT_ATTRIBUTE = 'Literate_%'
+
+print("⏱️ Benchmarking figure builders...")
+
+load_geojson_data()
+load_state_data()
+load_district_data()
+india_geo = get_india_geo()
+state_data = get_state_data()
+district_data = get_district_data()
+state_geo = load_state_geojson(CSV_TO_GEOJSON_MAPPING[DISTRICT_STATE])
+
+viz_data = state_data.groupby('State name')[STATE_ATTRIBUTE].mean().reset_index()
+viz_data['Mapped_State'] = viz_data['State name'].map(STATE_NAME_MAPPING)
+viz_data = viz_data.dropna(subset=['Mapped_State'])
+districts = district_data[district_data['State name'] == DISTRICT_STATE].copy()
+districts['District code'] = districts['District code'].astype(str)
+rankings = viz_data.sort_values(STATE_ATTRIBUTE, ascending=False)
+
+def express_india_map():
+    fig = px.choropleth(viz_data, geojson=india_geo, locations='Mapped_State', color=STATE_ATTRIBUTE,
+                        featureidkey='properties.name', color_continuous_scale="RdYlBu_r",
+                        hover_name='State name', hover_data={STATE_ATTRIBUTE: ':.1f', 'Mapped_State': False})
+    fig.update_geos(showframe=False, fitbounds="locations", projection_type='natural earth')
+    fig.update_layout(title_x=0.5, height=500, margin=dict(l=0, r=0, t=60, b=0))
+    fig.update_traces(marker_line_color="rgba(255,255,255,0.8)", marker_line_width=0.8)
+    return fig
+
+def lean_india_map():
+    return choropleth_figure(india_geo, viz_data['Mapped_State'], viz_data[STATE_ATTRIBUTE].to_numpy(),
+                             'properties.name', "India map", "RdYlBu_r", hovertext=viz_data['State name'])
+
+def express_district_map():
+    fig = px.choropleth(districts, geojson=state_geo, locations='District code', color=DISTRICT_ATTRIBUTE,
+                        featureidkey='properties.dt_code', color_continuous_scale="Viridis",
+                        hover_name='District name')
+    fig.update_geos(showframe=False, fitbounds="locations", projection_type='mercator')
+    fig.update_layout(title_x=0.5, height=500, margin=dict(l=0, r=0, t=60, b=0))
+    fig.update_traces(marker_line_color="rgba(255,255,255,0.8)", marker_line_width=0.5)
+    return fig
+
+def lean_district_map():
+    return choropleth_figure(state_geo, districts['District code'], districts[DISTRICT_ATTRIBUTE].to_numpy(),
+                             'properties.dt_code', "District map", "Viridis", hovertext=districts['District name'])
+
+def graph_objects_rankings():
+    colors = []
+    values = rankings[STATE_ATTRIBUTE]
+    for value in values:
+        normalized = (value - values.min()) / (values.max() - values.min())
+        colors.append('#10b981' if normalized > 0.7 else '#f59e0b' if normalized > 0.4 else '#ef4444')
+    fig = go.Figure(data=[go.Bar(y=rankings['State name'], x=values, orientation='h',
+                                 marker=dict(color=colors), text=values.round(1), textposition='outside')])
+    fig.update_layout(title_x=0.5, height=500, margin=dict(l=150, r=50, t=60, b=50))
+    return fig
+
+def lean_rankings():
+    values = rankings[STATE_ATTRIBUTE].to_numpy()
+    return bar_figure(rankings['State name'], values, tier_colors(values), "Rankings",
+                      "%{x:.1f}%", text=values.round(1))
+
+def measure(build):
+    """Average milliseconds to build and serialize one figure"""
+    seconds = timeit.timeit(lambda: pio.json.to_json_plotly(compact_figure(build())), number=REPEATS)
+    return seconds / REPEATS * 1000
+
+print(f"\n{'Figure':<20}{'px/go (ms)':>12}{'lean (ms)':>12}{'speed-up':>10}")
+for name, before, after in [
+    ("India map", express_india_map, lean_india_map),
+    ("District map", express_district_map, lean_district_map),
+    ("State rankings", graph_objects_rankings, lean_rankings),
+]:
+    before_ms = measure(before)
+    after_ms = measure(after)
+    print(f"{name:<20}{before_ms:>12.1f}{after_ms:>12.1f}{before_ms / after_ms:>9.1f}x")
@@ -2,18 +2,26 @@
 # MAIN CALLBACKS COORDINATOR
 # ===========================================
 
-from dash import Input, Output, callback_context
+from dash import Input, Output, ClientsideFunction, callback_context
 from callbacks.state_callbacks import register_state_callbacks
 from callbacks.district_callbacks import register_district_callbacks
 from callbacks.comparison_callbacks import register_comparison_callbacks
 from layouts.state_analysis import create_state_analysis_layout
 from layouts.district_analysis import create_district_analysis_layout
 from layouts.comparison import create_comparison_layout
-from config.settings import ATTRIBUTE_CATEGORIES, COLORS
+from config.settings import COLORS
+from data.catalog import get_catalog
+from data.loader import batch_loads, load_geojson_data, load_state_data, load_district_data
 
 def register_all_callbacks(app):
     """Register all application callbacks"""
     
+    # Publish the initial tables as one dataset version (later loads of unchanged files are no-ops)
+    with batch_loads():
+        load_geojson_data()
+        load_state_data()
+        load_district_data()
+    
     # Register tab-specific callbacks
     register_state_callbacks(app)
     register_district_callbacks(app)
@@ -46,11 +54,18 @@ def register_all_callbacks(app):
             return (create_district_analysis_layout(), "district",
                     "custom-tab", "custom-tab active", "custom-tab")
         elif button_id == 'tab-comparison':
-            return (create_comparison_layout(COLORS, ATTRIBUTE_CATEGORIES), "comparison",
+            return (create_comparison_layout(COLORS, get_catalog().categories), "comparison",
                     "custom-tab", "custom-tab", "custom-tab active")
         
         return create_state_analysis_layout(), "state", "custom-tab active", "custom-tab", "custom-tab"
 
+    # Re-measure the browser's download bandwidth whenever a tab is rendered
+    app.clientside_callback(
+        ClientsideFunction(namespace='bandwidth', function_name='measure'),
+        Output('client-bandwidth', 'data'),
+        [Input('tab-content', 'children')]
+    )
+
     # Category dropdown initialization callback
     @app.callback(
         Output('category-dropdown', 'options'),
@@ -58,6 +73,6 @@ def register_all_callbacks(app):
     )
     def update_category_dropdown(_):
         """Initialize category dropdown options"""
-        return [{"label": category, "value": category} for category in ATTRIBUTE_CATEGORIES.keys()]
+        return [{"label": category, "value": category} for category in get_catalog().categories.keys()]
     
     print("✅ All callbacks registered successfully!")
@@ -6,48 +6,35 @@ from dash import Input, Output, callback_context
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from config.settings import COLORS, FONT_FAMILY, ATTRIBUTE_CATEGORIES
-from data.loader import load_state_data, get_state_data
+from config.settings import COLORS, FONT_FAMILY
+from data.loader import load_state_data, get_data_store, get_national_percentage
+from data.catalog import get_category_columns
+from utils.helpers import get_short_label
+from utils.serialization import compact_figure_output
+from utils.placeholders import placeholder_figure, error_figure
 
 def register_comparison_callbacks(app):
     """Register all comparison-related callbacks"""
     
-    # Load state data for comparison
-    try:
-        load_result = load_state_data()
-        if load_result:
-            state_data = get_state_data()
-            if state_data is not None and not state_data.empty:
-                # Create state-level aggregated data for comparison
-                comparison_state_data = state_data.groupby('State name').mean().reset_index()
+    # Load state data for comparison (callbacks read the current snapshot on every call)
+    load_state_data()
+    comparison_cache = {}
+    
+    def get_comparison_data():
+        """State data and its per-state means for the current snapshot, computed once per dataset version"""
+        store = get_data_store()
+        cached = comparison_cache.get('tables')
+        if cached is None or cached[0] != store.version:
+            state_data = store.state_data
+            if state_data is None or state_data.empty:
+                print("Error loading state data for comparison: State data is empty or None")
+                cached = (store.version, None, None)
             else:
-                raise Exception("State data is empty or None")
-        else:
-            raise Exception("Failed to load state data")
-    except Exception as e:
-        print(f"Error loading state data for comparison: {e}")
-        state_data = None
-        comparison_state_data = None
+                # Create state-level aggregated data for comparison
+                cached = (store.version, state_data, state_data.groupby('State name', observed=True).mean().reset_index())
+            comparison_cache['tables'] = cached
+        return cached[1], cached[2]
     
-    def get_short_label(column_name):
-        """Convert long column names to short, readable labels"""
-        clean_name = column_name.replace('_pct', '').replace('%', '').strip()
-        
-        label_map = {
-            'Male_Literate': 'Male Literacy',
-            'Female_Literate': 'Female Literacy',
-            'Male_Workers': 'Male Employment',
-            'Female_Workers': 'Female Employment',
-            'Rural_Households': 'Rural Areas',
-            'Urban_Households': 'Urban Areas',
-            'LPG_or_PNG_Households': 'LPG/PNG Access',
-            'Housholds_with_Electric_Lighting': 'Electricity',
-            'Households_with_Internet': 'Internet',
-            'Households_with_Computer': 'Computer',
-        }
-        
-        return label_map.get(clean_name, clean_name.replace('_', ' ').title())
-
     # Populate comparison states dropdown
     @app.callback(
         Output('comparison-states-dropdown', 'options'),
@@ -55,6 +42,7 @@ def register_comparison_callbacks(app):
     )
     def update_comparison_states_dropdown(_):
         """Populate states dropdown for comparison analysis"""
+        state_data, _ = get_comparison_data()
         if state_data is None:
             return []
         try:
@@ -71,21 +59,13 @@ def register_comparison_callbacks(app):
     )
     def update_comparison_attribute_dropdown(selected_category):
         """Update attribute dropdown for comparison based on selected category"""
+        state_data, _ = get_comparison_data()
         if not selected_category or state_data is None:
             return []
         
-        # Get attributes from the selected category
-        attributes = ATTRIBUTE_CATEGORIES.get(selected_category, [])
-        
-        # Convert from district format (_%) to state format (_pct) and filter available columns
-        available_attributes = []
-        for attr in attributes:
-            if attr.endswith('_%'):
-                state_attr = attr.replace('_%', '_pct')
-                if state_attr in state_data.columns:
-                    available_attributes.append(state_attr)
-            elif attr + '_pct' in state_data.columns:
-                available_attributes.append(attr + '_pct')
+        # State columns in the selected category that are present in the loaded data
+        available_attributes = [attr for attr in get_category_columns(selected_category)
+                                if attr in state_data.columns]
         
         return [{"label": get_short_label(attr), "value": attr} for attr in available_attributes]
 
@@ -96,35 +76,14 @@ def register_comparison_callbacks(app):
          Input('comparison-attribute-dropdown', 'value'),
          Input('comparison-type-radio', 'value')]
     )
+    @compact_figure_output
     def update_comparison_bar_chart(selected_states, selected_attribute, comparison_type):
         """Create beautiful side-by-side state comparison bar chart"""
+        _, comparison_state_data = get_comparison_data()
         
         # Show placeholder if no states or attribute selected
         if not selected_states or not selected_attribute or len(selected_states) < 2 or comparison_state_data is None:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="📊 State Comparison - Select 2+ states and an attribute",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="🎯 Choose 2-5 states and a demographic attribute for beautiful comparison!",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('comparison-bar-chart')
         
         try:
             # Use the clean state-level aggregated data for comparison
@@ -140,8 +99,10 @@ def register_comparison_callbacks(app):
             if comparison_data.empty:
                 raise ValueError("No data available for selected states and attribute")
             
-            # Calculate national average for relative comparison
-            national_avg = comparison_state_data[selected_attribute].mean()
+            # Population-weighted national average for relative comparison (mean of states as a fallback)
+            national_avg = get_national_percentage(selected_attribute)
+            if national_avg is None or pd.isna(national_avg):
+                national_avg = comparison_state_data[selected_attribute].mean()
             
             if comparison_type == "relative":
                 # Show relative to national average
@@ -265,26 +226,7 @@ def register_comparison_callbacks(app):
             
         except Exception as e:
             print(f"Error in comparison bar chart: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title="❌ Error loading comparison chart",
-                title_x=0.5,
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                annotations=[
-                    dict(
-                        text=f"Error: {str(e)[:50]}...",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=14, color="#ef4444"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return error_fig
+            return error_figure("❌ Error loading comparison chart", f"Error: {str(e)[:50]}...", height=400)
 
     # Multi-dimensional radar chart callback
     @app.callback(
@@ -292,52 +234,24 @@ def register_comparison_callbacks(app):
         [Input('comparison-states-dropdown', 'value'),
          Input('comparison-category-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_comparison_radar_chart(selected_states, selected_category):
         """Create multi-dimensional radar chart comparing states across all attributes in a category"""
+        _, comparison_state_data = get_comparison_data()
         
         # Show placeholder if insufficient selection
         if not selected_states or not selected_category or len(selected_states) < 2 or comparison_state_data is None:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🕸️ Multi-Dimensional Radar - Select 2+ states and a category",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="🎯 Choose 2-5 states and a category for multi-dimensional comparison!",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('comparison-radar-chart')
         
         try:
             # Get attributes from the selected category
-            attributes = ATTRIBUTE_CATEGORIES.get(selected_category, [])
+            attributes = get_category_columns(selected_category)
             
             if not attributes:
                 raise ValueError(f"No attributes found for category '{selected_category}'")
             
-            # Convert from district format (_%) to state format (_pct) and filter available columns
-            available_attributes = []
-            for attr in attributes:
-                if attr.endswith('_%'):
-                    state_attr = attr.replace('_%', '_pct')
-                    if state_attr in comparison_state_data.columns:
-                        available_attributes.append(state_attr)
-                elif attr + '_pct' in comparison_state_data.columns:
-                    available_attributes.append(attr + '_pct')
+            # Keep the columns present in the comparison data
+            available_attributes = [attr for attr in attributes if attr in comparison_state_data.columns]
             
             if len(available_attributes) < 3:
                 raise ValueError(f"Need at least 3 attributes for radar chart. Found {len(available_attributes)} in {selected_category}")
@@ -455,27 +369,7 @@ def register_comparison_callbacks(app):
             
         except Exception as e:
             print(f"Error in radar chart: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title="❌ Error loading radar chart",
-                title_x=0.5,
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text=f"Error: {str(e)[:80]}...",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=14, color="#ef4444"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return error_fig
+            return error_figure("❌ Error loading radar chart", f"Error: {str(e)[:80]}...", height=500)
 
     # Placeholder callbacks for Cards 5-6
     
@@ -484,32 +378,10 @@ def register_comparison_callbacks(app):
         [Input('comparison-states-dropdown', 'value'),
          Input('comparison-attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_comparison_gap_chart(selected_states, selected_attribute):
         """Placeholder for gap analysis - Cards 3 & 4 coming next!"""
-        placeholder_fig = go.Figure()
-        placeholder_fig.update_layout(
-            title="📈 Performance Gap Analysis - Cards 3 & 4 Coming Next!",
-            title_x=0.5,
-            title_font_size=18,
-            title_font_weight="bold",
-            title_font_color="#64748b",
-            height=400,
-            template="plotly_white",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font_family=FONT_FAMILY,
-            annotations=[
-                dict(
-                    text="🎯 Cards 3 & 4 implementation in progress...",
-                    xref="paper", yref="paper",
-                    x=0.5, y=0.5,
-                    xanchor='center', yanchor='middle',
-                    font=dict(size=16, color="#94a3b8"),
-                    showarrow=False
-                )
-            ]
-        )
-        return placeholder_fig
+        return placeholder_figure('comparison-gap-chart', 'coming-soon')
 
     print("✅ Comparison callbacks registered successfully!")
 
@@ -2,20 +2,110 @@
 # DISTRICT ANALYSIS CALLBACKS
 # ===========================================
 
-from dash import Input, Output, html
+import time
+from dash import Input, Output, State, ClientsideFunction, Patch, html
+from dash.exceptions import PreventUpdate
 import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
-import json
-from data.loader import load_district_data
+import numpy as np
+from data.loader import load_district_data, load_state_geojson, get_district_data, get_data_store, add_reload_listener
+from data.catalog import get_catalog, get_attribute
+from data.sql import prepare, execute, query, quote_identifier
+from data.filters import filter_districts
+from data.ranks import get_rank_matrix, top_k, entity_profile
+from data.similarity import find_similar
+from data.clustering import cluster_districts, prewarm_clusters
+from data.spatial_stats import district_hotspots, LISA_CLASSES
+from data.geometry import get_geometry_metrics, state_view
+from data.national_map import national_view
+from data.boundaries import ensure_topology, topology_urls, geometry_tier, get_boundary_layer
+from data.tile_map import district_tiles
+from data.classification import get_classification, classify, class_labels
+from layouts.district_analysis import FILTER_CONDITION_ROWS
 from utils.helpers import get_district_short_label
-from config.settings import FONT_FAMILY, CSV_TO_GEOJSON_MAPPING, DISTRICT_ATTRIBUTE_CATEGORIES
+from utils.serialization import compact_figure_output
+from utils.figures import (merge_layout, choropleth_figure, bar_figure, scatter_figure, tier_colors, categorical_colorscale,
+                           topology_reference, choropleth_as_tiles, classed_choropleth)
+from utils.placeholders import placeholder_figure, metric_prompt_figure, error_figure
+from config.settings import (COLORS, FONT_FAMILY, CSV_TO_GEOJSON_MAPPING, CLUSTER_SETTINGS, SPATIAL_STATS_SETTINGS,
+                             NATIONAL_MAP_SETTINGS)
+
+# Geo settings shared by every district map
+DISTRICT_MAP_LAYOUT = dict(geo=dict(showcoastlines=False, projection=dict(type='mercator')))
+
+# Prepared SQL statements (data/sql.py) shared by the district callbacks
+DISTRICT_STATES = prepare('district_states', 'SELECT DISTINCT "State name" FROM districts ORDER BY 1')
+
+def districts_in_state(state):
+    """A state's rows of the district table in district code order, straight from the DataStore frame"""
+    district_data = get_district_data()
+    return district_data[district_data['State name'] == state].sort_values('District code')
+
+def unit_name(column):
+    """Display unit of an attribute: '%', 'count' or 'per 100,000'"""
+    info = get_attribute(column)
+    return '%' if info is None else info.unit
+
+def unit_suffix(column):
+    """Text shown after a value of an attribute: '%', or ' <unit>' such as ' per 100,000'"""
+    unit = unit_name(column)
+    return unit if unit == '%' else f" {unit}"
+
+def typology_names(result):
+    """Short name per typology from its most distinctive attribute (largest |z| of the centre)"""
+    names = []
+    for i, centre in enumerate(result.centroids):
+        strongest = int(np.abs(centre).argmax())
+        direction = "High" if centre[strongest] >= 0 else "Low"
+        names.append(f"Typology {i + 1}: {direction} {get_district_short_label(result.columns[strongest])}")
+    return names
+
+def features_with_codes(geojson, codes):
+    """FeatureCollection of the features whose dt_code is one of `codes`"""
+    codes = set(codes)
+    return {'type': 'FeatureCollection',
+            'features': [feature for feature in geojson.get('features', [])
+                         if str(feature.get('properties', {}).get('dt_code')) in codes]}
+
+def hotspot_overlay(state_geo, state_districts, attribute):
+    """Outlined LISA hotspot/coldspot trace for a state's districts, plus the global Moran's I text"""
+    result = district_hotspots(attribute)
+    lisa_class = dict(zip(result.codes.tolist(), result.classes.tolist()))
+    classes = np.array([lisa_class.get(code, 0) for code in state_districts['District code'].tolist()])
+    significant = classes > 0
+    
+    # Only the significant districts' polygons are sent for the overlay
+    geojson = features_with_codes(state_geo, state_districts['District code'].astype(str)[significant])
+    colors = [SPATIAL_STATS_SETTINGS['colors'][name] for name in LISA_CLASSES[1:]]
+    trace = {
+        'type': 'choropleth',
+        'geojson': geojson,
+        'featureidkey': 'properties.dt_code',
+        'locations': state_districts['District code'].astype(str)[significant].tolist(),
+        'z': classes[significant] - 1,
+        'zmin': -0.5,
+        'zmax': len(colors) - 0.5,
+        'colorscale': categorical_colorscale(colors),
+        'showscale': False,
+        'geo': 'geo',
+        'name': '',
+        'hovertext': [f"{name}<br>{LISA_CLASSES[c]}" for name, c in
+                      zip(state_districts['District name'][significant], classes[significant])],
+        'hovertemplate': "<b>%{hovertext}</b><extra></extra>",
+        'marker': {'opacity': 0.55, 'line': {'color': '#111827', 'width': 1.5}}
+    }
+    summary = f"Moran's I {result.moran_i:.2f} (p={result.p_value:.3f})"
+    return trace, summary
 
 def register_district_callbacks(app):
     """Register all district analysis callbacks"""
     
-    # Load data
-    district_data = load_district_data()
+    # Load data (callbacks read the current snapshot through the getter on every call)
+    load_district_data()
+    
+    # Cluster the default national typologies in the background after every data load
+    prewarm_clusters()
+    add_reload_listener(prewarm_clusters)
     
     # District state dropdown callback
     @app.callback(
@@ -24,10 +114,11 @@ def register_district_callbacks(app):
     )
     def update_district_state_dropdown(_):
         """Populate state dropdown for district analysis"""
+        district_data = get_district_data()
         if district_data.empty:
             return []
         
-        states = sorted(district_data['State name'].unique())
+        states = execute(DISTRICT_STATES)['State name']
         return [{"label": state, "value": state} for state in states]
 
     # District attribute dropdown callback
@@ -37,21 +128,16 @@ def register_district_callbacks(app):
     )
     def update_district_attribute_dropdown(selected_state):
         """Update district attribute dropdown based on available data"""
+        district_data = get_district_data()
         if not selected_state or district_data.empty:
             return []
         
-        # Get all percentage columns available for the selected state
-        state_data = district_data[district_data['State name'] == selected_state]
+        # Get all percentage columns available in the district table
         available_cols = []
         
-        for category, attributes in DISTRICT_ATTRIBUTE_CATEGORIES.items():
-            category_attrs = []
-            for attr in attributes:
-                if attr in state_data.columns:
-                    category_attrs.append({
-                        "label": f"  {get_district_short_label(attr)}",
-                        "value": attr
-                    })
+        for category, attributes in get_catalog().district_categories.items():
+            category_attrs = [{"label": f"  {get_district_short_label(attr)}", "value": attr}
+                              for attr in attributes if attr in district_data.columns]
             
             if category_attrs:
                 available_cols.append({
@@ -63,171 +149,254 @@ def register_district_callbacks(app):
         
         return available_cols
 
-    # District map visualization callback
+    # District map visualization callback: below PROGRESSIVE_MAP_SETTINGS['full_mbps'] the map is
+    # drawn from the simplified national layer first and refined by refine_district_map
     @app.callback(
-        Output('district-map', 'figure'),
+        [Output('district-map', 'figure'),
+         Output('district-map-refine', 'data'),
+         Output('district-cluster-poll', 'disabled')],
         [Input('district-state-dropdown', 'value'),
-         Input('district-attribute-dropdown', 'value')]
+         Input('district-attribute-dropdown', 'value'),
+         Input('district-cluster-category', 'value'),
+         Input('district-cluster-k', 'value'),
+         Input('district-cluster-scope', 'value'),
+         Input('district-hotspot-toggle', 'value'),
+         Input('district-map-mode', 'value'),
+         Input('district-map-classes', 'value'),
+         Input('district-class-scope', 'value'),
+         Input('district-cluster-poll', 'n_intervals')],
+        [State('client-bandwidth', 'data')]
     )
-    def update_district_map(selected_state, selected_attribute):
+    @compact_figure_output
+    def update_district_map(selected_state, selected_attribute, cluster_category=None, cluster_k=None,
+                            cluster_scope=None, hotspot_toggle=None, map_mode='polygons',
+                            class_method='continuous', class_scope='national', poll=None, bandwidth=None):
         """Create beautiful district-level choropleth map using statewise GeoJSON files"""
-        
         if not selected_state:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🗺️ District Map - Select a state to visualize",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a state to see beautiful district-level visualization! 🗺️📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('district-map'), None, True
         
         try:
-            # Get state GeoJSON file name
-            state_file_key = selected_state.lower().replace(' ', '_').replace('-', '_')
-            geojson_file = CSV_TO_GEOJSON_MAPPING.get(state_file_key)
+            # Get state GeoJSON file name (mapping is keyed by CSV state name)
+            geojson_file = CSV_TO_GEOJSON_MAPPING.get(selected_state)
             
             if not geojson_file:
                 # Show error for missing GeoJSON
-                error_fig = go.Figure()
-                error_fig.update_layout(
-                    title=f"❌ No map data available for {selected_state}",
-                    title_x=0.5,
-                    title_font_size=18,
-                    title_font_color="#ef4444",
+                return error_figure(
+                    f"❌ No map data available for {selected_state}",
+                    f"District map data for {selected_state} is not available.<br>Please select a different state.",
                     height=500,
-                    template="plotly_white",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_family=FONT_FAMILY,
-                    annotations=[
-                        dict(
-                            text=f"District map data for {selected_state} is not available.<br>Please select a different state.",
-                            xref="paper", yref="paper",
-                            x=0.5, y=0.5,
-                            xanchor='center', yanchor='middle',
-                            font=dict(size=14, color="#ef4444"),
-                            showarrow=False
-                        )
-                    ]
-                )
-                return error_fig
+                    title_color="#ef4444"
+                ), None, True
             
-            # Load state-specific GeoJSON
-            with open(geojson_file, 'r') as f:
-                state_geo = json.load(f)
+            # Load state-specific GeoJSON (cached after the first request), or the state's
+            # districts from the simplified national layer on slower connections
+            state_geo, refine = load_state_geojson(geojson_file), None
+            geometry = geometry_tier((bandwidth or {}).get('mbps'))
+            if geometry != 'full' and map_mode != 'tiles':
+                district_data = get_district_data()
+                state_codes = district_data.loc[district_data['State name'] == selected_state, 'District code']
+                coarse_geo = get_boundary_layer('districts', where={'dt_code': frozenset(state_codes.astype(str))})
+                if coarse_geo['features']:
+                    state_geo = coarse_geo
+                    refine = {'state': selected_state, 'overlay': None} if geometry == 'progressive' else None
+            # Precomputed view of the state's districts instead of fitting bounds in the browser
+            map_layout = merge_layout(DISTRICT_MAP_LAYOUT, {'geo': state_view(selected_state)})
             
             # Get district data for selected state
-            state_districts = district_data[district_data['State name'] == selected_state].copy()
+            state_districts = districts_in_state(selected_state)
             
-            if selected_attribute and selected_attribute in state_districts.columns:
+            # Districts are matched to GeoJSON features by census district code
+            locations = state_districts['District code'].astype(str)
+            district_names = state_districts['District name']
+            
+            if cluster_category:
+                # Categorical choropleth of the district typologies (clustered in the background;
+                # until they are ready the poll interval re-runs this callback)
+                result = cluster_districts(cluster_category, cluster_k, selected_state if cluster_scope == 'state' else None,
+                                           wait=0)
+                if result is None:
+                    return error_figure("⏳ Typologies are still being computed",
+                                        "The map updates as soon as they are ready.", height=500), None, False
+                
+                names = typology_names(result)
+                typology = dict(zip(result.codes.tolist(), result.labels.tolist()))
+                labels = np.array([typology.get(code, np.nan) for code in state_districts['District code'].tolist()], dtype=float)
+                hovertext = [f"{name}<br>{names[int(label)]}" if not np.isnan(label) else name
+                             for name, label in zip(district_names, labels)]
+                scope = selected_state if cluster_scope == 'state' else "India"
+                capped = f", capped at {result.k} districts" if cluster_k and result.k < cluster_k else ""
+                district_map_fig = choropleth_figure(
+                    geojson=state_geo,
+                    locations=locations,
+                    values=labels,
+                    featureidkey='properties.dt_code',
+                    title=f"🧬 {cluster_category} Typologies in {selected_state} (k={result.k}{capped}, clustered across {scope})",
+                    colorscale=categorical_colorscale(CLUSTER_SETTINGS['colors'][:result.k]),
+                    hovertext=hovertext,
+                    hovertemplate="<b>%{hovertext}</b><extra></extra>",
+                    colorbar=dict(title=dict(text="Typology"), tickvals=list(range(result.k)),
+                                  ticktext=[str(i + 1) for i in range(result.k)]),
+                    layout=dict(map_layout, coloraxis=dict(cmin=-0.5, cmax=result.k - 0.5))
+                )
+            elif selected_attribute and selected_attribute in state_districts.columns:
                 # Create choropleth map with data
-                district_map_fig = px.choropleth(
-                    state_districts,
+                short_label = get_district_short_label(selected_attribute)
+                district_map_fig = choropleth_figure(
                     geojson=state_geo,
-                    locations='District name',
-                    color=selected_attribute,
-                    featureidkey='properties.DISTRICT',
-                    title=f"🗺️ {get_district_short_label(selected_attribute)} in {selected_state}",
-                    color_continuous_scale="Viridis",
-                    labels={selected_attribute: f"{get_district_short_label(selected_attribute)} (%)"},
-                    hover_name='District name',
-                    hover_data={selected_attribute: ':.1f'}
+                    locations=locations,
+                    values=state_districts[selected_attribute].to_numpy(),
+                    featureidkey='properties.dt_code',
+                    title=f"🗺️ {short_label} in {selected_state}",
+                    colorscale="Viridis",
+                    hovertext=district_names,
+                    hovertemplate="<b>%{hovertext}</b><br>" +
+                                 f"{short_label}: %{{z:.1f}}{unit_suffix(selected_attribute)}<br>" +
+                                 "<extra></extra>",
+                    colorbar=dict(title=dict(text=f"{short_label} ({unit_name(selected_attribute)})")),
+                    layout=map_layout
                 )
+                
+                # Discrete colour classes from breaks over all districts or the state's (cached per attribute)
+                if class_method and class_method != 'continuous':
+                    breaks = get_classification(selected_attribute, class_method,
+                                                state=selected_state if class_scope == 'state' else None).breaks
+                    if len(breaks) > 1:
+                        district_map_fig = classed_choropleth(district_map_fig, classify(state_districts[selected_attribute], breaks),
+                                                              class_labels(breaks))
+                
+                # Hotspot/coldspot overlay from the national LISA analysis
+                if hotspot_toggle and 'hotspots' in hotspot_toggle:
+                    overlay, moran_text = hotspot_overlay(state_geo, state_districts, selected_attribute)
+                    district_map_fig['data'].append(overlay)
+                    if refine:
+                        refine['overlay'] = overlay['locations']
+                    district_map_fig['layout']['title']['text'] += f" · 🔥 {moran_text}"
             else:
                 # Show district boundaries without data coloring
-                dummy_data = state_districts[['District name']].copy()
-                dummy_data['value'] = 1
-                
-                district_map_fig = px.choropleth(
-                    dummy_data,
+                district_map_fig = choropleth_figure(
                     geojson=state_geo,
-                    locations='District name',
-                    color='value',
-                    featureidkey='properties.DISTRICT',
+                    locations=locations,
+                    values=np.ones(len(state_districts)),
+                    featureidkey='properties.dt_code',
                     title=f"🗺️ Districts of {selected_state} - Select an attribute to see data",
-                    color_continuous_scale=["#e0f2fe", "#0369a1"],
-                    hover_name='District name'
+                    colorscale=["#e0f2fe", "#0369a1"],
+                    hovertext=district_names,
+                    hovertemplate="<b>%{hovertext}</b><br>District of " + selected_state + "<extra></extra>",
+                    showscale=False,
+                    layout=map_layout
                 )
             
-            # Update map layout
-            district_map_fig.update_geos(
-                showframe=False,
-                showcoastlines=False,
-                projection_type='mercator',
-                fitbounds="locations",
-                bgcolor="rgba(0,0,0,0)"
-            )
+            # Tile mode: the state's districts as hexagons on their own grid
+            if map_mode == 'tiles':
+                return choropleth_as_tiles(district_map_fig, district_tiles(selected_state)), None, True
+            return district_map_fig, refine, True
             
-            district_map_fig.update_layout(
-                title_x=0.5,
-                title_font_size=20,
-                title_font_weight="bold",
-                title_font_color="#2d3748",
-                height=500,
-                margin=dict(l=0, r=0, t=60, b=0),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                coloraxis_showscale=True if selected_attribute else False
-            )
+        except Exception as e:
+            print(f"Error creating district map: {e}")
+            return error_figure(f"❌ Error loading district map for {selected_state}", f"Error: {str(e)[:100]}...", height=500), None, True
+    
+    @app.callback(
+        Output('district-map', 'figure', allow_duplicate=True),
+        [Input('district-map-refine', 'data')],
+        prevent_initial_call=True
+    )
+    def refine_district_map(refine):
+        """Swap the full-resolution state geometry into the coarse district map on screen"""
+        if not refine:
+            raise PreventUpdate
+        
+        # Only the geometry is sent; values, colours and layout stay as they are
+        state_geo = load_state_geojson(CSV_TO_GEOJSON_MAPPING[refine['state']])
+        patch = Patch()
+        patch['data'][0]['geojson'] = state_geo
+        if refine['overlay'] is not None:
+            patch['data'][1]['geojson'] = features_with_codes(state_geo, refine['overlay'])
+        return patch
+
+    # All-India district map: figures reference the 'districts' object of the boundary
+    # topology, so each one only carries ~640 values, and is cached per (dataset version, attribute)
+    national_map_cache = {}
+    
+    app.clientside_callback(
+        ClientsideFunction(namespace='topology', function_name='attach'),
+        Output('national-district-map', 'figure'),
+        [Input('national-district-figure', 'data')]
+    )
+    
+    @app.callback(
+        Output('national-district-figure', 'data'),
+        [Input('national-district-attribute', 'value'),
+         Input('national-district-mode', 'value'),
+         Input('national-district-classes', 'value')],
+        [State('client-bandwidth', 'data')]
+    )
+    @compact_figure_output
+    def update_national_district_map(selected_attribute, map_mode='polygons', class_method='continuous', bandwidth=None):
+        """Colour every district of India by one attribute"""
+        store = get_data_store()
+        # Boundary tier(s) the browser paints, from its measured bandwidth
+        urls = topology_urls(geometry_tier((bandwidth or {}).get('mbps')))
+        key = (store.version, selected_attribute, map_mode, class_method)
+        cached = national_map_cache.get(key)
+        if cached is not None:
+            return topology_reference(cached, 'districts', *urls)
+        
+        try:
+            ensure_topology()
+            district_data = store.district_data
+            locations = district_data['District code'].astype(str)
+            hovertext = district_data['District name'].astype(str) + ", " + district_data['State name'].astype(str).str.title()
+            layout = merge_layout(DISTRICT_MAP_LAYOUT, {'geo': national_view(), 'height': NATIONAL_MAP_SETTINGS['height']})
             
-            # Add beautiful hover template
-            if selected_attribute:
-                district_map_fig.update_traces(
-                    hovertemplate="<b>%{hovertext}</b><br>" +
-                                 f"{get_district_short_label(selected_attribute)}: %{{z:.1f}}%<br>" +
-                                 "<extra></extra>",
-                    marker_line_color="rgba(255,255,255,0.8)",
-                    marker_line_width=0.5
+            if selected_attribute and selected_attribute in district_data.columns:
+                short_label = get_district_short_label(selected_attribute)
+                unit = unit_suffix(selected_attribute)
+                national_fig = choropleth_figure(
+                    geojson=None,
+                    locations=locations,
+                    values=district_data[selected_attribute].to_numpy(),
+                    featureidkey='properties.dt_code',
+                    title=f"🇮🇳 {short_label} across India's districts",
+                    colorscale="Viridis",
+                    hovertext=hovertext,
+                    hovertemplate="<b>%{hovertext}</b><br>" + f"{short_label}: %{{z:.1f}}{unit}<extra></extra>",
+                    colorbar=dict(title=dict(text=short_label)),
+                    marker_line=dict(color='rgba(255,255,255,0.6)', width=0.2),
+                    layout=layout
                 )
+                # Discrete colour classes from national breaks (cached per attribute)
+                if class_method and class_method != 'continuous':
+                    breaks = get_classification(selected_attribute, class_method).breaks
+                    if len(breaks) > 1:
+                        national_fig = classed_choropleth(national_fig, classify(district_data[selected_attribute], breaks),
+                                                          class_labels(breaks))
             else:
-                district_map_fig.update_traces(
-                    hovertemplate="<b>%{hovertext}</b><br>District of " + selected_state + "<extra></extra>",
-                    marker_line_color="rgba(255,255,255,0.8)",
-                    marker_line_width=0.5
+                national_fig = choropleth_figure(
+                    geojson=None,
+                    locations=locations,
+                    values=np.ones(len(district_data)),
+                    featureidkey='properties.dt_code',
+                    title="🇮🇳 Districts of India - Select a metric to see data",
+                    colorscale=["#e0f2fe", "#0369a1"],
+                    hovertext=hovertext,
+                    hovertemplate="<b>%{hovertext}</b><extra></extra>",
+                    showscale=False,
+                    marker_line=dict(color='#0369a1', width=0.2),
+                    layout=layout
                 )
             
-            return district_map_fig
+            if map_mode == 'tiles':
+                national_fig = choropleth_as_tiles(national_fig, district_tiles())
+            
+            # Figures of older dataset versions are never asked for again
+            for stale in [old for old in national_map_cache if old[0] != store.version]:
+                del national_map_cache[stale]
+            national_map_cache[key] = national_fig
+            return topology_reference(national_fig, 'districts', *urls)
             
         except Exception as e:
-            print(f"Error creating district map: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title=f"❌ Error loading district map for {selected_state}",
-                title_x=0.5,
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                annotations=[
-                    dict(
-                        text=f"Error: {str(e)[:100]}...",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=14, color="#ef4444"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return error_fig
+            print(f"Error creating national district map: {e}")
+            return error_figure("❌ Error loading the all-India district map", f"Error: {str(e)[:100]}...", height=500)
 
     # District rankings callback
     @app.callback(
@@ -235,150 +404,59 @@ def register_district_callbacks(app):
         [Input('district-state-dropdown', 'value'),
          Input('district-attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_district_rankings(selected_state, selected_attribute):
         """Create beautiful district rankings visualization"""
+        district_data = get_district_data()
         
         if not selected_state:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🏆 District Rankings - Select a state to analyze",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a state and metric to see district rankings! 🏆📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('district-rankings')
         
         try:
-            # Get district data for selected state
-            state_districts = district_data[district_data['State name'] == selected_state].copy()
-            
-            if selected_attribute and selected_attribute in state_districts.columns:
-                # Sort districts by selected attribute
-                rankings_data = state_districts[['District name', selected_attribute]].dropna()
-                rankings_data = rankings_data.sort_values(selected_attribute, ascending=False)
-                
-                # Take top 15 districts for better visualization
-                if len(rankings_data) > 15:
-                    rankings_data = rankings_data.head(15)
-                
-                # Create color gradient based on performance
-                colors = []
-                max_val = rankings_data[selected_attribute].max()
-                min_val = rankings_data[selected_attribute].min()
-                
-                for value in rankings_data[selected_attribute]:
-                    normalized = (value - min_val) / (max_val - min_val) if max_val != min_val else 0.5
-                    if normalized > 0.7:
-                        colors.append('#10b981')  # Green for top performers
-                    elif normalized > 0.4:
-                        colors.append('#f59e0b')  # Amber for middle
-                    else:
-                        colors.append('#ef4444')  # Red for low performers
+            if selected_attribute and selected_attribute in district_data.columns:
+                # Top 15 districts by the selected attribute, from the precomputed rank order
+                ranks = get_rank_matrix('district')
+                positions = top_k(ranks, selected_attribute, 15, group=selected_state)
+                rankings_data = pd.DataFrame({
+                    'District name': district_data['District name'].to_numpy()[positions],
+                    selected_attribute: ranks.values[positions, ranks.columns[selected_attribute]]
+                })
                 
-                # Create horizontal bar chart
-                rankings_fig = go.Figure(data=[
-                    go.Bar(
-                        y=rankings_data['District name'],
-                        x=rankings_data[selected_attribute],
-                        orientation='h',
-                        marker=dict(
-                            color=colors,
-                            line=dict(color='rgba(255,255,255,0.8)', width=1)
+                # Build the horizontal bar chart with red/amber/green performance colours
+                short_label = get_district_short_label(selected_attribute)
+                values = rankings_data[selected_attribute].to_numpy()
+                rankings_fig = bar_figure(
+                    categories=rankings_data['District name'],
+                    values=values,
+                    colors=tier_colors(values),
+                    title=f"🏆 District Rankings: {short_label} in {selected_state}",
+                    xaxis_title=f"{short_label} ({unit_name(selected_attribute)})",
+                    hovertemplate="<b>%{y}</b><br>" +
+                                 f"{short_label}: %{{x:.1f}}{unit_suffix(selected_attribute)}<br>" +
+                                 "<extra></extra>",
+                    text=values.round(1),
+                    textfont=dict(size=10, color='#374151'),
+                    layout=dict(
+                        title=dict(font=dict(size=16)),
+                        height=400,
+                        margin=dict(l=120),
+                        xaxis=dict(
+                            title=dict(font=dict(size=12)),
+                            tickfont=dict(size=10)
                         ),
-                        hovertemplate="<b>%{y}</b><br>" +
-                                     f"{get_district_short_label(selected_attribute)}: %{{x:.1f}}%<br>" +
-                                     "<extra></extra>",
-                        text=rankings_data[selected_attribute].round(1),
-                        textposition='outside',
-                        textfont=dict(size=10, color='#374151')
-                    )
-                ])
-                
-                rankings_fig.update_layout(
-                    title=f"🏆 District Rankings: {get_district_short_label(selected_attribute)} in {selected_state}",
-                    title_x=0.5,
-                    title_font_size=16,
-                    title_font_weight="bold",
-                    title_font_color="#2d3748",
-                    height=400,
-                    margin=dict(l=120, r=50, t=60, b=50),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(248,250,252,0.8)',
-                    font_family=FONT_FAMILY,
-                    xaxis=dict(
-                        title=f"{get_district_short_label(selected_attribute)} (%)",
-                        title_font_size=12,
-                        title_font_weight="bold",
-                        title_font_color="#4a5568",
-                        tickfont=dict(size=10, color="#6b7280"),
-                        gridcolor="rgba(203,213,225,0.5)",
-                        gridwidth=1,
-                        showgrid=True
-                    ),
-                    yaxis=dict(
-                        title="",
-                        tickfont=dict(size=9, color="#374151"),
-                        showgrid=False,
-                        categoryorder='total ascending'
+                        yaxis=dict(tickfont=dict(size=9))
                     )
                 )
                 
             else:
-                # Show placeholder for no attribute selected
-                rankings_fig = go.Figure()
-                rankings_fig.update_layout(
-                    title=f"🏆 District Rankings for {selected_state} - Select a metric",
-                    title_x=0.5,
-                    title_font_size=16,
-                    title_font_weight="bold",
-                    title_font_color="#64748b",
-                    height=400,
-                    template="plotly_white",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_family=FONT_FAMILY,
-                    annotations=[
-                        dict(
-                            text="Select a metric to see district rankings!",
-                            xref="paper", yref="paper",
-                            x=0.5, y=0.5,
-                            xanchor='center', yanchor='middle',
-                            font=dict(size=14, color="#94a3b8"),
-                            showarrow=False
-                        )
-                    ]
-                )
+                # Show placeholder for no attribute selected (built once per state)
+                rankings_fig = metric_prompt_figure('district-rankings', selected_state)
             
             return rankings_fig
             
         except Exception as e:
             print(f"Error in district rankings: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title="❌ Error loading district rankings",
-                title_x=0.5,
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure("❌ Error loading district rankings", height=400)
 
     # District scatter plot callback
     @app.callback(
@@ -386,68 +464,41 @@ def register_district_callbacks(app):
         [Input('district-state-dropdown', 'value'),
          Input('district-attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_district_scatter(selected_state, selected_attribute):
         """Create district performance matrix scatter plot"""
-        
         if not selected_state:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="📊 Performance Matrix - Select a state to analyze",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a state to see district performance analysis! 📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('district-scatter')
         
         try:
-            state_districts = district_data[district_data['State name'] == selected_state].copy()
+            state_districts = districts_in_state(selected_state)
             
             if selected_attribute and selected_attribute in state_districts.columns:
                 # Create performance vs literacy scatter plot
                 if 'Literate_%' in state_districts.columns:
-                    scatter_fig = px.scatter(
-                        state_districts,
-                        x='Literate_%',
-                        y=selected_attribute,
-                        hover_name='District name',
-                        title=f"📊 {get_district_short_label(selected_attribute)} vs Literacy in {selected_state}",
-                        labels={
-                            'Literate_%': 'Literacy Rate (%)',
-                            selected_attribute: f"{get_district_short_label(selected_attribute)} (%)"
-                        },
-                        color=selected_attribute,
-                        color_continuous_scale="Viridis",
-                        size_max=15
-                    )
-                    
-                    # Add trend line
-                    scatter_fig.update_traces(
+                    short_label = get_district_short_label(selected_attribute)
+                    values = state_districts[selected_attribute].to_numpy()
+                    scatter_fig = scatter_figure(
+                        x=state_districts['Literate_%'].to_numpy(),
+                        y=values,
+                        color=values,
+                        title=f"📊 {short_label} vs Literacy in {selected_state}",
+                        colorscale="Viridis",
+                        hovertext=state_districts['District name'],
+                        hovertemplate="<b>%{hovertext}</b><br>" +
+                                     "Literacy: %{x:.1f}%<br>" +
+                                     f"{short_label}: %{{y:.1f}}{unit_suffix(selected_attribute)}<br>" +
+                                     "<extra></extra>",
+                        xaxis_title='Literacy Rate (%)',
+                        yaxis_title=f"{short_label} ({unit_name(selected_attribute)})",
+                        colorbar_title=f"{short_label} ({unit_name(selected_attribute)})",
                         marker=dict(
                             size=12,
                             line=dict(width=2, color='white'),
                             opacity=0.8
-                        ),
-                        hovertemplate="<b>%{hovertext}</b><br>" +
-                                     "Literacy: %{x:.1f}%<br>" +
-                                     f"{get_district_short_label(selected_attribute)}: %{{y:.1f}}%<br>" +
-                                     "<extra></extra>"
+                        )
                     )
+                    return scatter_fig
                     
                 else:
                     # Create simple distribution plot
@@ -456,34 +507,11 @@ def register_district_callbacks(app):
                         y=selected_attribute,
                         hover_name='District name',
                         title=f"📊 {get_district_short_label(selected_attribute)} Distribution in {selected_state}",
-                        labels={selected_attribute: f"{get_district_short_label(selected_attribute)} (%)"}
+                        labels={selected_attribute: f"{get_district_short_label(selected_attribute)} ({unit_name(selected_attribute)})"}
                     )
             else:
-                # Show placeholder
-                scatter_fig = go.Figure()
-                scatter_fig.update_layout(
-                    title=f"📊 Performance Matrix for {selected_state} - Select a metric",
-                    title_x=0.5,
-                    title_font_size=16,
-                    title_font_weight="bold",
-                    title_font_color="#64748b",
-                    height=400,
-                    template="plotly_white",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_family=FONT_FAMILY,
-                    annotations=[
-                        dict(
-                            text="Select a metric to see performance analysis!",
-                            xref="paper", yref="paper",
-                            x=0.5, y=0.5,
-                            xanchor='center', yanchor='middle',
-                            font=dict(size=14, color="#94a3b8"),
-                            showarrow=False
-                        )
-                    ]
-                )
-                return scatter_fig
+                # Show placeholder (built once per state)
+                return metric_prompt_figure('district-scatter', selected_state)
             
             # Update layout
             scatter_fig.update_layout(
@@ -502,14 +530,7 @@ def register_district_callbacks(app):
             
         except Exception as e:
             print(f"Error in district scatter: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title="❌ Error loading district analysis",
-                title_x=0.5,
-                height=400,
-                template="plotly_white"
-            )
-            return error_fig
+            return error_figure("❌ Error loading district analysis", height=400)
 
     # District summary table callback
     @app.callback(
@@ -521,7 +542,6 @@ def register_district_callbacks(app):
     )
     def update_district_summary_table(selected_state, selected_attribute, search_term, limit):
         """Create beautiful interactive district summary table"""
-        
         if not selected_state:
             return html.Div([
                 html.Div([
@@ -554,7 +574,7 @@ def register_district_callbacks(app):
         
         try:
             # Filter data for selected state
-            state_districts = district_data[district_data['State name'] == selected_state].copy()
+            state_districts = districts_in_state(selected_state)
             
             if state_districts.empty:
                 return html.Div([
@@ -565,12 +585,6 @@ def register_district_callbacks(app):
                     })
                 ])
             
-            # Apply search filter if provided
-            if search_term:
-                state_districts = state_districts[
-                    state_districts['District name'].str.contains(search_term, case=False, na=False)
-                ]
-            
             # Select key columns for the table
             display_columns = ['District name']
             
@@ -587,18 +601,25 @@ def register_district_callbacks(app):
             # Limit additional columns to keep table manageable
             display_columns.extend(additional_cols[:5])
             
-            # Filter and sort data
-            table_data = state_districts[display_columns].copy()
+            # Filter, search, sort and limit in one query
+            sql = f"SELECT {', '.join(quote_identifier(col) for col in display_columns)} FROM districts WHERE \"State name\" = ?"
+            params = [selected_state]
+            if search_term:
+                sql += ' AND INSTR(LOWER("District name"), LOWER(?)) > 0'
+                params.append(search_term)
             
             # Sort by selected attribute if available, otherwise by literacy
-            if selected_attribute and selected_attribute in table_data.columns:
-                table_data = table_data.sort_values(selected_attribute, ascending=False)
-            elif 'Literate_%' in table_data.columns:
-                table_data = table_data.sort_values('Literate_%', ascending=False)
+            if selected_attribute and selected_attribute in display_columns:
+                sql += f' ORDER BY {quote_identifier(selected_attribute)} DESC'
+            elif 'Literate_%' in display_columns:
+                sql += ' ORDER BY "Literate_%" DESC'
             
             # Apply limit
-            if limit and limit < len(table_data):
-                table_data = table_data.head(limit)
+            if limit:
+                sql += ' LIMIT ?'
+                params.append(int(limit))
+            
+            table_data = query(sql, params)
             
             # Create table headers with beautiful styling
             table_headers = []
@@ -640,8 +661,12 @@ def register_district_callbacks(app):
                     else:
                         # Numeric values with performance indicators
                         value = row[col]
-                        if pd.notna(value):
-                            # Performance color coding
+                        if pd.notna(value) and unit_name(col) != '%':
+                            # Counts and rates have no good/bad thresholds
+                            cell_content = html.Span(f"{value:.1f}{unit_suffix(col)}",
+                                                     style={'fontWeight': '600', 'color': '#374151'})
+                        elif pd.notna(value):
+                            # Performance color coding (percentages)
                             if value >= 80:
                                 bg_color = 'rgba(16, 185, 129, 0.1)'  # Green background
                                 text_color = '#059669'
@@ -715,12 +740,12 @@ def register_district_callbacks(app):
                     
                     html.Div([
                         html.Span("🏆", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
-                        html.Strong(f"Best: {best_district} ({best_value:.1f}%)")
+                        html.Strong(f"Best: {best_district} ({best_value:.1f}{unit_suffix(selected_attribute)})")
                     ], style={'marginBottom': '0.5rem'}),
                     
                     html.Div([
                         html.Span("📈", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
-                        html.Strong(f"Average: {avg_value:.1f}%")
+                        html.Strong(f"Average: {avg_value:.1f}{unit_suffix(selected_attribute)}")
                     ])
                 ], style={
                     'background': 'linear-gradient(135deg, #f0f9ff, #e0f2fe)',
@@ -767,4 +792,314 @@ def register_district_callbacks(app):
                 })
             ])
 
+    # District profile dropdown callback
+    @app.callback(
+        Output('district-profile-dropdown', 'options'),
+        [Input('district-state-dropdown', 'value')]
+    )
+    def update_district_profile_dropdown(selected_state):
+        """List the districts of the selected state"""
+        if not selected_state:
+            return []
+        state_districts = districts_in_state(selected_state).sort_values('District name')
+        return [{"label": name, "value": int(code)}
+                for code, name in zip(state_districts['District code'], state_districts['District name'])]
+
+    # District profile card callback
+    @app.callback(
+        Output('district-profile-card', 'children'),
+        [Input('district-profile-dropdown', 'value')]
+    )
+    def update_district_profile_card(district_code):
+        """National and within-state percentile of a district on every attribute"""
+        if district_code is None:
+            return html.Div("Choose a district to see where it stands on every metric.", style={
+                'textAlign': 'center',
+                'color': '#94a3b8',
+                'padding': '2rem 0'
+            })
+        
+        try:
+            ranks = get_rank_matrix('district')
+            profile = entity_profile(ranks, district_code)
+            row = ranks.positions[district_code]
+            district_data = get_district_data()
+            district_name = district_data['District name'].iloc[row]
+            state_name = ranks.groups[row]
+            
+            # Area and population density from the district polygons
+            geometry = get_geometry_metrics().districts
+            geometry = geometry[geometry['dt_code'] == int(district_code)]
+            size_text = ""
+            if len(geometry):
+                area = geometry['area_km2'].iloc[0]
+                density = geometry['Population_Density'].iloc[0] if 'Population_Density' in geometry.columns else np.nan
+                size_text = f" · {area:,.0f} km²" + (f" · {density:,.0f} people/km²" if pd.notna(density) else "")
+            
+            sections = []
+            for category, attributes in get_catalog().district_categories.items():
+                rows = []
+                for attr in attributes:
+                    if attr not in profile.index or pd.isna(profile.at[attr, 'value']):
+                        continue
+                    percentile = profile.at[attr, 'percentile']
+                    color = '#059669' if percentile >= 66 else '#d97706' if percentile >= 33 else '#dc2626'
+                    rows.append(html.Div([
+                        html.Span(get_district_short_label(attr), style={'flex': '0 0 35%', 'fontSize': '13px'}),
+                        html.Span(f"{profile.at[attr, 'value']:.1f}{unit_suffix(attr)}", style={'flex': '0 0 12%', 'fontWeight': '600', 'fontSize': '13px'}),
+                        html.Div(html.Div(style={
+                            'width': f"{percentile:.0f}%",
+                            'height': '8px',
+                            'background': color,
+                            'borderRadius': '4px'
+                        }), style={'flex': '1', 'background': '#f1f5f9', 'borderRadius': '4px', 'margin': '0 1rem'}),
+                        html.Span(f"P{percentile:.0f} · #{profile.at[attr, 'rank']} of {profile.at[attr, 'count']} · "
+                                  f"#{profile.at[attr, 'group_rank']} in state",
+                                  style={'flex': '0 0 28%', 'fontSize': '12px', 'color': '#64748b'})
+                    ], style={'display': 'flex', 'alignItems': 'center', 'padding': '4px 0'}))
+                if rows:
+                    sections.append(html.Div([
+                        html.H4(f"📊 {category}", style={'color': COLORS['dark'], 'margin': '1rem 0 0.5rem 0'})
+                    ] + rows))
+            
+            return html.Div([
+                html.Div([
+                    html.Span("📍", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
+                    html.Strong(f"{district_name}, {str(state_name).title()}"),
+                    html.Span(size_text),
+                    html.Span(" · national percentile (P), national rank and rank within the state",
+                              style={'color': '#64748b', 'fontSize': '13px'})
+                ], style={
+                    'background': 'linear-gradient(135deg, #f0f9ff, #e0f2fe)',
+                    'padding': '1rem',
+                    'borderRadius': '8px',
+                    'fontSize': '14px',
+                    'color': '#0369a1',
+                    'border': '1px solid #bae6fd'
+                })
+            ] + sections)
+            
+        except Exception as e:
+            print(f"Error creating district profile: {e}")
+            return html.Div([
+                html.H3("❌ Error loading district profile", style={
+                    'textAlign': 'center', 
+                    'color': '#ef4444',
+                    'margin': '2rem 0'
+                })
+            ])
+
+    # Similar districts category options
+    @app.callback(
+        Output('district-similar-categories', 'options'),
+        [Input('tab-content', 'children')]
+    )
+    def update_district_similar_categories(_):
+        """Offer every district category that has columns in the data"""
+        return [{"label": f"📊 {category}", "value": category}
+                for category, attributes in get_catalog().district_categories.items() if attributes]
+
+    # Similar districts callback
+    @app.callback(
+        Output('district-similar-results', 'children'),
+        [Input('district-profile-dropdown', 'value'),
+         Input('district-similar-metric', 'value'),
+         Input('district-similar-categories', 'value')]
+    )
+    def update_district_similar_results(district_code, metric, categories):
+        """Nearest districts nationwide to the profiled district"""
+        if district_code is None:
+            return html.Div("Choose a district in the profile above to find districts like it.", style={
+                'textAlign': 'center',
+                'color': '#94a3b8',
+                'padding': '2rem 0'
+            })
+        
+        try:
+            started = time.perf_counter()
+            category_weights = {category: 1.0 for category in categories} if categories else None
+            positions, distances = find_similar(district_code, k=10, metric=metric, category_weights=category_weights)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            district_data = get_district_data()
+            header_style = {
+                'background': 'linear-gradient(135deg, #6366f1, #8b5cf6)',
+                'color': 'white',
+                'padding': '10px 14px',
+                'textAlign': 'left',
+                'fontWeight': '600',
+                'fontSize': '13px'
+            }
+            cell_style = {'padding': '8px 14px', 'fontSize': '13px', 'borderBottom': '1px solid #e2e8f0'}
+            table = html.Table([
+                html.Thead(html.Tr([html.Th(text, style=header_style) for text in ("#", "District", "State", "Distance")])),
+                html.Tbody([
+                    html.Tr([
+                        html.Td(str(rank), style=cell_style),
+                        html.Td(html.Strong(district_data['District name'].iloc[position]), style=cell_style),
+                        html.Td(str(district_data['State name'].iloc[position]).title(), style=cell_style),
+                        html.Td(f"{distance:.3f}", style=cell_style)
+                    ], style={'backgroundColor': '#f8fafc' if rank % 2 else 'white'})
+                    for rank, (position, distance) in enumerate(zip(positions, distances), start=1)
+                ])
+            ], style={
+                'width': '100%',
+                'borderCollapse': 'collapse',
+                'fontFamily': FONT_FAMILY
+            })
+            
+            summary = html.Div([
+                html.Span("⚡", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
+                html.Span(f"{metric.title()} distance on z-scored metrics"
+                          f"{' (' + ', '.join(categories) + ')' if categories else ''} · {elapsed_ms:.1f} ms")
+            ], style={
+                'background': 'linear-gradient(135deg, #f0f9ff, #e0f2fe)',
+                'padding': '1rem',
+                'borderRadius': '8px',
+                'marginBottom': '1rem',
+                'fontSize': '14px',
+                'color': '#0369a1',
+                'border': '1px solid #bae6fd'
+            })
+            return html.Div([summary, table])
+            
+        except Exception as e:
+            print(f"Error finding similar districts: {e}")
+            return html.Div([
+                html.H3("❌ Error finding similar districts", style={
+                    'textAlign': 'center', 
+                    'color': '#ef4444',
+                    'margin': '2rem 0'
+                })
+            ])
+
+    # Query builder and all-India map attribute options (same grouped list for every dropdown)
+    @app.callback(
+        [Output(f'district-filter-attribute-{row}', 'options') for row in range(1, FILTER_CONDITION_ROWS + 1)]
+        + [Output('national-district-attribute', 'options')],
+        [Input('tab-content', 'children')]
+    )
+    def update_district_filter_attributes(_):
+        """Populate the query builder and all-India map metric dropdowns"""
+        district_data = get_district_data()
+        options = []
+        for category, attributes in get_catalog().district_categories.items():
+            category_attrs = [{"label": f"  {get_district_short_label(attr)}", "value": attr}
+                              for attr in attributes if attr in district_data.columns]
+            if category_attrs:
+                options.append({"label": f"📊 {category}", "value": f"category_{category}", "disabled": True})
+                options.extend(category_attrs)
+        return [options] * (FILTER_CONDITION_ROWS + 1)
+
+    # Query builder results callback
+    @app.callback(
+        Output('district-filter-results', 'children'),
+        [Input(f'district-filter-{part}-{row}', 'value')
+         for row in range(1, FILTER_CONDITION_ROWS + 1) for part in ('attribute', 'operator', 'value')]
+    )
+    def update_district_filter_results(*conditions):
+        """List the districts (nationally) that satisfy every complete condition"""
+        predicates = [(attribute, operator, value)
+                      for attribute, operator, value in zip(conditions[0::3], conditions[1::3], conditions[2::3])
+                      if attribute and operator and value is not None]
+        
+        if not predicates:
+            return html.Div("Pick a metric, a comparison and a value to find matching districts.", style={
+                'textAlign': 'center',
+                'color': '#94a3b8',
+                'padding': '2rem 0'
+            })
+        
+        try:
+            started = time.perf_counter()
+            matches, state_counts = filter_districts(predicates)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            condition_text = " AND ".join(f"{get_district_short_label(attribute)} {operator} {value:g}{unit_suffix(attribute)}"
+                                          for attribute, operator, value in predicates)
+            summary = html.Div([
+                html.Div([
+                    html.Span("🔎", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
+                    html.Strong(f"{len(matches)} districts match {condition_text}")
+                ], style={'marginBottom': '0.5rem'}),
+                html.Div([
+                    html.Span("⚡", style={'fontSize': '1.2rem', 'marginRight': '0.5rem'}),
+                    html.Span(f"Found in {elapsed_ms:.1f} ms across {len(state_counts)} states")
+                ])
+            ], style={
+                'background': 'linear-gradient(135deg, #f0f9ff, #e0f2fe)',
+                'padding': '1rem',
+                'borderRadius': '8px',
+                'marginBottom': '1rem',
+                'fontSize': '14px',
+                'color': '#0369a1',
+                'border': '1px solid #bae6fd'
+            })
+            
+            if matches.empty:
+                return html.Div([summary])
+            
+            # Matching districts per state
+            state_chips = html.Div([
+                html.Span(f"{state.title()}: {count}", style={
+                    'display': 'inline-block',
+                    'background': '#eef2ff',
+                    'color': '#4338ca',
+                    'padding': '4px 10px',
+                    'borderRadius': '999px',
+                    'margin': '0 0.5rem 0.5rem 0',
+                    'fontSize': '12px',
+                    'fontWeight': '600'
+                }) for state, count in state_counts.items()
+            ], style={'marginBottom': '1rem'})
+            
+            # Matching districts, best first by the first condition's metric
+            columns = list(dict.fromkeys(attribute for attribute, _, _ in predicates))
+            table_data = matches.sort_values(columns[0], ascending=predicates[0][1].startswith('<')).head(100)
+            header_style = {
+                'background': 'linear-gradient(135deg, #6366f1, #8b5cf6)',
+                'color': 'white',
+                'padding': '10px 14px',
+                'textAlign': 'left',
+                'fontWeight': '600',
+                'fontSize': '13px',
+                'position': 'sticky',
+                'top': '0'
+            }
+            cell_style = {'padding': '8px 14px', 'fontSize': '13px', 'borderBottom': '1px solid #e2e8f0'}
+            units = {col: unit_suffix(col) for col in columns}
+            table = html.Table([
+                html.Thead(html.Tr([html.Th("District", style=header_style), html.Th("State", style=header_style)] +
+                                   [html.Th(get_district_short_label(col), style=header_style) for col in columns])),
+                html.Tbody([
+                    html.Tr([html.Td(html.Strong(row['District name']), style=cell_style),
+                             html.Td(str(row['State name']).title(), style=cell_style)] +
+                            [html.Td(f"{row[col]:.1f}{units[col]}", style=cell_style) for col in columns],
+                            style={'backgroundColor': '#f8fafc' if idx % 2 == 0 else 'white'})
+                    for idx, (_, row) in enumerate(table_data.iterrows())
+                ])
+            ], style={
+                'width': '100%',
+                'borderCollapse': 'collapse',
+                'fontFamily': FONT_FAMILY
+            })
+            
+            note = []
+            if len(matches) > len(table_data):
+                note = [html.P(f"Showing the first {len(table_data)} of {len(matches)} districts", style={
+                    'color': '#94a3b8', 'fontSize': '12px', 'marginTop': '0.5rem'
+                })]
+            
+            return html.Div([summary, state_chips, table] + note)
+            
+        except Exception as e:
+            print(f"Error in district query builder: {e}")
+            return html.Div([
+                html.H3("❌ Error running district query", style={
+                    'textAlign': 'center', 
+                    'color': '#ef4444',
+                    'margin': '2rem 0'
+                })
+            ])
+
     print("✅ District analysis callbacks registered successfully!")
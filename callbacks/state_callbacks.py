@@ -2,22 +2,72 @@
 # STATE ANALYSIS CALLBACKS
 # ===========================================
 
-from dash import Input, Output, callback_context
+from dash import Input, Output, ClientsideFunction, callback_context
 from dash.dependencies import State
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from data.loader import load_state_data, load_geojson_data
+import numpy as np
+from data.loader import (load_state_data, load_geojson_data, get_state_data, get_data_store,
+                         add_reload_listener, get_shared_matrix)
+from data.shared import matrix_lookup
+from data.ranks import get_rank_matrix, top_k
 from utils.helpers import get_short_label
+from utils.serialization import compact_figure_output
+from utils.figures import (choropleth_figure, bar_figure, tier_colors, topology_reference, choropleth_as_tiles,
+                           classed_choropleth)
+from utils.placeholders import placeholder_figure, register_placeholder, error_figure
 from utils.insights import generate_insights, create_insights_layout
-from config.settings import FONT_FAMILY, STATE_NAME_MAPPING, ATTRIBUTE_CATEGORIES
+from data.catalog import get_category_columns
+from data.boundaries import ensure_topology, topology_urls, geometry_tier
+from data.tile_map import state_tiles
+from data.classification import get_classification, classify, class_labels
+from config.settings import FONT_FAMILY, STATE_NAME_MAPPING
 
 def register_state_callbacks(app):
     """Register all state analysis callbacks"""
     
-    # Load data
-    state_data = load_state_data()
-    india_geo = load_geojson_data()
+    # Load data (callbacks read the current snapshot through the getters on every call)
+    load_state_data()
+    load_geojson_data()
+    
+    def build_default_india_map(store):
+        """Prebuild the default India map for a data snapshot so the no-selection path is a lookup"""
+        try:
+            india_geo = store.india_geo
+            state_names = [feature['properties']['name'] for feature in india_geo['features']]
+            default_fig = choropleth_figure(
+                geojson=india_geo,
+                locations=state_names,
+                values=np.ones(len(state_names)),
+                featureidkey='properties.name',
+                title="🗺️ India Map - Select an attribute to see beautiful data visualization",
+                colorscale=["#e0f2fe", "#0369a1", "#1e40af"],
+                hovertemplate="<b>%{location}</b><br>Click to explore data<extra></extra>",
+                showscale=False,
+                marker_line=dict(color="rgba(255,255,255,0.9)", width=1.2),
+                layout=dict(geo=dict(
+                    showcoastlines=True,
+                    coastlinecolor="rgba(255,255,255,0.9)",
+                    coastlinewidth=1.2,
+                    projection=dict(type='natural earth')
+                ))
+            )
+            register_placeholder('india-map', 'no-selection', default_fig)
+        except Exception as e:
+            print(f"Error creating default India map: {e}")
+            register_placeholder('india-map', 'no-selection', placeholder_figure('india-map', 'loading'))
+    
+    # Rebuilt whenever a reload publishes a new snapshot
+    ensure_topology()
+    build_default_india_map(get_data_store())
+    add_reload_listener(build_default_india_map)
+    
+    # The browser resolves the boundary reference of the India map (assets/topology.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='topology', function_name='attach'),
+        Output('india-map', 'figure'),
+        [Input('india-map-figure', 'data')]
+    )
     
     # Category to attribute dropdown callback
     @app.callback(
@@ -29,367 +79,178 @@ def register_state_callbacks(app):
         if not selected_category:
             return []
         
-        attributes = ATTRIBUTE_CATEGORIES.get(selected_category, [])
+        attributes = get_category_columns(selected_category)
         return [{"label": get_short_label(attr), "value": attr} for attr in attributes]
 
     # India Map visualization callback
     @app.callback(
-        Output('india-map', 'figure'),
-        [Input('attribute-dropdown', 'value')]
+        Output('india-map-figure', 'data'),
+        [Input('attribute-dropdown', 'value'),
+         Input('india-map-mode', 'value'),
+         Input('india-map-classes', 'value')],
+        [State('client-bandwidth', 'data')]
     )
-    def update_india_map(selected_attribute):
+    @compact_figure_output
+    def update_india_map(selected_attribute, map_mode='polygons', class_method='continuous', bandwidth=None):
         """Update India choropleth map based on selected attribute"""
+        store = get_data_store()
+        state_data, india_geo = store.state_data, store.india_geo
+        # Boundary tier(s) the browser paints, from its measured bandwidth
+        urls = topology_urls(geometry_tier((bandwidth or {}).get('mbps')))
         
-        # Show default India map if no attribute selected
+        # Show default India map (prebuilt for the current data snapshot) if no attribute selected
         if not selected_attribute:
-            try:
-                # Create dummy data for all states to show boundaries
-                state_names = []
-                for feature in india_geo['features']:
-                    state_names.append(feature['properties']['name'])
-                
-                # Create DataFrame with uniform values to show all states
-                dummy_data = pd.DataFrame({
-                    'state': state_names,
-                    'value': [1] * len(state_names)
-                })
-                
-                # Create beautiful default map with gradient colors
-                default_fig = px.choropleth(
-                    dummy_data,
-                    geojson=india_geo,
-                    locations='state',
-                    color='value',
-                    featureidkey='properties.name',
-                    title="🗺️ India Map - Select an attribute to see beautiful data visualization",
-                    color_continuous_scale=["#e0f2fe", "#0369a1", "#1e40af"],
-                    labels={'value': 'States'}
-                )
-                
-                default_fig.update_geos(
-                    showframe=False,
-                    showcoastlines=True,
-                    coastlinecolor="rgba(255,255,255,0.9)",
-                    coastlinewidth=1.2,
-                    projection_type='natural earth',
-                    fitbounds="locations",
-                    bgcolor="rgba(0,0,0,0)"
-                )
-                
-                default_fig.update_layout(
-                    title_x=0.5,
-                    title_font_size=20,
-                    title_font_weight="bold",
-                    title_font_color="#2d3748",
-                    height=500,
-                    margin=dict(l=0, r=0, t=60, b=0),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_family=FONT_FAMILY,
-                    coloraxis_showscale=False
-                )
-                
-                # Add beautiful state borders
-                default_fig.update_traces(
-                    marker_line_color="rgba(255,255,255,0.9)",
-                    marker_line_width=1.2,
-                    hovertemplate="<b>%{location}</b><br>Click to explore data<extra></extra>"
-                )
-                
-                return default_fig
-                
-            except Exception as e:
-                print(f"Error creating default India map: {e}")
-                # Fallback to simple figure
-                fallback_fig = go.Figure()
-                fallback_fig.update_layout(
-                    title="🗺️ India Map Loading...",
-                    title_x=0.5,
-                    title_font_size=18,
-                    height=500,
-                    template="plotly_white",
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)'
-                )
-                return fallback_fig
+            default_fig = placeholder_figure('india-map')
+            if map_mode == 'tiles' and any(trace.get('type') == 'choropleth' for trace in default_fig['data']):
+                return choropleth_as_tiles(default_fig, state_tiles(STATE_NAME_MAPPING))
+            return topology_reference(default_fig, 'states', *urls)
         
         try:
             # Prepare data for visualization
             viz_data = state_data[['State name', selected_attribute]].dropna()
-            viz_data = viz_data.groupby('State name')[selected_attribute].mean().reset_index()
+            viz_data = viz_data.groupby('State name', observed=True)[selected_attribute].mean().reset_index()
             
             # Map CSV state names to GeoJSON state names for choropleth
             viz_data['Mapped_State'] = viz_data['State name'].map(STATE_NAME_MAPPING)
             viz_data = viz_data.dropna(subset=['Mapped_State'])  # Remove states not in mapping
             
-            # Beautiful India Choropleth Map with enhanced styling
-            india_map_fig = px.choropleth(
-                viz_data,
+            # Beautiful India Choropleth Map built directly from arrays
+            short_label = get_short_label(selected_attribute)
+            india_map_fig = choropleth_figure(
                 geojson=india_geo,
-                locations='Mapped_State',
-                color=selected_attribute,
+                locations=viz_data['Mapped_State'],
+                values=viz_data[selected_attribute].to_numpy(),
                 featureidkey='properties.name',
-                title=f"🗺️ {get_short_label(selected_attribute)} Across Indian States",
-                color_continuous_scale="RdYlBu_r",  # Beautiful red-yellow-blue gradient (reversed)
-                labels={selected_attribute: f"{get_short_label(selected_attribute)} (%)"},
-                hover_name='State name',  # Show original state name on hover
-                hover_data={selected_attribute: ':.1f', 'Mapped_State': False}
-            )
-            
-            india_map_fig.update_geos(
-                showframe=False,
-                showcoastlines=True,
-                coastlinecolor="rgba(255,255,255,0.8)",
-                coastlinewidth=1,
-                projection_type='natural earth',
-                fitbounds="locations",
-                bgcolor="rgba(0,0,0,0)"
-            )
-            
-            # Enhanced layout with beautiful styling
-            india_map_fig.update_layout(
-                title_x=0.5,
-                title_font_size=20,
-                title_font_weight="bold",
-                title_font_color="#2d3748",
-                height=500,
-                margin=dict(l=0, r=0, t=60, b=0),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                coloraxis_colorbar=dict(
-                    title=f"{get_short_label(selected_attribute)} (%)",
-                    title_font_size=14,
-                    title_font_weight="bold",
-                    title_font_color="#2d3748",
-                    tickfont_size=11,
-                    tickfont_color="#4a5568",
+                title=f"🗺️ {short_label} Across Indian States",
+                colorscale="RdYlBu_r",  # Beautiful red-yellow-blue gradient (reversed)
+                hovertext=viz_data['State name'],  # Show original state name on hover
+                hovertemplate="<b>%{hovertext}</b><br>" +
+                             f"{short_label}: %{{z:.1f}}%<br>" +
+                             "<extra></extra>",
+                marker_line=dict(color="rgba(255,255,255,0.8)", width=0.8),
+                colorbar=dict(
+                    title=dict(
+                        text=f"{short_label} (%)",
+                        font=dict(size=14, weight="bold", color="#2d3748")
+                    ),
+                    tickfont=dict(size=11, color="#4a5568"),
                     len=0.8,
                     thickness=15,
                     bgcolor="rgba(255,255,255,0.9)",
                     bordercolor="rgba(0,0,0,0.1)",
                     borderwidth=1,
                     x=1.02
-                )
+                ),
+                layout=dict(geo=dict(
+                    showcoastlines=True,
+                    coastlinecolor="rgba(255,255,255,0.8)",
+                    coastlinewidth=1,
+                    projection=dict(type='natural earth')
+                ))
             )
             
-            # Add beautiful hover template
-            india_map_fig.update_traces(
-                hovertemplate="<b>%{hovertext}</b><br>" +
-                             f"{get_short_label(selected_attribute)}: %{{z:.1f}}%<br>" +
-                             "<extra></extra>",
-                marker_line_color="rgba(255,255,255,0.8)",
-                marker_line_width=0.8
-            )
+            # Discrete colour classes from breaks over all states (cached per attribute)
+            if class_method and class_method != 'continuous':
+                breaks = get_classification(selected_attribute, class_method, level='state').breaks
+                if len(breaks) > 1:
+                    india_map_fig = classed_choropleth(india_map_fig, classify(viz_data[selected_attribute], breaks),
+                                                       class_labels(breaks))
             
-            return india_map_fig
+            # Tile mode: one hexagon per state instead of the boundaries
+            if map_mode == 'tiles':
+                return choropleth_as_tiles(india_map_fig, state_tiles(STATE_NAME_MAPPING))
+            return topology_reference(india_map_fig, 'states', *urls)
             
         except Exception as e:
             print(f"Error in the India map visualization: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title=f"❌ Error loading India map for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}",
-                title_x=0.5,
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure(f"❌ Error loading India map for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}", height=500)
 
     # State Rankings visualization callback
     @app.callback(
         Output('state-rankings', 'figure'),
         [Input('attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_state_rankings(selected_attribute):
         """Create beautiful state rankings bar chart"""
-        
         # Show placeholder if no attribute selected
         if not selected_attribute:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🏆 State Rankings - Select an attribute to see rankings",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a category and attribute to see beautiful state rankings! 📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('state-rankings')
         
         try:
-            # Prepare data for rankings
-            rankings_data = state_data[['State name', selected_attribute]].dropna()
-            rankings_data = rankings_data.groupby('State name')[selected_attribute].mean().reset_index()
-            rankings_data = rankings_data.sort_values(selected_attribute, ascending=False).reset_index(drop=True)
+            # States in rank order from the precomputed rank matrix
+            ranks = get_rank_matrix('state')
+            positions = top_k(ranks, selected_attribute, k=len(ranks.entities))
             
             # Take top 15 and bottom 5 states for better visualization
-            if len(rankings_data) > 20:
-                top_states = rankings_data.head(15)
-                bottom_states = rankings_data.tail(5)
-                display_data = pd.concat([top_states, bottom_states], ignore_index=True)
-            else:
-                display_data = rankings_data
-            
-            # Create beautiful color gradient based on ranking
-            colors = []
-            max_val = display_data[selected_attribute].max()
-            min_val = display_data[selected_attribute].min()
-            
-            for value in display_data[selected_attribute]:
-                # Normalize value between 0 and 1
-                normalized = (value - min_val) / (max_val - min_val) if max_val != min_val else 0.5
-                
-                # Create color gradient from red (low) to green (high)
-                if normalized > 0.7:
-                    colors.append('#10b981')  # Green for top performers
-                elif normalized > 0.4:
-                    colors.append('#f59e0b')  # Amber for middle
-                else:
-                    colors.append('#ef4444')  # Red for low performers
-            
-            # Create horizontal bar chart
-            rankings_fig = go.Figure(data=[
-                go.Bar(
-                    y=display_data['State name'],
-                    x=display_data[selected_attribute],
-                    orientation='h',
-                    marker=dict(
-                        color=colors,
-                        line=dict(color='rgba(255,255,255,0.8)', width=1),
-                        pattern=dict(
-                            shape="", 
-                            size=8, 
-                            solidity=0.3
-                        )
+            if len(positions) > 20:
+                positions = np.concatenate([positions[:15], positions[-5:]])
+            display_data = pd.DataFrame({
+                'State name': np.asarray(ranks.entities, dtype=object)[positions],
+                selected_attribute: ranks.values[positions, ranks.columns[selected_attribute]]
+            })
+            
+            # Build the horizontal bar chart with red/amber/green performance colours
+            short_label = get_short_label(selected_attribute)
+            values = display_data[selected_attribute].to_numpy()
+            rankings_fig = bar_figure(
+                categories=display_data['State name'],
+                values=values,
+                colors=tier_colors(values),
+                title=f"🏆 State Rankings: {short_label}",
+                xaxis_title=f"{short_label} (%)",
+                hovertemplate="<b>%{y}</b><br>" +
+                             f"{short_label}: %{{x:.1f}}%<br>" +
+                             "<extra></extra>",
+                text=values.round(1),
+                textfont=dict(size=11, color='#374151'),
+                layout=dict(
+                    xaxis=dict(
+                        zeroline=True,
+                        zerolinecolor="rgba(107,114,128,0.3)",
+                        zerolinewidth=2
                     ),
-                    hovertemplate="<b>%{y}</b><br>" +
-                                 f"{get_short_label(selected_attribute)}: %{{x:.1f}}%<br>" +
-                                 "<extra></extra>",
-                    text=display_data[selected_attribute].round(1),
-                    textposition='outside',
-                    textfont=dict(size=11, color='#374151')
-                )
-            ])
-            
-            # Beautiful styling for rankings chart
-            rankings_fig.update_layout(
-                title=f"🏆 State Rankings: {get_short_label(selected_attribute)}",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#2d3748",
-                height=500,
-                margin=dict(l=150, r=50, t=60, b=50),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(248,250,252,0.8)',
-                font_family=FONT_FAMILY,
-                xaxis=dict(
-                    title=f"{get_short_label(selected_attribute)} (%)",
-                    title_font_size=14,
-                    title_font_weight="bold",
-                    title_font_color="#4a5568",
-                    tickfont=dict(size=11, color="#6b7280"),
-                    gridcolor="rgba(203,213,225,0.5)",
-                    gridwidth=1,
-                    showgrid=True,
-                    zeroline=True,
-                    zerolinecolor="rgba(107,114,128,0.3)",
-                    zerolinewidth=2
-                ),
-                yaxis=dict(
-                    title="",
-                    tickfont=dict(size=11, color="#374151"),
-                    showgrid=False,
-                    categoryorder='total ascending'  # Order by value
-                ),
-                hoverlabel=dict(
-                    bgcolor="white",
-                    bordercolor="rgba(0,0,0,0.1)",
-                    font_size=12,
-                    font_family=FONT_FAMILY
+                    hoverlabel=dict(
+                        bgcolor="white",
+                        bordercolor="rgba(0,0,0,0.1)",
+                        font=dict(size=12, family=FONT_FAMILY)
+                    ),
+                    # Subtle background gradient
+                    shapes=[dict(
+                        type="rect",
+                        xref="paper", yref="paper",
+                        x0=0, y0=0, x1=1, y1=1,
+                        fillcolor="rgba(248,250,252,0.3)",
+                        layer="below",
+                        line=dict(width=0)
+                    )]
                 )
             )
             
-            # Add subtle background gradient
-            rankings_fig.add_shape(
-                type="rect",
-                xref="paper", yref="paper",
-                x0=0, y0=0, x1=1, y1=1,
-                fillcolor="rgba(248,250,252,0.3)",
-                layer="below",
-                line_width=0
-            )
-            
             return rankings_fig
             
         except Exception as e:
             print(f"Error in state rankings visualization: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title=f"❌ Error loading rankings for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}",
-                title_x=0.5,
-                height=500,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure(f"❌ Error loading rankings for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}", height=500)
 
     # Box Plot Distribution visualization callback
     @app.callback(
         Output('box-plot', 'figure'),
         [Input('attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_box_plot(selected_attribute):
         """Create beautiful box plot for distribution analysis"""
+        state_data = get_state_data()
         
         # Show placeholder if no attribute selected
         if not selected_attribute:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="📦 Distribution Summary - Select an attribute to analyze",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a category and attribute to see distribution analysis! 📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('box-plot')
         
         try:
             # Prepare data for box plot
             box_data = state_data[['State name', selected_attribute]].dropna()
-            box_data = box_data.groupby('State name')[selected_attribute].mean().reset_index()
+            box_data = box_data.groupby('State name', observed=True)[selected_attribute].mean().reset_index()
             
             # Create beautiful box plot
             box_fig = go.Figure()
@@ -485,56 +346,26 @@ def register_state_callbacks(app):
             
         except Exception as e:
             print(f"Error in box plot visualization: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title=f"❌ Error loading distribution for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}",
-                title_x=0.5,
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure(f"❌ Error loading distribution for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}", height=400)
 
     # Top States Pie Chart visualization callback
     @app.callback(
         Output('top-states-pie', 'figure'),
         [Input('attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_top_states_pie(selected_attribute):
         """Create beautiful pie chart showing top 7 performing states"""
+        state_data = get_state_data()
         
         # Show placeholder if no attribute selected
         if not selected_attribute:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🥧 Top 7 States - Select an attribute to see leaders",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose a category and attribute to see top performing states! 🏆",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('top-states-pie')
         
         try:
             # Prepare data for pie chart
             pie_data = state_data[['State name', selected_attribute]].dropna()
-            pie_data = pie_data.groupby('State name')[selected_attribute].mean().reset_index()
+            pie_data = pie_data.groupby('State name', observed=True)[selected_attribute].mean().reset_index()
             
             # Get top 7 states
             top_states = pie_data.nlargest(7, selected_attribute)
@@ -633,16 +464,7 @@ def register_state_callbacks(app):
             
         except Exception as e:
             print(f"Error in pie chart visualization: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title=f"❌ Error loading top states for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}",
-                title_x=0.5,
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure(f"❌ Error loading top states for {get_short_label(selected_attribute) if selected_attribute else 'visualization'}", height=400)
 
     # Insights visualization callback
     @app.callback(
@@ -651,6 +473,7 @@ def register_state_callbacks(app):
     )
     def update_insights_card(selected_attribute):
         """Create beautiful insights card with key statistics and observations"""
+        state_data = get_state_data()
         
         if not selected_attribute:
             return create_insights_layout([], None)
@@ -666,35 +489,14 @@ def register_state_callbacks(app):
         Output('correlation-heatmap', 'figure'),
         [Input('attribute-dropdown', 'value')]
     )
+    @compact_figure_output
     def update_correlation_heatmap(selected_attribute):
         """Create beautiful correlation heatmap showing relationships between demographic attributes"""
+        state_data = get_state_data()
         
         # Show placeholder if no attribute selected
         if not selected_attribute:
-            placeholder_fig = go.Figure()
-            placeholder_fig.update_layout(
-                title="🔥 Correlation Heatmap - Select an attribute to see relationships",
-                title_x=0.5,
-                title_font_size=18,
-                title_font_weight="bold",
-                title_font_color="#64748b",
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_family=FONT_FAMILY,
-                annotations=[
-                    dict(
-                        text="Choose an attribute to see stunning correlation analysis! 🔥📊",
-                        xref="paper", yref="paper",
-                        x=0.5, y=0.5,
-                        xanchor='center', yanchor='middle',
-                        font=dict(size=16, color="#94a3b8"),
-                        showarrow=False
-                    )
-                ]
-            )
-            return placeholder_fig
+            return placeholder_figure('correlation-heatmap')
         
         try:
             # Select key demographic metrics for correlation analysis
@@ -717,7 +519,7 @@ def register_state_callbacks(app):
             # If not enough metrics, add more from available columns
             if len(available_metrics) < 8:
                 numeric_cols = [col for col in state_data.columns 
-                              if col != 'State name' and state_data[col].dtype in ['float64', 'int64'] 
+                              if col != 'State name' and pd.api.types.is_numeric_dtype(state_data[col]) 
                               and col not in available_metrics]
                 available_metrics.extend(numeric_cols[:12-len(available_metrics)])
             
@@ -728,19 +530,24 @@ def register_state_callbacks(app):
             if selected_attribute not in final_metrics:
                 final_metrics = [selected_attribute] + final_metrics[:9]
             
-            # Prepare correlation data
-            corr_data = state_data[['State name'] + final_metrics].dropna()
-            corr_data = corr_data.groupby('State name').mean().reset_index()
-            
-            # Calculate correlation matrix
-            correlation_matrix = corr_data[final_metrics].corr()
+            # Correlations are precomputed once per data snapshot in a shared matrix
+            shared_correlation = get_shared_matrix('state_correlation')
+            if shared_correlation is not None and set(final_metrics) <= set(shared_correlation.columns):
+                correlation_values = matrix_lookup(shared_correlation, final_metrics, final_metrics)
+            else:
+                # Prepare correlation data
+                corr_data = state_data[['State name'] + final_metrics].dropna()
+                corr_data = corr_data.groupby('State name', observed=True).mean().reset_index()
+                
+                # Calculate correlation matrix
+                correlation_values = corr_data[final_metrics].corr().values
             
             # Create short labels for better readability
             short_labels = [get_short_label(metric) for metric in final_metrics]
             
             # Create beautiful correlation heatmap
             heatmap_fig = go.Figure(data=go.Heatmap(
-                z=correlation_matrix.values,
+                z=correlation_values,
                 x=short_labels,
                 y=short_labels,
                 colorscale=[
@@ -779,7 +586,7 @@ def register_state_callbacks(app):
             
             # Add correlation values as text annotations
             annotations = []
-            for i, row in enumerate(correlation_matrix.values):
+            for i, row in enumerate(correlation_values):
                 for j, value in enumerate(row):
                     # Only show text for significant correlations or diagonal
                     if abs(value) > 0.3 or i == j:
@@ -843,15 +650,6 @@ def register_state_callbacks(app):
             
         except Exception as e:
             print(f"Error in correlation heatmap: {e}")
-            error_fig = go.Figure()
-            error_fig.update_layout(
-                title="❌ Error loading correlation heatmap",
-                title_x=0.5,
-                height=400,
-                template="plotly_white",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            return error_fig
+            return error_figure("❌ Error loading correlation heatmap", height=400)
 
     print("✅ State analysis callbacks registered successfully!")
@@ -65,6 +65,334 @@ DISTRICT_ATTRIBUTE_CATEGORIES = {
     ]
 }
 
+# Percentage calculation rules: numerator column -> denominator column
+PERCENTAGE_RULES = {
+    'Male_Literate': 'Male',
+    'Female_Literate': 'Female',
+    'Male_SC': 'Male',
+    'Female_SC': 'Female',
+    'Male_ST': 'Male',
+    'Female_ST': 'Female',
+    'Male_Workers': 'Male',
+    'Female_Workers': 'Female',
+    'Main_Workers': 'Population',
+    'Marginal_Workers': 'Population',
+    'Non_Workers': 'Population',
+    'Cultivator_Workers': 'Population',
+    'Agricultural_Workers': 'Population',
+    'Household_Workers': 'Population',
+    'Other_Workers': 'Population',
+    'Hindus': 'Population',
+    'Muslims': 'Population',
+    'Sikhs': 'Population',
+    'Jains': 'Population',
+    'Buddhists': 'Population',
+    'Others_Religions': 'Population',
+    'Religion_Not_Stated': 'Population',
+    'LPG_or_PNG_Households': 'Households',
+    'Housholds_with_Electric_Lighting': 'Households',
+    'Households_with_Internet': 'Households',
+    'Households_with_Computer': 'Households',
+    'Rural_Households': 'Households',
+    'Urban_Households': 'Households',
+    'Below_Primary_Education': 'Population',
+    'Primary_Education': 'Population',
+    'Middle_Education': 'Population',
+    'Secondary_Education': 'Population',
+    'Higher_Education': 'Population',
+    'Graduate_Education': 'Population',
+    'Other_Education': 'Population',
+    'Literate_Education': 'Population',
+    'Illiterate_Education': 'Population',
+    'Total_Education': 'Population',
+    'Age_Group_0_29': 'Population',
+    'Age_Group_30_49': 'Population',
+    'Age_Group_50': 'Population',
+    'Age not stated': 'Population',
+    'Households_with_Bicycle': 'Households',
+    'Households_with_Car_Jeep_Van': 'Households',
+    'Households_with_Scooter_Motorcycle_Moped': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Landline_only': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Mobile_only': 'Households',
+    'Households_with_Television': 'Households',
+    'Households_with_Telephone_Mobile_Phone': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Both': 'Households',
+    'Households_with_TV_Computer_Laptop_Telephone_mobile_phone_and_Scooter_Car': 'Households',
+    'Ownership_Owned_Households': 'Households',
+    'Ownership_Rented_Households': 'Households',
+    'Type_of_latrine_facility_Pit_latrine_Households': 'Households',
+    'Type_of_latrine_facility_Other_latrine_Households': 'Households',
+    'Type_of_latrine_facility_Night_soil_disposed_into_open_drain_Households': 'Households',
+    'Type_of_latrine_facility_Flush_pour_flush_latrine_connected_to_other_system_Households': 'Households',
+    'Not_having_latrine_facility_within_the_premises_Alternative_source_Open_Households': 'Households',
+    'Main_source_of_drinking_water_Un_covered_well_Households': 'Households',
+    'Main_source_of_drinking_water_Handpump_Tubewell_Borewell_Households': 'Households',
+    'Main_source_of_drinking_water_Spring_Households': 'Households',
+    'Main_source_of_drinking_water_River_Canal_Households': 'Households',
+    'Main_source_of_drinking_water_Other_sources_Households': 'Households',
+    'Main_source_of_drinking_water_Other_sources_Spring_River_Canal_Tank_Pond_Lake_Other_sources__Households': 'Households',
+    'Location_of_drinking_water_source_Near_the_premises_Households': 'Households',
+    'Location_of_drinking_water_source_Within_the_premises_Households': 'Households',
+    'Main_source_of_drinking_water_Tank_Pond_Lake_Households': 'Households',
+    'Main_source_of_drinking_water_Tapwater_Households': 'Households',
+    'Main_source_of_drinking_water_Tubewell_Borehole_Households': 'Households',
+    'Location_of_drinking_water_source_Away_Households': 'Households',
+    'Power_Parity_Less_than_Rs_45000': 'Households',
+    'Power_Parity_Rs_45000_90000': 'Households',
+    'Power_Parity_Rs_90000_150000': 'Households',
+    'Power_Parity_Rs_45000_150000': 'Households',
+    'Power_Parity_Rs_150000_240000': 'Households',
+    'Power_Parity_Rs_240000_330000': 'Households',
+    'Power_Parity_Rs_150000_330000': 'Households',
+    'Power_Parity_Rs_330000_425000': 'Households',
+    'Power_Parity_Rs_425000_545000': 'Households',
+    'Power_Parity_Rs_330000_545000': 'Households',
+    'Power_Parity_Above_Rs_545000': 'Households',
+    'Total_Power_Parity': 'Households',
+}
+
+# District percentage rules, as used by the districtwise table. Shares of the
+# population are taken over the whole population, and education/income bands
+# over their own totals.
+DISTRICT_PERCENTAGE_RULES = {
+    'Male': 'Population',
+    'Female': 'Population',
+    'Literate': 'Population',
+    'Male_Literate': 'Male',
+    'Female_Literate': 'Female',
+    'SC': 'Population',
+    'Male_SC': 'Population',
+    'Female_SC': 'Population',
+    'ST': 'Population',
+    'Male_ST': 'Population',
+    'Female_ST': 'Population',
+    'Workers': 'Population',
+    'Male_Workers': 'Population',
+    'Female_Workers': 'Population',
+    'Main_Workers': 'Population',
+    'Marginal_Workers': 'Population',
+    'Non_Workers': 'Population',
+    'Cultivator_Workers': 'Population',
+    'Agricultural_Workers': 'Population',
+    'Household_Workers': 'Population',
+    'Other_Workers': 'Population',
+    'Hindus': 'Population',
+    'Muslims': 'Population',
+    'Sikhs': 'Population',
+    'Jains': 'Population',
+    'Buddhists': 'Population',
+    'Others_Religions': 'Population',
+    'Religion_Not_Stated': 'Population',
+    'LPG_or_PNG_Households': 'Households',
+    'Households_with_Internet': 'Households',
+    'Households_with_Computer': 'Households',
+    'Rural_Households': 'Households',
+    'Urban_Households': 'Households',
+    'Below_Primary_Education': 'Total_Education',
+    'Primary_Education': 'Total_Education',
+    'Middle_Education': 'Total_Education',
+    'Secondary_Education': 'Total_Education',
+    'Higher_Education': 'Total_Education',
+    'Graduate_Education': 'Total_Education',
+    'Other_Education': 'Total_Education',
+    'Literate_Education': 'Total_Education',
+    'Illiterate_Education': 'Total_Education',
+    'Age_Group_0_29': 'Population',
+    'Age_Group_30_49': 'Population',
+    'Age_Group_50': 'Population',
+    'Households_with_Bicycle': 'Households',
+    'Households_with_Car_Jeep_Van': 'Households',
+    'Households_with_Scooter_Motorcycle_Moped': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Landline_only': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Mobile_only': 'Households',
+    'Households_with_Television': 'Households',
+    'Households_with_Telephone_Mobile_Phone': 'Households',
+    'Households_with_Telephone_Mobile_Phone_Both': 'Households',
+    'Households_with_TV_Computer_Laptop_Telephone_mobile_phone_and_Scooter_Car': 'Households',
+    'Type_of_latrine_facility_Pit_latrine_Households': 'Households',
+    'Type_of_latrine_facility_Other_latrine_Households': 'Households',
+    'Type_of_latrine_facility_Night_soil_disposed_into_open_drain_Households': 'Households',
+    'Type_of_latrine_facility_Flush_pour_flush_latrine_connected_to_other_system_Households': 'Households',
+    'Not_having_latrine_facility_within_the_premises_Alternative_source_Open_Households': 'Households',
+    'Main_source_of_drinking_water_Un_covered_well_Households': 'Households',
+    'Main_source_of_drinking_water_Handpump_Tubewell_Borewell_Households': 'Households',
+    'Main_source_of_drinking_water_Spring_Households': 'Households',
+    'Main_source_of_drinking_water_River_Canal_Households': 'Households',
+    'Main_source_of_drinking_water_Other_sources_Households': 'Households',
+    'Main_source_of_drinking_water_Other_sources_Spring_River_Canal_Tank_Pond_Lake_Other_sources__Households': 'Households',
+    'Location_of_drinking_water_source_Near_the_premises_Households': 'Households',
+    'Location_of_drinking_water_source_Within_the_premises_Households': 'Households',
+    'Main_source_of_drinking_water_Tank_Pond_Lake_Households': 'Households',
+    'Main_source_of_drinking_water_Tapwater_Households': 'Households',
+    'Main_source_of_drinking_water_Tubewell_Borehole_Households': 'Households',
+    'Location_of_drinking_water_source_Away_Households': 'Households',
+    'Power_Parity_Less_than_Rs_45000': 'Total_Power_Parity',
+    'Power_Parity_Rs_45000_90000': 'Total_Power_Parity',
+    'Power_Parity_Rs_90000_150000': 'Total_Power_Parity',
+    'Power_Parity_Rs_45000_150000': 'Total_Power_Parity',
+    'Power_Parity_Rs_150000_240000': 'Total_Power_Parity',
+    'Power_Parity_Rs_240000_330000': 'Total_Power_Parity',
+    'Power_Parity_Rs_150000_330000': 'Total_Power_Parity',
+    'Power_Parity_Rs_330000_425000': 'Total_Power_Parity',
+    'Power_Parity_Rs_425000_545000': 'Total_Power_Parity',
+    'Power_Parity_Rs_330000_545000': 'Total_Power_Parity',
+    'Power_Parity_Above_Rs_545000': 'Total_Power_Parity',
+}
+
+# Attribute category keywords, most specific first. A column belongs to the first
+# category with a keyword equal to one of its '_'-separated words (case-insensitive).
+# Male/female splits (Male_Literate, Female_SC, ...) are grouped under Demographics
+# ahead of their topic, as they always have been; totals go to their topic.
+CATEGORY_KEYWORDS = {
+    "🏠 Demographics": ['male', 'female'],
+    "📚 Education & Literacy": ['literate', 'illiterate', 'education'],
+    "💼 Employment": ['workers', 'cultivator', 'agricultural'],
+    "🏛️ Social Categories": ['sc', 'st', 'caste'],
+    "🕊️ Religion": ['hindus', 'muslims', 'christians', 'sikhs', 'buddhists', 'jains', 'religions', 'religion'],
+    "💧 Water & Sanitation": ['water', 'latrine'],
+    "💰 Economic Indicators": ['parity'],
+    "📊 Age Groups": ['age'],
+    "🏡 Household Amenities": ['households', 'housholds'],
+}
+
+# Categories that also list the columns matching their keywords when an earlier
+# category claimed them. The state table only has male/female SC/ST splits, which
+# stay under Demographics and are listed under Social Categories as well.
+CATEGORY_ALSO_MATCHES = ["🏛️ Social Categories"]
+
+# Percentage pipeline (data/pipeline.py)
+PIPELINE_SETTINGS = {
+    'chunksize': 100_000,           # Rows per chunk when streaming CSV/Parquet input
+    'group_column': 'State name',
+    'district_suffix': '_%',
+    'state_suffix': '_pct',
+}
+
+# Sub-district/village ingestion (data/loader.py: ingest_subdistrict_data)
+INGESTION_SETTINGS = {
+    'chunksize': 50_000,
+    'subdistrict_columns': ['Sub-district code', 'Sub-district name'],
+    'district_columns': ['District code', 'State name', 'District name'],
+    'state_columns': ['State name'],
+}
+
+# Hot reload of data files (data/watcher.py)
+RELOAD_SETTINGS = {
+    'enabled': True,
+    'interval': 2.0,    # Seconds between file polls
+}
+
+# Memory-mapped attribute matrices shared by worker processes (data/shared.py)
+SHARED_MATRIX_SETTINGS = {
+    'enabled': True,
+    'directory': None,      # None = <system temp dir>/indiadatahub_shared
+    'dtype': 'float32',
+}
+
+# Embedded SQL engine over the DataStore tables (data/sql.py)
+SQL_SETTINGS = {
+    'engine': 'auto',       # 'duckdb', 'sqlite' or 'auto' (DuckDB when installed)
+    'cache_size': 256,      # Cached query results per dataset version
+}
+
+# District similarity search (data/similarity.py)
+SIMILARITY_SETTINGS = {
+    'metric': 'euclidean',  # 'euclidean', 'manhattan' or 'cosine'
+    'neighbours': 20,       # Neighbours precomputed per district
+    'block_elements': 4_000_000,    # Max temporary array size while computing distances
+    'cache_size': 8,        # Neighbour indexes kept (one per metric/weighting)
+}
+
+# District typology clustering (data/clustering.py)
+CLUSTER_SETTINGS = {
+    'default_k': 4,
+    'max_k': 8,
+    'max_iter': 100,
+    'seed': 42,             # Fixed seed so every worker finds the same typologies
+    'workers': 1,           # Background clustering threads
+    'poll_interval': 1.0,   # Seconds between checks of the map for a running job
+    'colors': ['#6366f1', '#10b981', '#f59e0b', '#ef4444', '#06b6d4', '#8b5cf6', '#84cc16', '#ec4899'],
+}
+
+# District adjacency graph from the state GeoJSONs (data/adjacency.py)
+ADJACENCY_SETTINGS = {
+    'tolerance': 0.002,         # Degrees (~200 m): how close boundaries in different state files must run
+    'min_shared_points': 3,     # Boundary points two districts must share to count as neighbours
+    'cache_file': None,         # None = <shared matrix dir>/district_adjacency.npz
+}
+
+# Spatial autocorrelation / LISA hotspots (data/spatial_stats.py)
+SPATIAL_STATS_SETTINGS = {
+    'permutations': 999,
+    'significance': 0.05,
+    'seed': 42,
+    'workers': None,        # Permutation threads; None = one per CPU
+    'colors': {'High-High': '#dc2626', 'Low-Low': '#2563eb', 'High-Low': '#f472b6', 'Low-High': '#93c5fd'},
+}
+
+# Point datasets joined to districts (data/points.py)
+POINT_SETTINGS = {
+    'directory': 'point_data',      # Every CSV here becomes a district count and rate attribute
+    'lat_column': 'latitude',
+    'lon_column': 'longitude',
+    'grid_degrees': 0.01,           # Lookup raster cell size; points in boundary cells are ray cast
+    'rate_per': 100_000,            # Rates are points per this many people
+    'category': 'Facilities',       # District attribute category of the point columns
+    'chunk_elements': 4_000_000,    # Point x edge pairs tested at once in the exact lookup
+}
+
+# All-India district layer merged from the state files (data/national_map.py)
+NATIONAL_MAP_SETTINGS = {
+    'quantization': 0.01,           # Grid size in degrees coordinates are snapped to
+    'tolerance': 0.02,              # Douglas-Peucker tolerance in degrees
+    'height': 650,
+}
+
+# Boundary topology shipped to the browser (data/boundaries.py)
+TOPOLOGY_SETTINGS = {
+    'output': 'boundaries.topojson',
+    'quantization': 0.001,          # Grid size in degrees of the shared transform
+    'state_tolerance': 0.01,        # Douglas-Peucker tolerance in degrees for the state outlines
+    'coarse_output': 'boundaries_coarse.topojson',
+    'coarse_quantization': 0.02,    # Coarse tier painted first while the full tier loads (a multiple of 'quantization')
+    'coarse_tolerance': 0.1,        # Arcs of the full tier are simplified with this before snapping
+}
+
+# Progressive map rendering: geometry tier chosen from the viewer's measured bandwidth
+PROGRESSIVE_MAP_SETTINGS = {
+    'full_mbps': 10.0,              # At or above: full resolution straight away
+    'coarse_mbps': 0.5,             # Below: coarse geometry only
+}
+
+# Hexagon tile map layout (data/tile_map.py)
+TILE_MAP_SETTINGS = {
+    'spacing': 1.2,                 # Cell spacing relative to the equal-area spacing (larger packs tighter)
+    'margin': 2,                    # Extra cells around the centroids' bounding box
+    'candidates': 24,               # Nearest cells considered per entity by the greedy assignment
+    'passes': 8,                    # Improvement passes of the greedy assignment
+    'fill': 0.94,                   # Hexagon marker size relative to its cell
+}
+
+# Map rendering modes offered next to every map
+MAP_MODE_OPTIONS = [
+    {"label": " 🗺️ Boundaries", "value": "polygons"},
+    {"label": " ⬢ Tiles", "value": "tiles"},
+]
+
+# Discrete colour classes for choropleths (data/classification.py)
+CLASSIFICATION_SETTINGS = {
+    'classes': 5,
+    'jenks_max_values': 1000,       # Larger inputs are reduced to this many order statistics
+}
+
+# Colour scale options offered next to the maps
+CLASSIFICATION_OPTIONS = [
+    {"label": "Continuous scale", "value": "continuous"},
+    {"label": "Natural breaks (Jenks)", "value": "jenks"},
+    {"label": "Quantiles", "value": "quantile"},
+    {"label": "Equal intervals", "value": "equal_interval"},
+]
+
 # State name mapping for choropleth visualization
 STATE_NAME_MAPPING = {
     'ANDAMAN AND NICOBAR ISLANDS': 'Andaman and Nicobar',
@@ -134,3 +462,93 @@ CSV_TO_GEOJSON_MAPPING = {
     'UTTARAKHAND': 'uttarakhand.geojson',
     'WEST BENGAL': 'west_bengal.geojson'
 }
+
+# Response compression and ETag settings for the Flask server behind Dash
+COMPRESSION_SETTINGS = {
+    'min_size': 1024,        # Responses smaller than this (bytes) are sent as-is
+    'gzip_level': 6,
+    'brotli_quality': 5,     # Used only when the optional 'brotli' package is installed
+    'cache_entries': 64,     # Compressed bodies kept in memory, keyed by content hash
+    'mimetypes': [
+        'application/json',
+        'application/geo+json',
+        'text/html',
+        'text/css',
+        'application/javascript',
+    ],
+    # GET endpoints answered with content-hash ETags (prefix match)
+    'etag_paths': ['/_dash-layout', '/_dash-dependencies', '/data/'],
+}
+
+# Figure serialization settings (typed arrays + coordinate rounding)
+SERIALIZATION_SETTINGS = {
+    'min_array_length': 8,    # Shorter numeric arrays stay as plain JSON lists
+    'float32_atol': 1e-4,     # Largest rounding error allowed when downcasting to float32
+    'geojson_decimals': 5,    # ~1 m precision for boundary coordinates
+    'geojson_cache_size': 40,  # State GeoJSONs kept in memory (least recently used are dropped)
+}
+
+# Base layouts for the lean figure builder (utils/figures.py), merged once per chart type
+CHART_LAYOUTS = {
+    'choropleth': {
+        'template': 'plotly',
+        'title': {'x': 0.5, 'font': {'size': 20, 'weight': 'bold', 'color': '#2d3748'}},
+        'height': 500,
+        'margin': {'l': 0, 'r': 0, 't': 60, 'b': 0},
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'plot_bgcolor': 'rgba(0,0,0,0)',
+        'font': {'family': FONT_FAMILY},
+        'geo': {
+            'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+            'showframe': False,
+            'fitbounds': 'locations',
+            'bgcolor': 'rgba(0,0,0,0)'
+        },
+        'legend': {'tracegroupgap': 0}
+    },
+    'bar': {
+        'template': 'plotly',
+        'title': {'x': 0.5, 'font': {'size': 18, 'weight': 'bold', 'color': '#2d3748'}},
+        'height': 500,
+        'margin': {'l': 150, 'r': 50, 't': 60, 'b': 50},
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'plot_bgcolor': 'rgba(248,250,252,0.8)',
+        'font': {'family': FONT_FAMILY},
+        'xaxis': {
+            'title': {'font': {'size': 14, 'weight': 'bold', 'color': '#4a5568'}},
+            'tickfont': {'size': 11, 'color': '#6b7280'},
+            'gridcolor': 'rgba(203,213,225,0.5)',
+            'gridwidth': 1,
+            'showgrid': True
+        },
+        'yaxis': {
+            'title': {'text': ''},
+            'tickfont': {'size': 11, 'color': '#374151'},
+            'showgrid': False,
+            'categoryorder': 'total ascending'
+        }
+    },
+    'scatter': {
+        'template': 'plotly',
+        'title': {'x': 0.5, 'font': {'size': 16, 'weight': 'bold', 'color': '#2d3748'}},
+        'height': 400,
+        'margin': {'l': 50, 'r': 50, 't': 60, 'b': 50},
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'plot_bgcolor': 'rgba(248,250,252,0.8)',
+        'font': {'family': FONT_FAMILY},
+        'legend': {'tracegroupgap': 0}
+    },
+    'tile_map': {
+        'template': 'plotly',
+        'title': {'x': 0.5, 'font': {'size': 20, 'weight': 'bold', 'color': '#2d3748'}},
+        'height': 500,
+        'margin': {'l': 10, 'r': 10, 't': 60, 'b': 10},
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'plot_bgcolor': 'rgba(0,0,0,0)',
+        'font': {'family': FONT_FAMILY},
+        'hovermode': 'closest',
+        'showlegend': False,
+        'xaxis': {'visible': False},
+        'yaxis': {'visible': False, 'scaleanchor': 'x', 'scaleratio': 1}
+    }
+}
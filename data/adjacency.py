@@ -0,0 +1,227 @@
+# ===========================================
+# DISTRICT ADJACENCY GRAPH
+# ===========================================
+# Derives which districts share a boundary from the state GeoJSON files and
+# stores the result as a CSR sparse matrix keyed by dt_code, so spatial
+# statistics and neighbour lookups never touch polygons at request time.
+#
+# Districts in the same state file share exact boundary vertices, so two of
+# them are neighbours when they share at least one boundary segment (corner
+# touches do not count). Different state files were digitized separately;
+# across states two districts are neighbours when enough of their boundary
+# points fall within ADJACENCY_SETTINGS['tolerance'] of each other.
+#
+# The graph is cached as district_adjacency.npz in the shared matrix
+# directory (data/shared.shared_directory(), unless
+# ADJACENCY_SETTINGS['cache_file'] names another path) together with the
+# tolerance and min_shared_points it was built with. It is rebuilt when any
+# GeoJSON file is newer than it or those settings have changed.
+#
+# Usage:
+#   python -m data.adjacency [--output /path/to/district_adjacency.npz]
+
+import argparse
+import os
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import ADJACENCY_SETTINGS, CSV_TO_GEOJSON_MAPPING
+from data.loader import get_data_store, load_state_geojson
+from data.shared import shared_directory
+
+# Vertices are compared on a 1e-5 degree grid (the precision GeoJSON is rounded to)
+VERTEX_SCALE = 100_000
+
+DistrictAdjacency = namedtuple('DistrictAdjacency', [
+    'codes',            # dt_code per row/column, ascending
+    'positions',        # dt_code -> row position
+    'states',           # CSV state name per row
+    'indptr',           # CSR row pointers
+    'indices',          # CSR column positions of the neighbours
+    'cross_state',      # Per stored neighbour: True when it lies in another state
+])
+
+_adjacency = None
+_adjacency_version = None
+_adjacency_lock = threading.Lock()
+
+def adjacency_file():
+    """Path of the cached adjacency graph"""
+    return ADJACENCY_SETTINGS['cache_file'] or os.path.join(shared_directory(), 'district_adjacency.npz')
+
+def geojson_files():
+    """State name -> GeoJSON file for every state file that exists"""
+    return {state: path for state, path in CSV_TO_GEOJSON_MAPPING.items() if os.path.exists(path)}
+
+def _rings(geometry):
+    """Linear rings of a Polygon or MultiPolygon as (n, 2) arrays"""
+    coordinates = geometry.get('coordinates') or []
+    polygons = [coordinates] if geometry.get('type') == 'Polygon' else coordinates
+    return [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon if len(ring) > 1]
+
+def _district_boundaries():
+    """Per-vertex and per-segment tables of every district boundary in the state files"""
+    vertex_frames, segment_frames = [], []
+    for state, path in geojson_files().items():
+        for feature in load_state_geojson(path).get('features', []):
+            code = pd.to_numeric((feature.get('properties') or {}).get('dt_code'), errors='coerce')
+            if pd.isna(code) or code <= 0:
+                continue
+            for ring in _rings(feature.get('geometry') or {}):
+                points = np.round(ring * VERTEX_SCALE).astype(np.int64)
+                vertex_frames.append(pd.DataFrame({'x': points[:, 0], 'y': points[:, 1],
+                                                   'code': int(code), 'state': state}))
+                # Segments are stored with their endpoints in a fixed order so both sides match
+                start, end = points[:-1], points[1:]
+                swap = (start[:, 0] > end[:, 0]) | ((start[:, 0] == end[:, 0]) & (start[:, 1] > end[:, 1]))
+                first = np.where(swap[:, None], end, start)
+                second = np.where(swap[:, None], start, end)
+                segment_frames.append(pd.DataFrame({'x1': first[:, 0], 'y1': first[:, 1],
+                                                    'x2': second[:, 0], 'y2': second[:, 1], 'code': int(code)}))
+    return pd.concat(vertex_frames, ignore_index=True), pd.concat(segment_frames, ignore_index=True)
+
+def _shared_segment_pairs(segments):
+    """District pairs sharing at least one identical boundary segment"""
+    segments = segments.drop_duplicates()
+    keys = ['x1', 'y1', 'x2', 'y2']
+    pairs = segments.merge(segments, on=keys, suffixes=('_a', '_b'))
+    pairs = pairs[pairs['code_a'] < pairs['code_b']]
+    return pairs[['code_a', 'code_b']].drop_duplicates()
+
+def _near_boundary_pairs(vertices, tolerance, min_shared):
+    """Pairs of districts in different states whose boundary points run within the tolerance"""
+    cell = max(int(round(tolerance * VERTEX_SCALE)), 1)
+    cells = pd.DataFrame({'cx': vertices['x'] // cell, 'cy': vertices['y'] // cell,
+                          'code': vertices['code'], 'state': vertices['state']}).drop_duplicates()
+
+    matches = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            shifted = cells.assign(cx=cells['cx'] + dx, cy=cells['cy'] + dy)
+            joined = cells.merge(shifted, on=['cx', 'cy'], suffixes=('_a', '_b'))
+            joined = joined[(joined['state_a'] != joined['state_b']) & (joined['code_a'] < joined['code_b'])]
+            matches.append(joined[['cx', 'cy', 'code_a', 'code_b']])
+    matches = pd.concat(matches, ignore_index=True).drop_duplicates()
+    counts = matches.groupby(['code_a', 'code_b']).size()
+    return counts[counts >= min_shared].reset_index()[['code_a', 'code_b']]
+
+def build_adjacency(tolerance=None, min_shared=None):
+    """Compute the district adjacency graph from the state GeoJSON files"""
+    tolerance = ADJACENCY_SETTINGS['tolerance'] if tolerance is None else tolerance
+    min_shared = ADJACENCY_SETTINGS['min_shared_points'] if min_shared is None else min_shared
+    vertices, segments = _district_boundaries()
+
+    states = vertices.drop_duplicates('code').set_index('code')['state'].sort_index()
+    codes = states.index.to_numpy(dtype=np.int64)
+    within = _shared_segment_pairs(segments)
+    across = _near_boundary_pairs(vertices, tolerance, min_shared)
+    pairs = pd.concat([within, across], ignore_index=True).drop_duplicates()
+
+    # Both directions, then sorted by row for CSR
+    rows = np.searchsorted(codes, np.r_[pairs['code_a'].to_numpy(), pairs['code_b'].to_numpy()])
+    cols = np.searchsorted(codes, np.r_[pairs['code_b'].to_numpy(), pairs['code_a'].to_numpy()])
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.add.at(indptr, rows + 1, 1)
+    indptr = np.cumsum(indptr)
+
+    state_names = states.to_numpy(dtype=object)
+    return _make_adjacency(codes, state_names, indptr, cols.astype(np.int32),
+                           state_names[rows] != state_names[cols])
+
+def _make_adjacency(codes, states, indptr, indices, cross_state):
+    """Assemble a DistrictAdjacency from its arrays"""
+    codes = np.asarray(codes, dtype=np.int64)
+    return DistrictAdjacency(codes, {int(code): i for i, code in enumerate(codes)}, np.asarray(states, dtype=object),
+                             np.asarray(indptr), np.asarray(indices), np.asarray(cross_state, dtype=bool))
+
+def _build_settings(tolerance=None, min_shared=None):
+    """(tolerance, min_shared_points) a graph is built with, as stored alongside it"""
+    return np.array([ADJACENCY_SETTINGS['tolerance'] if tolerance is None else tolerance,
+                     ADJACENCY_SETTINGS['min_shared_points'] if min_shared is None else min_shared], dtype=float)
+
+def save_adjacency(adjacency, path=None, tolerance=None, min_shared=None):
+    """Write the graph and the settings it was built with to an .npz file (atomically)"""
+    path = path or adjacency_file()
+    temporary = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(temporary, codes=adjacency.codes, states=adjacency.states.astype(str), indptr=adjacency.indptr,
+             indices=adjacency.indices, cross_state=adjacency.cross_state,
+             settings=_build_settings(tolerance, min_shared))
+    os.replace(temporary, path)
+
+def load_adjacency(path=None):
+    """Read a graph written by save_adjacency()"""
+    with np.load(path or adjacency_file(), allow_pickle=False) as stored:
+        return _make_adjacency(stored['codes'], stored['states'], stored['indptr'],
+                               stored['indices'], stored['cross_state'])
+
+def _cache_is_fresh(path):
+    """True when the cached graph is newer than every GeoJSON file and was built with the current settings"""
+    if not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    if not all(os.path.getmtime(geojson) <= built for geojson in geojson_files().values()):
+        return False
+    with np.load(path, allow_pickle=False) as stored:
+        return 'settings' in stored.files and np.array_equal(stored['settings'], _build_settings())
+
+def get_adjacency():
+    """District adjacency graph, from the .npz cache when fresh, otherwise rebuilt and cached"""
+    global _adjacency, _adjacency_version
+    version = get_data_store().version
+    with _adjacency_lock:
+        if _adjacency is not None and _adjacency_version == version:
+            return _adjacency
+
+        path = adjacency_file()
+        adjacency = None
+        try:
+            if _cache_is_fresh(path):
+                adjacency = load_adjacency(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not read district adjacency cache, rebuilding: {e}")
+        if adjacency is None:
+            started = time.perf_counter()
+            adjacency = build_adjacency()
+            print(f"✅ District adjacency built: {len(adjacency.codes)} districts, "
+                  f"{len(adjacency.indices) // 2} boundaries in {time.perf_counter() - started:.2f}s")
+            try:
+                save_adjacency(adjacency, path)
+            except OSError as e:
+                print(f"⚠️ Could not cache district adjacency: {e}")
+
+        _adjacency, _adjacency_version = adjacency, version
+        return adjacency
+
+def neighbours(dt_code, adjacency=None, cross_state=None):
+    """dt_codes of the districts bordering a district (cross_state=True/False to keep only one kind)"""
+    adjacency = adjacency or get_adjacency()
+    row = adjacency.positions.get(int(dt_code))
+    if row is None:
+        return np.empty(0, dtype=np.int64)
+    start, stop = adjacency.indptr[row], adjacency.indptr[row + 1]
+    columns = adjacency.indices[start:stop]
+    if cross_state is not None:
+        columns = columns[adjacency.cross_state[start:stop] == cross_state]
+    return adjacency.codes[columns]
+
+def to_scipy(adjacency=None):
+    """The graph as a scipy.sparse CSR matrix (requires scipy)"""
+    from scipy.sparse import csr_matrix
+    adjacency = adjacency or get_adjacency()
+    size = len(adjacency.codes)
+    return csr_matrix((np.ones(len(adjacency.indices), dtype=np.float32), adjacency.indices, adjacency.indptr),
+                      shape=(size, size))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute the district adjacency graph from the state GeoJSON files")
+    parser.add_argument('--output', default=None, help="Output .npz file (default: the shared cache file)")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    graph = build_adjacency()
+    save_adjacency(graph, args.output)
+    print(f"✅ {len(graph.codes)} districts, {len(graph.indices) // 2} boundaries "
+          f"({int(graph.cross_state.sum()) // 2} across states) in {time.perf_counter() - started:.2f}s")
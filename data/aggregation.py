@@ -0,0 +1,79 @@
+# ===========================================
+# POPULATION-WEIGHTED AGGREGATION ENGINE
+# ===========================================
+# Rolls raw district counts up to any grouping (state, national, ...) by
+# summing numerators and denominators, then derives every percentage from
+# the sums. This weights each district by its population/households instead
+# of averaging district ratios.
+
+import numpy as np
+import pandas as pd
+from config.settings import PERCENTAGE_RULES
+
+def compile_rules(columns, rules=None):
+    """Resolve the rules that apply to the given columns into index arrays
+
+    Returns (count_columns, numerators, numerator_index, denominator_index):
+    count_columns is every raw column that has to be summed, and the two index
+    arrays point into it for each rule, in rule order.
+    """
+    rules = PERCENTAGE_RULES if rules is None else rules
+    available = set(columns)
+    numerators = [num for num, den in rules.items() if num in available and den in available]
+
+    count_columns = list(dict.fromkeys(numerators + [rules[num] for num in numerators]))
+    position = {col: i for i, col in enumerate(count_columns)}
+    numerator_index = np.array([position[num] for num in numerators], dtype=np.intp)
+    denominator_index = np.array([position[rules[num]] for num in numerators], dtype=np.intp)
+    return count_columns, numerators, numerator_index, denominator_index
+
+def group_sums(values, codes, n_groups):
+    """Sum the rows of a 2-D array per group code in one pass"""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums = np.zeros((n_groups, values.shape[1]))
+    sums[sorted_codes[starts]] = np.add.reduceat(values[order], starts, axis=0)
+    return sums
+
+def derive_percentages(sums, numerator_index, denominator_index):
+    """Percentage matrix (groups x rules) from summed counts; zero denominators give NaN"""
+    numerators = sums[:, numerator_index]
+    denominators = sums[:, denominator_index]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominators > 0, numerators / denominators * 100, np.nan)
+
+def aggregate_counts(data, by=None, rules=None, suffix='_pct', sum_columns=None):
+    """Aggregate raw counts by one or more columns and derive weighted percentages
+
+    With by=None the whole table is aggregated into a single (national) row.
+    Returns one row per group with the summed counts and a '<numerator><suffix>'
+    column per applicable rule. sum_columns adds further columns to sum, in order,
+    ahead of the rule columns.
+    """
+    count_columns, numerators, numerator_index, denominator_index = compile_rules(data.columns, rules)
+    if sum_columns is not None:
+        summed = list(dict.fromkeys(list(sum_columns) + count_columns))
+        remap = np.array([summed.index(col) for col in count_columns], dtype=np.intp)
+        numerator_index, denominator_index = remap[numerator_index], remap[denominator_index]
+        count_columns = summed
+
+    if by is None:
+        codes = np.zeros(len(data), dtype=np.intp)
+        keys = pd.DataFrame(index=pd.RangeIndex(1 if len(data) else 0))
+    else:
+        by = [by] if isinstance(by, str) else list(by)
+        grouped = data.groupby(by, sort=True, dropna=False, observed=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().index.to_frame(index=False)
+
+    # Missing counts contribute nothing to either side of a ratio
+    values = np.nan_to_num(data[count_columns].to_numpy(dtype=float), nan=0.0)
+    sums = group_sums(values, codes, len(keys)) if len(data) else np.zeros((0, len(count_columns)))
+    percentages = derive_percentages(sums, numerator_index, denominator_index)
+
+    return pd.concat([
+        keys,
+        pd.DataFrame(sums, columns=count_columns),
+        pd.DataFrame(percentages, columns=[num + suffix for num in numerators])
+    ], axis=1)
@@ -0,0 +1,167 @@
+# ===========================================
+# BOUNDARY TOPOLOGY FILE
+# ===========================================
+# Encodes the map boundaries the browser needs into one TopoJSON file
+# (data/topology.py): the 'states' object from india.json and the
+# 'districts' object from the merged national district layer. Shared
+# borders are stored once as quantized, delta-encoded arcs.
+#
+# Geometries only carry the properties the maps need: the join key and one
+# display name ('name' for states; 'dt_code' and 'district' for districts).
+#
+# Two tiers are written: 'full' and a 'coarse' file derived from it, whose
+# arcs are simplified and snapped to a coarser grid (coarsen_topology), so it
+# has the same objects and at most as many arcs. Maps are rendered progressively: the coarse tier is
+# painted first and the full tier swapped in once it has loaded, or one of
+# them is used alone, depending on the viewer's measured bandwidth
+# (geometry_tier).
+#
+# The files are served through the /data/ endpoint (ETag + gzip). Figures
+# only reference an object of them (utils.figures.topology_reference) and
+# the browser decodes it once (assets/topology.js); get_boundary_layer()
+# decodes the same objects on the server and caches each layer it returns.
+#
+# The files are checked against their sources once per dataset version: the
+# data watcher publishes a new version whenever india.json or a state file
+# changes, so map requests in between never touch the file system.
+#
+# Usage:
+#   python -m data.boundaries [--tier full|coarse] [--output boundaries.topojson]
+
+import argparse
+import json
+import os
+import threading
+import time
+from config.settings import TOPOLOGY_SETTINGS, PROGRESSIVE_MAP_SETTINGS
+from data.loader import INDIA_GEOJSON_FILE, get_data_store
+from data.adjacency import geojson_files
+from data.national_map import build_national_geojson
+from data.topology import encode_topology, coarsen_topology, decode_arcs, decode_topology
+
+TIERS = ('full', 'coarse')
+# Properties kept per topology object (the rest of the GeoJSON properties are dropped)
+OBJECT_PROPERTIES = {'states': ('name',), 'districts': ('dt_code', 'district')}
+
+_build_lock = threading.Lock()
+_decoded = {}
+_checked_version = None     # Dataset version the files were last checked for
+_file_mtimes = {}           # Topology path -> mtime as of that check
+
+def topology_file(tier='full'):
+    """Path of the boundary topology file of a tier"""
+    return TOPOLOGY_SETTINGS['output' if tier == 'full' else 'coarse_output']
+
+def topology_url(tier='full'):
+    """URL the browser fetches a tier's topology from"""
+    return f"/data/{os.path.basename(topology_file(tier))}"
+
+def geometry_tier(bandwidth):
+    """'full', 'progressive' (coarse first) or 'coarse' for a bandwidth estimate in Mbit/s (None if unknown)"""
+    if bandwidth is None:
+        return 'progressive'
+    if bandwidth >= PROGRESSIVE_MAP_SETTINGS['full_mbps']:
+        return 'full'
+    if bandwidth < PROGRESSIVE_MAP_SETTINGS['coarse_mbps']:
+        return 'coarse'
+    return 'progressive'
+
+def topology_urls(geometry):
+    """(full URL, coarse URL) a figure should reference for a geometry tier; None where not wanted"""
+    return (None if geometry == 'coarse' else topology_url('full'),
+            None if geometry == 'full' else topology_url('coarse'))
+
+def _slim_properties(geojson, keys):
+    """Copy of a FeatureCollection whose features only keep the given properties"""
+    return {'type': 'FeatureCollection',
+            'features': [dict(feature, properties={key: (feature.get('properties') or {}).get(key) for key in keys})
+                         for feature in geojson.get('features', [])]}
+
+def build_boundary_topology(tier='full', districts=None, full=None):
+    """Encode the state and national district boundaries of a tier as one topology
+
+    The coarse tier is derived from the full topology (`full`, built when not given).
+    """
+    if tier == 'coarse':
+        return coarsen_topology(full or build_boundary_topology('full', districts),
+                                TOPOLOGY_SETTINGS['coarse_tolerance'], TOPOLOGY_SETTINGS['coarse_quantization'])
+    india_geo = get_data_store().india_geo
+    if india_geo is None:
+        with open(INDIA_GEOJSON_FILE, encoding="utf-8") as f:
+            india_geo = json.load(f)
+    districts = districts or build_national_geojson()
+    return encode_topology({
+        'states': (_slim_properties(india_geo, OBJECT_PROPERTIES['states']), TOPOLOGY_SETTINGS['state_tolerance']),
+        # Already simplified on its own grid
+        'districts': (_slim_properties(districts, OBJECT_PROPERTIES['districts']), 0),
+    }, TOPOLOGY_SETTINGS['quantization'])
+
+def save_topology(topology, path=None):
+    """Write the topology compactly (atomically)"""
+    path = path or topology_file()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(topology, f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+def _is_fresh(path):
+    """True when the topology is newer than india.json and every state file"""
+    if not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    sources = [INDIA_GEOJSON_FILE, *geojson_files().values()]
+    return all(os.path.getmtime(source) <= built for source in sources if os.path.exists(source))
+
+def ensure_topology():
+    """Build the topology file of every tier that is missing or stale (checked once per dataset version); returns {tier: path}"""
+    global _checked_version
+    paths = {tier: topology_file(tier) for tier in TIERS}
+    version = get_data_store().version
+    if _checked_version == version:
+        return paths
+    with _build_lock:
+        if _checked_version == version:
+            return paths
+        # The coarse tier is derived from the full one, so a stale tier rebuilds both
+        if not all(_is_fresh(path) for path in paths.values()):
+            full = None
+            for tier in TIERS:
+                started = time.perf_counter()
+                topology = build_boundary_topology(tier, full=full)
+                full = full or topology
+                save_topology(topology, paths[tier])
+                _decoded.pop(paths[tier], None)
+                print(f"✅ Boundary topology ({tier}) built: {len(topology['arcs'])} arcs, "
+                      f"{os.path.getsize(paths[tier]) / 1024:.0f} KB in {time.perf_counter() - started:.2f}s")
+        # Another worker may have rebuilt a file; its decoded layers are refreshed by mtime
+        _file_mtimes.update({path: os.path.getmtime(path) for path in paths.values()})
+        _checked_version = version
+    return paths
+
+def get_boundary_layer(name, where=None, tier='full'):
+    """Server-side decode of a topology object to GeoJSON (arcs decoded once per file, layers cached)"""
+    path = ensure_topology()[tier]
+    key = (name, tuple(sorted((where or {}).items())))
+    with _build_lock:
+        cached = _decoded.get(path)
+        if cached is None or cached[0] != _file_mtimes[path]:
+            with open(path, encoding='utf-8') as f:
+                topology = json.load(f)
+            cached = (_file_mtimes[path], topology, decode_arcs(topology), {})
+            _decoded[path] = cached
+        _, topology, arcs, layers = cached
+        if key not in layers:
+            layers[key] = decode_topology(topology, name, arcs, where)
+        return layers[key]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Encode the state and district boundaries as one TopoJSON file")
+    parser.add_argument('--tier', choices=TIERS, default='full', help="Geometry tier to build")
+    parser.add_argument('--output', default=None, help="Output file (default: from TOPOLOGY_SETTINGS)")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    result = build_boundary_topology(args.tier)
+    output = args.output or topology_file(args.tier)
+    save_topology(result, output)
+    print(f"✅ {len(result['arcs'])} arcs, {os.path.getsize(output) / 1024:.0f} KB "
+          f"in {time.perf_counter() - started:.2f}s -> {output}")
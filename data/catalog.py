@@ -0,0 +1,209 @@
+# ===========================================
+# ATTRIBUTE CATALOG
+# ===========================================
+# One frozen entry per census attribute (category, labels, unit, denominator
+# and its state/district column names), built once when the data is loaded.
+# Callbacks look labels and category members up here instead of re-deriving
+# them on every call.
+
+import functools
+import re
+from collections import namedtuple
+from types import MappingProxyType
+from config.settings import (
+    ATTRIBUTE_CATEGORIES,
+    CATEGORY_ALSO_MATCHES,
+    CATEGORY_KEYWORDS,
+    DISTRICT_ATTRIBUTE_CATEGORIES,
+    POINT_SETTINGS,
+    PERCENTAGE_RULES,
+    DISTRICT_PERCENTAGE_RULES
+)
+
+AttributeInfo = namedtuple('AttributeInfo', [
+    'name', 'category', 'short_label', 'district_label', 'unit',
+    'denominator', 'district_denominator', 'state_column', 'district_column'
+])
+
+AttributeCatalog = namedtuple('AttributeCatalog', [
+    'attributes',           # base name -> AttributeInfo
+    'by_column',            # state or district column -> AttributeInfo
+    'categories',           # state category -> tuple of state columns
+    'district_categories'   # district category -> tuple of district columns
+])
+
+STATE_SUFFIX = '_pct'
+DISTRICT_SUFFIX = '_%'
+POINT_COUNT_SUFFIX = '_Count'      # District columns derived from point files (data/points.py)
+POINT_RATE_SUFFIX = '_Rate'
+
+# Short labels for state attributes (keyed by base name)
+SHORT_LABELS = {
+    'Male_Literate': 'Male Literacy',
+    'Female_Literate': 'Female Literacy',
+    'Male_Workers': 'Male Employment',
+    'Female_Workers': 'Female Employment',
+    'Male_SC': 'Male SC',
+    'Female_SC': 'Female SC',
+    'Male_ST': 'Male ST',
+    'Female_ST': 'Female ST',
+    'Rural_Households': 'Rural Areas',
+    'Urban_Households': 'Urban Areas',
+    'LPG_or_PNG_Households': 'LPG/PNG Access',
+    'Housholds_with_Electric_Lighting': 'Electricity',
+    'Households_with_Internet': 'Internet',
+    'Households_with_Computer': 'Computer',
+    'Households_with_Scooter_Motorcycle_Moped': 'Scooter/Motorcycle',
+    'Power_Parity_Less_than_Rs_45000': '<₹45k Income',
+    'Power_Parity_Above_Rs_545000': '>₹545k Income'
+}
+
+# Short labels for district attributes (keyed by the cleaned, space-separated name)
+DISTRICT_SHORT_LABELS = {
+    'Male': 'Male Population',
+    'Female': 'Female Population',
+    'Literate': 'Literacy Rate',
+    'Male Literate': 'Male Literacy',
+    'Female Literate': 'Female Literacy',
+    'Workers': 'Employment Rate',
+    'Male Workers': 'Male Employment',
+    'Female Workers': 'Female Employment',
+    'Primary Education': 'Primary Education',
+    'Secondary Education': 'Secondary Education',
+    'Higher Education': 'Higher Education',
+    'Graduate Education': 'Graduate Education',
+    'LPG or PNG Households': 'Clean Cooking Fuel',
+    'Internet': 'Internet Access',
+    'Computer': 'Computer Access',
+    'Television': 'Television Access',
+    'Telephone Mobile Phone': 'Phone Access',
+    'Tapwater Households': 'Tap Water Access',
+    'Within the premises Households': 'Water Within Premises',
+    'Flush pour flush latrine connected to other system Households': 'Flush Toilets',
+    'Having latrine facility within the premises Total Households': 'Toilet Facilities'
+}
+
+# Prefixes dropped from district labels
+DISTRICT_LABEL_PREFIXES = [
+    'Households with ', 'Main source of drinking water ',
+    'Location of drinking water source ', 'Type of latrine facility '
+]
+
+def base_name(column):
+    """Strip the state (_pct) or district (_%) suffix from a column name"""
+    for suffix in (STATE_SUFFIX, DISTRICT_SUFFIX):
+        if column.endswith(suffix):
+            return column[:-len(suffix)]
+    return column
+
+@functools.lru_cache(maxsize=1024)
+def derive_short_label(column_name):
+    """Convert a long column name to a short, readable label"""
+    clean_name = base_name(column_name).replace('%', '').strip()
+    return SHORT_LABELS.get(clean_name, clean_name.replace('_', ' ').title())
+
+@functools.lru_cache(maxsize=1024)
+def derive_district_label(attribute):
+    """Convert a district column name to a short, readable label"""
+    if not attribute:
+        return ""
+    clean_attr = attribute.replace('_%', '').replace('_', ' ')
+    for prefix in DISTRICT_LABEL_PREFIXES:
+        clean_attr = clean_attr.replace(prefix, '')
+    return DISTRICT_SHORT_LABELS.get(clean_attr, clean_attr[:25] + '...' if len(clean_attr) > 25 else clean_attr)
+
+def is_point_column(column):
+    """True for the count and rate columns built from point files"""
+    return column.endswith((POINT_COUNT_SUFFIX, POINT_RATE_SUFFIX))
+
+def attribute_unit(column):
+    """Display unit of an attribute column"""
+    if column.endswith(POINT_COUNT_SUFFIX):
+        return 'count'
+    if column.endswith(POINT_RATE_SUFFIX):
+        return f"per {POINT_SETTINGS['rate_per']:,}"
+    return '%'
+
+def matching_categories(name):
+    """Every category with a keyword equal to one of an attribute's words, most specific first"""
+    words = set(re.split(r'[_\s]+', name.lower()))
+    return [category for category, keywords in CATEGORY_KEYWORDS.items() if words.intersection(keywords)]
+
+def categorize(name):
+    """Return the category of an attribute by whole-word keyword match, or None"""
+    categories = matching_categories(name)
+    return categories[0] if categories else None
+
+def build_catalog(state_columns, district_columns):
+    """Build a frozen catalog from the loaded state and district percentage columns"""
+    state_bases = {base_name(col): col for col in state_columns}
+    district_bases = {base_name(col): col for col in district_columns}
+
+    attributes = {}
+    by_column = {}
+    for name in list(state_bases) + [n for n in district_bases if n not in state_bases]:
+        state_column = state_bases.get(name)
+        district_column = district_bases.get(name)
+        info = AttributeInfo(
+            name=name,
+            category=categorize(name),
+            short_label=derive_short_label(state_column or district_column),
+            district_label=derive_district_label(district_column or name + DISTRICT_SUFFIX),
+            unit=attribute_unit(district_column or state_column),
+            denominator=PERCENTAGE_RULES.get(name, DISTRICT_PERCENTAGE_RULES.get(name)),
+            district_denominator=DISTRICT_PERCENTAGE_RULES.get(name),
+            state_column=state_column,
+            district_column=district_column
+        )
+        attributes[name] = info
+        for column in (state_column, district_column):
+            if column:
+                by_column[column] = info
+
+    # State categories keep the dashboard's display order; empty ones are dropped
+    categories = {}
+    for category in ATTRIBUTE_CATEGORIES:
+        also_matches = category in CATEGORY_ALSO_MATCHES
+        columns = tuple(info.state_column for info in attributes.values() if info.state_column and (
+            info.category == category or also_matches and category in matching_categories(info.name)))
+        if columns:
+            categories[category] = columns
+
+    district_categories = {}
+    for category, columns in DISTRICT_ATTRIBUTE_CATEGORIES.items():
+        available = tuple(col for col in columns if col in by_column)
+        if available:
+            district_categories[category] = available
+    points = tuple(col for col in district_columns if is_point_column(col))
+    if points:
+        district_categories[POINT_SETTINGS['category']] = points
+
+    return AttributeCatalog(
+        attributes=MappingProxyType(attributes),
+        by_column=MappingProxyType(by_column),
+        categories=MappingProxyType(categories),
+        district_categories=MappingProxyType(district_categories)
+    )
+
+# Current catalog; replaced as a whole whenever a table is (re)loaded
+_catalog = build_catalog([], [])
+
+def set_catalog(catalog):
+    """Swap in a newly built catalog"""
+    global _catalog
+    _catalog = catalog
+
+def get_catalog():
+    return _catalog
+
+def get_attribute(column):
+    """Look up the catalog entry for a state or district column (None if unknown)"""
+    return _catalog.by_column.get(column)
+
+def get_category_columns(category):
+    """State columns in a category, in display order"""
+    return _catalog.categories.get(category, ())
+
+def get_district_category_columns(category):
+    """District columns in a district category that exist in the loaded data"""
+    return _catalog.district_categories.get(category, ())
@@ -0,0 +1,145 @@
+# ===========================================
+# CHOROPLETH CLASSIFICATION
+# ===========================================
+# Class breaks that turn a continuous attribute into a few discrete colour
+# classes, so a handful of outliers no longer wash out the rest of a map:
+#   - quantile: classes with (about) the same number of areas
+#   - equal_interval: classes of equal width between the minimum and maximum
+#   - jenks: natural breaks minimising the squared deviation within classes,
+#     computed exactly with Fisher's dynamic programme over the sorted values
+#     (prefix sums give every segment's deviation in O(1), and each class
+#     count is one vectorised pass over the (n x n) segment table)
+#
+# Breaks are cached per (dataset version, attribute, method, classes, level,
+# state), for states nationally and for districts nationally or within a state.
+
+import threading
+from collections import namedtuple
+import numpy as np
+from config.settings import CLASSIFICATION_SETTINGS
+from data.loader import get_data_store
+
+METHODS = ('quantile', 'equal_interval', 'jenks')
+
+Classification = namedtuple('Classification', [
+    'method',       # quantile, equal_interval or jenks
+    'breaks',       # Class edges: minimum, upper bound of every class (the last is the maximum)
+    'counts',       # Values per class
+    'gvf',          # Goodness of variance fit: 1 - within-class / total squared deviation
+])
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def jenks_breaks(values, classes):
+    """Optimal natural breaks of sorted finite values (Fisher's exact dynamic programme)"""
+    values = np.sort(values)
+    n = len(values)
+    sums = np.r_[0, np.cumsum(values)]
+    squares = np.r_[0, np.cumsum(values ** 2)]
+
+    # ssd[i, j]: squared deviation of values[i..j] from their mean (inf where i > j)
+    start, stop = np.arange(n)[:, None], np.arange(n)[None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        count = (stop - start + 1).astype(float)
+        ssd = squares[stop + 1] - squares[start] - (sums[stop + 1] - sums[start]) ** 2 / count
+    ssd = np.where(stop >= start, np.maximum(ssd, 0), np.inf)
+
+    # cost[j]: best total for values[0..j] in c classes; first[c][j]: where the last class starts
+    cost = ssd[0].copy()
+    first = []
+    for _ in range(1, classes):
+        candidates = np.r_[np.inf, cost[:-1]][:, None] + ssd
+        first.append(np.argmin(candidates, axis=0))
+        cost = candidates[first[-1], np.arange(n)]
+
+    # Walk the class starts back from the last value
+    uppers, stop = [], n - 1
+    for starts in reversed(first):
+        begin = starts[stop]
+        uppers.append(values[begin - 1])
+        stop = begin - 1
+    return np.r_[values[0], uppers[::-1], values[-1]]
+
+def compute_breaks(values, method, classes):
+    """Class edges of the finite values (fewer classes when there are fewer distinct values)"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.array([])
+    distinct = np.unique(values)
+    if len(distinct) <= classes:
+        return np.r_[distinct[0], distinct]
+    if method == 'quantile':
+        breaks = np.quantile(values, np.linspace(0, 1, classes + 1))
+    elif method == 'equal_interval':
+        breaks = np.linspace(values.min(), values.max(), classes + 1)
+    elif method == 'jenks':
+        limit = CLASSIFICATION_SETTINGS['jenks_max_values']
+        if len(values) > limit:
+            # Evenly spaced order statistics keep the table at limit x limit
+            values = np.quantile(values, np.linspace(0, 1, limit))
+        breaks = jenks_breaks(values, classes)
+    else:
+        raise ValueError(f"Unknown classification method: {method}")
+    return np.r_[breaks[0], np.unique(breaks[1:])]
+
+def classify(values, breaks):
+    """Class index per value (values above an upper bound fall into the next class; NaN stays NaN)"""
+    values = np.asarray(values, dtype=float)
+    classes = np.searchsorted(breaks[1:-1], values, side='left').astype(float)
+    classes[~np.isfinite(values)] = np.nan
+    return classes
+
+def goodness_of_fit(values, classes):
+    """Goodness of variance fit of a classification"""
+    finite = np.isfinite(values)
+    values, classes = values[finite], classes[finite].astype(int)
+    total = ((values - values.mean()) ** 2).sum()
+    if total == 0:
+        return 1.0
+    counts = np.bincount(classes)
+    means = np.bincount(classes, weights=values) / np.maximum(counts, 1)
+    return float(1 - ((values - means[classes]) ** 2).sum() / total)
+
+def class_labels(breaks):
+    """Legend text per class, e.g. '12.5 – 20.0'"""
+    span = breaks[-1] - breaks[0]
+    decimals = 0 if span >= 100 else 1 if span >= 1 else 3
+    return [f"{low:,.{decimals}f} – {high:,.{decimals}f}" for low, high in zip(breaks[:-1], breaks[1:])]
+
+def _attribute_values(attribute, level, state):
+    """Values the breaks are computed from: one per state, or per district nationally or within a state"""
+    store = get_data_store()
+    if level == 'state':
+        return store.state_data.groupby('State name', observed=True)[attribute].mean().to_numpy(dtype=float)
+    districts = store.district_data
+    if state is not None:
+        districts = districts[districts['State name'] == state]
+    return districts[attribute].to_numpy(dtype=float)
+
+def get_classification(attribute, method, level='district', state=None, classes=None):
+    """Cached classification of an attribute for states or districts (nationally, or within `state`)"""
+    classes = classes or CLASSIFICATION_SETTINGS['classes']
+    version = get_data_store().version
+    key = (version, attribute, method, classes, level, state)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    values = _attribute_values(attribute, level, state)
+    breaks = compute_breaks(values, method, classes)
+    if len(breaks) == 0:
+        result = Classification(method, breaks, np.array([], dtype=int), np.nan)
+    else:
+        assigned = classify(values, breaks)
+        finite = np.isfinite(assigned)
+        result = Classification(method, breaks, np.bincount(assigned[finite].astype(int), minlength=len(breaks) - 1),
+                                goodness_of_fit(values, assigned))
+    with _cache_lock:
+        # Breaks of older dataset versions are never asked for again
+        for stale in [old for old in _cache if old[0] != version]:
+            del _cache[stale]
+        _cache[key] = result
+    return result
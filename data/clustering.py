@@ -0,0 +1,197 @@
+# ===========================================
+# DISTRICT TYPOLOGY CLUSTERING
+# ===========================================
+# Groups districts into development typologies with k-means on the z-scored
+# columns of one district attribute category. Jobs run on a background
+# worker pool and results are cached per (dataset version, category, k,
+# state), so every user of the process shares them. When only k changes the
+# previous centroids seed the new run (extra centres are added k-means++
+# style, or the largest clusters are kept), so it converges in a few steps.
+# k is capped at the number of districts clustered (small states have fewer
+# districts than typologies on offer); ClusterResult.k is the k used.
+#
+# Typologies are numbered from the lowest to the highest average z-score of
+# their centroid, so "Typology 1" is always the least developed group on
+# the chosen category.
+
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import numpy as np
+from config.settings import CLUSTER_SETTINGS
+from data.catalog import get_catalog
+from data.loader import get_data_store, get_shared_matrix
+from data.similarity import zscore
+
+ClusterResult = namedtuple('ClusterResult', [
+    'version',          # Dataset version
+    'category',         # District attribute category clustered on
+    'k',                # Number of typologies
+    'state',            # State filter (None = all of India)
+    'codes',            # District code per clustered district
+    'labels',           # Typology (0 .. k-1) per district
+    'centroids',        # (k x attributes) z-scored typology centres
+    'columns',          # Attribute columns of the centroids
+    'sizes',            # Districts per typology
+    'inertia',          # Sum of squared distances to the centres
+    'iterations',       # Lloyd iterations until convergence
+    'warm_started',     # True when seeded from a previous k
+])
+
+_results = {}
+_pending = {}
+_lock = threading.Lock()
+_executor = None
+
+def _squared_distances(points, centroids):
+    """(points x centroids) squared euclidean distances"""
+    return np.maximum((points ** 2).sum(axis=1)[:, None] + (centroids ** 2).sum(axis=1)[None, :]
+                      - 2 * points @ centroids.T, 0)
+
+def _add_centres(points, centroids, k, rng):
+    """Extend the centres to k with k-means++ seeding (distance-squared sampling)"""
+    centroids = list(centroids)
+    if not centroids:
+        centroids.append(points[rng.integers(len(points))])
+    closest = _squared_distances(points, np.asarray(centroids)).min(axis=1)
+    while len(centroids) < k:
+        total = closest.sum()
+        choice = rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        centroids.append(points[choice])
+        closest = np.minimum(closest, _squared_distances(points, points[choice][None, :])[:, 0])
+    return np.asarray(centroids, dtype=np.float64)
+
+def kmeans(points, k, initial=None, max_iter=None, seed=None, tol=1e-6):
+    """Lloyd's k-means; returns (labels, centroids, inertia, iterations)"""
+    rng = np.random.default_rng(CLUSTER_SETTINGS['seed'] if seed is None else seed)
+    max_iter = max_iter or CLUSTER_SETTINGS['max_iter']
+    points = np.asarray(points, dtype=np.float64)
+    centroids = _add_centres(points, [] if initial is None else initial, k, rng)
+
+    for iteration in range(1, max_iter + 1):
+        distances = _squared_distances(points, centroids)
+        labels = distances.argmin(axis=1)
+        sizes = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        updated = np.where(sizes[:, None] > 0, sums / np.maximum(sizes, 1)[:, None], centroids)
+
+        # An empty cluster takes over the point furthest from its centre
+        for empty in np.flatnonzero(sizes == 0):
+            furthest = distances[np.arange(len(points)), labels].argmax()
+            updated[empty] = points[furthest]
+            labels[furthest] = empty
+            distances[furthest] = 0
+
+        shift = np.abs(updated - centroids).max()
+        centroids = updated
+        if shift <= tol:
+            break
+
+    labels = _squared_distances(points, centroids).argmin(axis=1)
+    inertia = float(_squared_distances(points, centroids)[np.arange(len(points)), labels].sum())
+    return labels, centroids, inertia, iteration
+
+def _warm_start(version, category, k, state):
+    """Centres of the closest already-computed k for the same data, category and state"""
+    with _lock:
+        previous = [result for key, result in _results.items()
+                    if key[:2] == (version, category) and key[3] == state and key[2] != k]
+    if not previous:
+        return None
+    nearest = min(previous, key=lambda result: abs(result.k - k))
+    if nearest.k > k:
+        # Keep the centres of the largest typologies
+        return nearest.centroids[np.argsort(-nearest.sizes, kind='stable')[:k]]
+    return nearest.centroids
+
+def _order_typologies(labels, centroids):
+    """Renumber typologies from the lowest to the highest mean centroid z-score"""
+    order = np.argsort(centroids.mean(axis=1), kind='stable')
+    relabel = np.empty_like(order)
+    relabel[order] = np.arange(len(order))
+    return relabel[labels], centroids[order]
+
+def _run(version, category, k, state):
+    """Cluster one (category, k, state) and cache the result"""
+    store = get_data_store()
+    matrix = get_shared_matrix('district')
+    columns = [col for col in get_catalog().district_categories.get(category, ()) if col in matrix.columns]
+    if not columns:
+        raise ValueError(f"No district columns for category {category}")
+
+    rows = np.arange(len(matrix.rows))
+    if state is not None:
+        rows = np.flatnonzero(store.district_data['State name'].astype(str).to_numpy() == state)
+    if len(rows) < k:
+        raise ValueError(f"{len(rows)} districts cannot form {k} typologies")
+
+    values = np.asarray(matrix.values[rows][:, [matrix.columns.index(col) for col in columns]])
+    points = zscore(values)
+    initial = _warm_start(version, category, k, state)
+    labels, centroids, inertia, iterations = kmeans(points, k, initial)
+    labels, centroids = _order_typologies(labels, centroids)
+
+    result = ClusterResult(version, category, k, state, np.asarray(matrix.rows)[rows], labels, centroids,
+                           tuple(columns), np.bincount(labels, minlength=k), inertia, iterations, initial is not None)
+    with _lock:
+        # Results of older dataset versions are never asked for again
+        for stale in [key for key in _results if key[0] != version]:
+            del _results[stale]
+        _results[(version, category, k, state)] = result
+    return result
+
+def district_count(state=None):
+    """Number of districts clustered nationally or within a state"""
+    districts = get_data_store().district_data
+    if state is None:
+        return len(districts)
+    return int((districts['State name'].astype(str) == state).sum())
+
+def _get_executor():
+    """Background worker pool for clustering jobs (created on first use)"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CLUSTER_SETTINGS['workers'],
+                                           thread_name_prefix='district-clustering')
+        return _executor
+
+def submit_clustering(category, k=None, state=None):
+    """Queue a clustering job (or return the cached/running one) as a future"""
+    k = max(1, min(k or CLUSTER_SETTINGS['default_k'], district_count(state)))
+    version = get_data_store().version
+    key = (version, category, k, state)
+    executor = _get_executor()
+    with _lock:
+        future = _pending.get(key)
+        if future is None:
+            future = executor.submit(_run, version, category, k, state)
+            _pending[key] = future
+            future.add_done_callback(lambda _: _pending.pop(key, None))
+        return future
+
+def cluster_districts(category, k=None, state=None, wait=None):
+    """Cached typologies for a category, clustering in the background if needed
+
+    Returns a ClusterResult, or None if the job is still running after `wait`
+    seconds (wait=None blocks until it is done, wait=0 never blocks).
+    """
+    k = max(1, min(k or CLUSTER_SETTINGS['default_k'], district_count(state)))
+    with _lock:
+        cached = _results.get((get_data_store().version, category, k, state))
+    if cached is not None:
+        return cached
+    future = submit_clustering(category, k, state)
+    if wait == 0 and not future.done():
+        return None
+    try:
+        return future.result(timeout=wait)
+    except TimeoutError:
+        return None
+
+def prewarm_clusters(store=None):
+    """Queue the default national typologies of every category (used after each data load)"""
+    for category, columns in get_catalog().district_categories.items():
+        if columns:
+            submit_clustering(category)
@@ -0,0 +1,50 @@
+# ===========================================
+# COMPACT TABLE DTYPES
+# ===========================================
+# Loaded tables default to float64 values and one Python string per row for
+# names. Percentages only need float32 (~7 significant digits), names repeat
+# across rows and become categoricals (int codes + one lookup table), and
+# counts/codes fit narrower integers.
+
+import numpy as np
+import pandas as pd
+
+def table_memory(frame):
+    """Deep memory footprint of a DataFrame in bytes"""
+    return int(frame.memory_usage(deep=True, index=True).sum())
+
+def format_bytes(size):
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def is_percentage_column(column):
+    """State (_pct) and district (_%) percentage columns"""
+    return str(column).endswith(('_pct', '%'))
+
+def compact_column(series):
+    """Return the column in its narrowest lossless-enough dtype"""
+    if pd.api.types.is_float_dtype(series):
+        if is_percentage_column(series.name):
+            return series.astype(np.float32)
+        # Counts that arrived as floats (e.g. summed during ingestion) become integers again
+        if series.notna().all() and np.array_equal(series, series.round()):
+            return pd.to_numeric(series, downcast='integer')
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        return series.astype('category')
+    return series
+
+def compact_table(frame, label):
+    """Downcast a table's columns and print its memory before and after"""
+    before = table_memory(frame)
+    compact = pd.DataFrame({col: compact_column(frame[col]) for col in frame.columns}, index=frame.index)
+    after = table_memory(compact)
+    print(f"🧮 {label}: {format_bytes(before)} -> {format_bytes(after)} "
+          f"({(1 - after / before) * 100 if before else 0:.0f}% smaller)")
+    return compact
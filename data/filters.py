@@ -0,0 +1,114 @@
+# ===========================================
+# DISTRICT PREDICATE FILTER ENGINE
+# ===========================================
+# Answers multi-attribute questions such as "literacy > 70% AND internet < 5%
+# AND tap water < 30%" across all districts. Each attribute column of the
+# shared district matrix is sorted once per dataset version; a range
+# predicate is then two binary searches into that sorted column, and the
+# matching row positions become a bitmap. Bitmaps of all predicates (and an
+# optional state bitmap) are ANDed together.
+
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from data.loader import get_data_store, get_shared_matrix
+
+FILTER_OPERATORS = ('>', '>=', '<', '<=')
+
+FilterIndex = namedtuple('FilterIndex', [
+    'version',          # Dataset version the index was built from
+    'columns',          # Attribute column -> position
+    'order',            # (attributes x districts) row positions sorted by value, NaN last
+    'sorted_values',    # (attributes x districts) values in that order
+    'valid_counts',     # Non-NaN values per attribute
+    'state_bitmaps',    # State name -> district bitmap
+    'districts',        # District code, name and state per row position
+])
+
+_index = None
+_index_lock = threading.Lock()
+
+def build_filter_index(district_data, matrix):
+    """Sort every attribute of the district matrix once and bitmap each state's districts"""
+    values = np.asarray(matrix.values, dtype=np.float32).T
+    order = np.argsort(values, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=1)
+
+    states = district_data['State name'].astype(str).to_numpy()
+    state_bitmaps = {state: states == state for state in pd.unique(states)}
+    return FilterIndex(
+        version=None,
+        columns={column: i for i, column in enumerate(matrix.columns)},
+        order=order,
+        sorted_values=sorted_values,
+        valid_counts=(~np.isnan(sorted_values)).sum(axis=1),
+        state_bitmaps=state_bitmaps,
+        districts=district_data[['District code', 'District name', 'State name']].reset_index(drop=True),
+    )
+
+def get_filter_index():
+    """Filter index for the current dataset version (rebuilt after a data reload)"""
+    global _index
+    store = get_data_store()
+    with _index_lock:
+        if _index is None or _index.version != store.version:
+            matrix = get_shared_matrix('district')
+            if matrix is None or store.district_data is None:
+                return None
+            _index = build_filter_index(store.district_data, matrix)._replace(version=store.version)
+        return _index
+
+def predicate_bitmap(index, column, operator, value):
+    """Bitmap of the districts whose column satisfies 'column <operator> value' (NaN never matches)"""
+    position = index.columns[column]
+    values = index.sorted_values[position, :index.valid_counts[position]]
+    if operator == '>':
+        start, stop = np.searchsorted(values, value, side='right'), len(values)
+    elif operator == '>=':
+        start, stop = np.searchsorted(values, value, side='left'), len(values)
+    elif operator == '<':
+        start, stop = 0, np.searchsorted(values, value, side='left')
+    elif operator == '<=':
+        start, stop = 0, np.searchsorted(values, value, side='right')
+    else:
+        raise ValueError(f"Unsupported filter operator: {operator}")
+
+    bitmap = np.zeros(index.order.shape[1], dtype=bool)
+    bitmap[index.order[position, start:stop]] = True
+    return bitmap
+
+def filter_bitmap(predicates, state=None, index=None):
+    """AND of the bitmaps for (column, operator, value) predicates, optionally within one state"""
+    index = index or get_filter_index()
+    bitmap = np.ones(index.order.shape[1], dtype=bool)
+    if state is not None:
+        bitmap &= index.state_bitmaps.get(state, np.zeros_like(bitmap))
+    for column, operator, value in predicates:
+        bitmap &= predicate_bitmap(index, column, operator, np.float32(value))
+    return bitmap
+
+def filter_districts(predicates, state=None):
+    """Matching districts and their per-state counts
+
+    Returns (matches, state_counts): matches has the district code, name and
+    state plus each predicate column; state_counts is a Series of matching
+    districts per state, largest first.
+    """
+    index = get_filter_index()
+    if index is None:
+        return pd.DataFrame(), pd.Series(dtype='int64')
+
+    bitmap = filter_bitmap(predicates, state, index)
+    positions = np.flatnonzero(bitmap)
+    columns = list(dict.fromkeys(column for column, _, _ in predicates))
+    matrix = get_shared_matrix('district')
+
+    matches = index.districts.iloc[positions].reset_index(drop=True)
+    if columns:
+        attribute_positions = [matrix.columns.index(column) for column in columns]
+        values = np.asarray(matrix.values[positions][:, attribute_positions])
+        matches = pd.concat([matches, pd.DataFrame(values, columns=columns)], axis=1)
+
+    state_counts = matches['State name'].astype(str).value_counts()
+    return matches, state_counts
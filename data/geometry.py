@@ -0,0 +1,236 @@
+# ===========================================
+# POLYGON METRICS
+# ===========================================
+# Geodesic area, centroid, label point and bounding box for every district
+# polygon, computed once per dataset version over packed coordinate arrays
+# (all rings of all state files in one (n, 2) array plus ring offsets), so
+# every formula is a handful of NumPy operations rather than a Python loop
+# over vertices. State figures are rolled up from their districts, and each
+# state gets a precomputed map view so the browser does not have to fit
+# bounds on every render.
+
+import os
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import CSV_TO_GEOJSON_MAPPING
+from data.loader import get_data_store, load_state_geojson
+
+EARTH_RADIUS_KM = 6371.0088
+VIEW_PADDING = 0.05         # Fraction of the bounding box added around a state view
+
+PackedRings = namedtuple('PackedRings', [
+    'points',       # (points x 2) lon/lat of every ring, closing vertex dropped
+    'starts',       # First point of each ring
+    'lengths',      # Points per ring
+    'codes',        # dt_code per ring
+    'states',       # CSV state name per ring
+    'holes',        # True for interior rings
+])
+
+GeometryMetrics = namedtuple('GeometryMetrics', ['version', 'districts', 'states', 'views'])
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def pack_rings(geojsons):
+    """Flatten {state: GeoJSON} polygons into one coordinate array with per-ring offsets"""
+    rings, codes, states, holes = [], [], [], []
+    for state, geojson in geojsons.items():
+        for feature in geojson.get('features', []):
+            code = pd.to_numeric((feature.get('properties') or {}).get('dt_code'), errors='coerce')
+            geometry = feature.get('geometry') or {}
+            if pd.isna(code) or code <= 0:
+                continue
+            polygons = [geometry.get('coordinates') or []] if geometry.get('type') == 'Polygon' else geometry.get('coordinates') or []
+            for polygon in polygons:
+                for position, ring in enumerate(polygon):
+                    ring = np.asarray(ring, dtype=float)[:, :2]
+                    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                        ring = ring[:-1]
+                    if len(ring) >= 3:
+                        rings.append(ring)
+                        codes.append(int(code))
+                        states.append(state)
+                        holes.append(position > 0)
+
+    lengths = np.array([len(ring) for ring in rings], dtype=np.int64)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]].astype(np.int64)
+    return PackedRings(np.concatenate(rings), starts, lengths, np.array(codes, dtype=np.int64),
+                       np.array(states, dtype=object), np.array(holes, dtype=bool))
+
+def next_vertex_index(packed):
+    """Index of the following vertex of every point, wrapping around within its ring"""
+    ring_of_point = np.repeat(np.arange(len(packed.starts)), packed.lengths)
+    following = np.arange(len(packed.points)) + 1
+    last = packed.starts + packed.lengths - 1
+    following[last] = packed.starts
+    return following, ring_of_point
+
+def ring_areas_km2(packed):
+    """Geodesic area of each ring on a spherical Earth (spherical excess summed edge by edge)"""
+    following, _ = next_vertex_index(packed)
+    lon, lat = np.radians(packed.points[:, 0]), np.radians(packed.points[:, 1])
+    terms = (lon[following] - lon) * (2 + np.sin(lat) + np.sin(lat[following]))
+    return np.abs(np.add.reduceat(terms, packed.starts)) * EARTH_RADIUS_KM ** 2 / 2
+
+def ring_centroids(packed, reference_lat):
+    """Planar shoelace area and centroid of each ring in a local equirectangular projection"""
+    following, ring_of_point = next_vertex_index(packed)
+    scale = np.cos(np.radians(reference_lat))[ring_of_point]
+    x, y = packed.points[:, 0] * scale, packed.points[:, 1]
+    x_next, y_next = x[following], y[following]
+    cross = x * y_next - x_next * y
+    area = np.add.reduceat(cross, packed.starts) / 2
+    safe = np.where(area != 0, area, 1)
+    cx = np.add.reduceat((x + x_next) * cross, packed.starts) / (6 * safe)
+    cy = np.add.reduceat((y + y_next) * cross, packed.starts) / (6 * safe)
+    return np.abs(area), cx / np.cos(np.radians(reference_lat)), cy
+
+def label_points(packed, rings, scan_lat):
+    """Midpoint of the widest interior span of each ring along a horizontal scanline
+
+    Unlike the centroid this always lies inside the polygon, so it is safe for
+    labels and markers on concave or crescent-shaped districts.
+    """
+    following, ring_of_point = next_vertex_index(packed)
+    chosen = np.isin(ring_of_point, rings)
+    position = np.full(len(packed.starts), -1)
+    position[rings] = np.arange(len(rings))
+
+    x1, y1 = packed.points[chosen, 0], packed.points[chosen, 1]
+    x2, y2 = packed.points[following[chosen], 0], packed.points[following[chosen], 1]
+    slot = position[ring_of_point[chosen]]
+    y = scan_lat[slot]
+
+    # Half-open crossing rule so a vertex exactly on the scanline is counted once
+    crosses = (y1 <= y) != (y2 <= y)
+    slot, x1, y1, x2, y2, y = slot[crosses], x1[crosses], y1[crosses], x2[crosses], y2[crosses], y[crosses]
+    x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+
+    order = np.lexsort((x, slot))
+    slot, x = slot[order], x[order]
+    rank = np.arange(len(slot)) - np.searchsorted(slot, slot)
+    starts = (rank % 2 == 0) & np.r_[slot[1:] == slot[:-1], False]
+    width = np.zeros(len(slot))
+    width[starts] = x[np.flatnonzero(starts) + 1] - x[starts]
+
+    label_lon = np.full(len(rings), np.nan)
+    if starts.any():
+        candidates = np.flatnonzero(starts)
+        best = candidates[np.lexsort((-width[candidates], slot[candidates]))]
+        first = np.r_[True, slot[best][1:] != slot[best][:-1]]
+        best = best[first]
+        label_lon[slot[best]] = (x[best] + x[best + 1]) / 2
+    return label_lon, scan_lat
+
+def district_metrics(geojsons):
+    """Area, centroid, label point and bbox per dt_code from {state: GeoJSON}"""
+    packed = pack_rings(geojsons)
+    codes, code_index = np.unique(packed.codes, return_inverse=True)
+    ring_of_point = np.repeat(np.arange(len(packed.starts)), packed.lengths)
+    point_code = code_index[ring_of_point]
+
+    # Bounding boxes per district
+    lon, lat = packed.points[:, 0], packed.points[:, 1]
+    min_lon = np.full(len(codes), np.inf)
+    max_lon = np.full(len(codes), -np.inf)
+    min_lat = np.full(len(codes), np.inf)
+    max_lat = np.full(len(codes), -np.inf)
+    np.minimum.at(min_lon, point_code, lon)
+    np.maximum.at(max_lon, point_code, lon)
+    np.minimum.at(min_lat, point_code, lat)
+    np.maximum.at(max_lat, point_code, lat)
+
+    # Holes subtract from both the area and the centroid moments
+    sign = np.where(packed.holes, -1.0, 1.0)
+    area = np.bincount(code_index, weights=sign * ring_areas_km2(packed), minlength=len(codes))
+    reference_lat = ((min_lat + max_lat) / 2)[code_index]
+    planar, cx, cy = ring_centroids(packed, reference_lat)
+    moment = np.bincount(code_index, weights=sign * planar, minlength=len(codes))
+    moment = np.where(moment != 0, moment, 1)
+    centroid_lon = np.bincount(code_index, weights=sign * planar * cx, minlength=len(codes)) / moment
+    centroid_lat = np.bincount(code_index, weights=sign * planar * cy, minlength=len(codes)) / moment
+
+    # Label point on the largest outer ring of each district, at the centroid's latitude
+    outer = np.flatnonzero(~packed.holes)
+    largest = outer[np.lexsort((-planar[outer], code_index[outer]))]
+    largest = largest[np.r_[True, code_index[largest][1:] != code_index[largest][:-1]]]
+    label_lon, label_lat = label_points(packed, largest, centroid_lat[code_index[largest]])
+    district_label_lon = np.full(len(codes), np.nan)
+    district_label_lat = np.full(len(codes), np.nan)
+    district_label_lon[code_index[largest]] = label_lon
+    district_label_lat[code_index[largest]] = label_lat
+    missing = np.isnan(district_label_lon)
+    district_label_lon[missing], district_label_lat[missing] = centroid_lon[missing], centroid_lat[missing]
+
+    states = pd.Series(packed.states).groupby(code_index).first().to_numpy()
+    return pd.DataFrame({
+        'dt_code': codes, 'State name': states, 'area_km2': area,
+        'centroid_lon': centroid_lon, 'centroid_lat': centroid_lat,
+        'label_lon': district_label_lon, 'label_lat': district_label_lat,
+        'min_lon': min_lon, 'min_lat': min_lat, 'max_lon': max_lon, 'max_lat': max_lat,
+    })
+
+def state_metrics(districts):
+    """Roll district geometry up to states: total area, area-weighted centroid and bbox"""
+    weighted = districts.assign(wlon=districts['centroid_lon'] * districts['area_km2'],
+                                wlat=districts['centroid_lat'] * districts['area_km2'])
+    states = weighted.groupby('State name', observed=True).agg(
+        area_km2=('area_km2', 'sum'), wlon=('wlon', 'sum'), wlat=('wlat', 'sum'),
+        min_lon=('min_lon', 'min'), min_lat=('min_lat', 'min'),
+        max_lon=('max_lon', 'max'), max_lat=('max_lat', 'max'))
+    states['centroid_lon'] = states.pop('wlon') / states['area_km2']
+    states['centroid_lat'] = states.pop('wlat') / states['area_km2']
+    return states.reset_index()
+
+def view_bounds(states, padding=VIEW_PADDING):
+    """Plotly geo axis ranges per state, padded around its bounding box"""
+    views = {}
+    bounds = states[['min_lon', 'min_lat', 'max_lon', 'max_lat']].to_numpy()
+    for state, (min_lon, min_lat, max_lon, max_lat) in zip(states['State name'].astype(str), bounds):
+        pad_lon = (max_lon - min_lon) * padding
+        pad_lat = (max_lat - min_lat) * padding
+        views[state] = {
+            'fitbounds': False,
+            'lonaxis': {'range': [round(float(min_lon - pad_lon), 3), round(float(max_lon + pad_lon), 3)]},
+            'lataxis': {'range': [round(float(min_lat - pad_lat), 3), round(float(max_lat + pad_lat), 3)]},
+        }
+    return views
+
+def _with_density(frame, population):
+    """Add Population and Population_Density (persons per km²) columns"""
+    frame = frame.copy()
+    frame['Population'] = population
+    frame['Population_Density'] = np.where(frame['area_km2'] > 0, frame['Population'] / frame['area_km2'], np.nan)
+    return frame
+
+def get_geometry_metrics():
+    """District and state geometry/density tables and state map views for the current dataset"""
+    global _metrics
+    store = get_data_store()
+    with _metrics_lock:
+        if _metrics is not None and _metrics.version == store.version:
+            return _metrics
+
+        geojsons = {state: load_state_geojson(path) for state, path in CSV_TO_GEOJSON_MAPPING.items()
+                    if os.path.exists(path)}
+        districts = district_metrics(geojsons)
+        states = state_metrics(districts)
+
+        # Density from census population (districts without a census row get NaN)
+        if store.district_data is not None and 'Population' in store.district_data.columns:
+            population = store.district_data.set_index('District code')['Population']
+            districts = _with_density(districts, districts['dt_code'].map(population).to_numpy(dtype=float))
+        if store.state_data is not None and 'Population' in store.state_data.columns:
+            population = store.state_data.set_index('State name', drop=True)['Population']
+            population.index = population.index.astype(str)
+            states = _with_density(states, states['State name'].astype(str).map(population).to_numpy(dtype=float))
+
+        _metrics = GeometryMetrics(store.version, districts, states, view_bounds(states))
+        return _metrics
+
+def state_view(state):
+    """Precomputed plotly geo settings framing a state's districts (empty if unknown)"""
+    return get_geometry_metrics().views.get(state, {})
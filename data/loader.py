@@ -5,64 +5,259 @@
 import pandas as pd
 import json
 import os
+import threading
+from contextlib import contextmanager
+from collections import namedtuple, OrderedDict
+from types import MappingProxyType
 from config.settings import (
-    ATTRIBUTE_CATEGORIES, 
-    DISTRICT_ATTRIBUTE_CATEGORIES, 
-    CSV_TO_GEOJSON_MAPPING
+    CSV_TO_GEOJSON_MAPPING,
+    PERCENTAGE_RULES,
+    DISTRICT_PERCENTAGE_RULES,
+    INGESTION_SETTINGS,
+    SERIALIZATION_SETTINGS
 )
+from data.catalog import build_catalog, set_catalog, get_catalog
+from data.aggregation import aggregate_counts
+from data.pipeline import read_chunks
+from data.dtypes import compact_table
+from data.shared import share_matrix, share_table_columns
+from utils.serialization import round_geojson
 
-# Global data variables
+STATE_DATA_FILE = 'statewiseaggregated.csv'
+DISTRICT_DATA_FILE = 'districtwise_data_percentages11_incsv.csv'
+INDIA_GEOJSON_FILE = 'india.json'
+
+# Global data variables (the loaders build into these; callbacks read the published DataStore)
 india_geo = None
 state_data = None
 district_data = None
+subdistrict_data = None
 state_file_map = {}
+# Rounded state GeoJSONs by path, least recently used first (bounded by SERIALIZATION_SETTINGS)
+state_geo_cache = OrderedDict()
+_state_geo_lock = threading.Lock()
 state_dropdown_options = []
 pct_cols = []
 district_percentage_cols = []
+subdistrict_percentage_cols = []
+state_aggregates = None
+national_aggregates = None
+shared_matrices = {}
+
+# Immutable snapshot of everything the callbacks read. A reload builds new tables
+# and swaps the whole tuple in one assignment, so a request that already holds a
+# snapshot keeps using it.
+DataStore = namedtuple('DataStore', [
+    'version', 'india_geo', 'state_data', 'district_data', 'subdistrict_data',
+    'pct_cols', 'district_percentage_cols', 'state_aggregates', 'national_aggregates', 'matrices'
+])
+data_store = DataStore(0, None, None, None, None, [], [], None, None, MappingProxyType({}))
+_store_lock = threading.RLock()
+_reload_depth = 0
+_publish_pending = False
+_reload_listeners = []
+# (mtime_ns, size) of every data file as of its last successful load
+_loaded_signatures = {}
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _is_loaded(path):
+    """True when a file was loaded successfully and has not changed since"""
+    return path in _loaded_signatures and _loaded_signatures[path] == file_signature(path)
+
+def _mark_loaded(path, success):
+    """Remember the signature a file was loaded at, or forget it after a failed load"""
+    if success:
+        _loaded_signatures[path] = file_signature(path)
+    else:
+        _loaded_signatures.pop(path, None)
 
 def load_geojson_data():
     """Load India GeoJSON for state boundaries"""
     global india_geo
+    if _is_loaded(INDIA_GEOJSON_FILE):
+        return True
     try:
-        with open("india.json", encoding="utf-8") as f:
-            india_geo = json.load(f)
+        with open(INDIA_GEOJSON_FILE, encoding="utf-8") as f:
+            india_geo = round_geojson(json.load(f))
         print("✅ India GeoJSON loaded successfully")
+        _mark_loaded(INDIA_GEOJSON_FILE, True)
+        publish_data_store()
         return True
     except Exception as e:
         print(f"❌ Error loading india.json: {e}")
+        _mark_loaded(INDIA_GEOJSON_FILE, False)
         return False
 
+def load_state_geojson(geojson_file):
+    """Load a state's district GeoJSON once, with coordinates rounded for compact responses"""
+    with _state_geo_lock:
+        if geojson_file in state_geo_cache:
+            state_geo_cache.move_to_end(geojson_file)
+            return state_geo_cache[geojson_file]
+    with open(geojson_file, encoding="utf-8") as f:
+        state_geo = round_geojson(json.load(f))
+    with _state_geo_lock:
+        state_geo_cache[geojson_file] = state_geo
+        while len(state_geo_cache) > SERIALIZATION_SETTINGS['geojson_cache_size']:
+            state_geo_cache.popitem(last=False)
+    return state_geo
+
+def set_state_table(state_data_full):
+    """Keep the essential and percentage columns of a full state table"""
+    global state_data, pct_cols, shared_matrices
+    # Filter only percentage columns (ending with '_pct') + essential columns
+    essential_cols = [col for col in ['State name', 'District code', 'Population'] if col in state_data_full.columns]
+    table_pct_cols = [col for col in state_data_full.columns if str(col).endswith('_pct')]
+    if 'State name' not in essential_cols or not table_pct_cols:
+        raise ValueError("State table needs a 'State name' column and '_pct' columns")
+    state_table = compact_table(state_data_full[essential_cols + table_pct_cols], "State table")
+    
+    # Attribute values and the correlation matrix live in memory maps shared by all workers
+    state_table, state_matrix = share_table_columns(state_table, table_pct_cols, 'state', 'State name')
+    numeric_cols = [col for col in state_table.columns if pd.api.types.is_numeric_dtype(state_table[col])]
+    correlation = state_table[numeric_cols].corr()
+    shared_matrices = dict(shared_matrices, state=state_matrix,
+                           state_correlation=share_matrix('state_correlation', correlation.to_numpy(),
+                                                          numeric_cols, numeric_cols))
+    state_data = state_table
+    pct_cols = table_pct_cols
+
+def set_district_table(district_data_full):
+    """Keep the essential and percentage columns of a full district table and derive weighted aggregates"""
+    global district_data, district_percentage_cols, state_aggregates, national_aggregates, shared_matrices
+    # Filter only percentage columns (containing '%' symbol) + essential columns
+    essential_cols_district = [col for col in ['District code', 'State name', 'District name', 'Population']
+                               if col in district_data_full.columns]
+    district_percentage_cols = [col for col in district_data_full.columns if '%' in str(col)]
+    district_table = district_data_full[essential_cols_district + district_percentage_cols]
+    # Counts and rates of the point files joined to the districts become attributes too
+    from data.points import point_layer_columns
+    point_columns = point_layer_columns(district_data_full)
+    if not point_columns.empty:
+        district_table = pd.concat([district_table, point_columns], axis=1)
+        district_percentage_cols = district_percentage_cols + list(point_columns.columns)
+    district_table = compact_table(district_table, "District table")
+    district_data, district_matrix = share_table_columns(district_table, district_percentage_cols, 'district', 'District code')
+    shared_matrices = dict(shared_matrices, district=district_matrix)
+    
+    # Population-weighted state and national figures from the raw district counts
+    state_aggregates = aggregate_counts(district_data_full, 'State name')
+    national_aggregates = pd.concat([
+        aggregate_counts(district_data_full).iloc[0],
+        aggregate_counts(district_data_full, rules=DISTRICT_PERCENTAGE_RULES, suffix='_%').iloc[0]
+    ])
+
 def load_state_data():
     """Load State-wise aggregated data (only percentage columns)"""
-    global state_data, pct_cols
+    global state_data
+    if _is_loaded(STATE_DATA_FILE):
+        return True
     try:
-        state_data_full = pd.read_csv('statewiseaggregated.csv')
-        # Filter only percentage columns (ending with '_pct') + essential columns
-        essential_cols = ['State name', 'District code', 'Population']
-        pct_cols = [col for col in state_data_full.columns if col.endswith('_pct')]
-        state_data = state_data_full[essential_cols + pct_cols]
+        set_state_table(pd.read_csv(STATE_DATA_FILE))
+        _mark_loaded(STATE_DATA_FILE, True)
         print(f"✅ State data loaded: {len(state_data)} rows, {len(pct_cols)} percentage columns")
         return True
     except Exception as e:
         print(f"❌ Error loading statewiseaggregated.csv: {e}")
+        _mark_loaded(STATE_DATA_FILE, False)
         state_data = pd.DataFrame()
         return False
+    finally:
+        publish_data_store()
 
 def load_district_data():
     """Load District-wise data (only percentage columns with % symbol)"""
-    global district_data, district_percentage_cols
+    global district_data
+    if _is_loaded(DISTRICT_DATA_FILE):
+        return True
     try:
-        district_data_full = pd.read_csv('districtwise_data_percentages11_incsv.csv')
-        # Filter only percentage columns (containing '%' symbol) + essential columns
-        essential_cols_district = ['State name', 'District name']
-        district_percentage_cols = [col for col in district_data_full.columns if '%' in str(col)]
-        district_data = district_data_full[essential_cols_district + district_percentage_cols]
+        set_district_table(pd.read_csv(DISTRICT_DATA_FILE))
+        _mark_loaded(DISTRICT_DATA_FILE, True)
         print(f"✅ District data loaded: {len(district_data)} rows, {len(district_percentage_cols)} percentage columns")
         return True
     except Exception as e:
         print(f"❌ Error loading districtwise_data_percentages11_incsv.csv: {e}")
+        _mark_loaded(DISTRICT_DATA_FILE, False)
         district_data = pd.DataFrame()
         return False
+    finally:
+        publish_data_store()
+
+def _count_columns(chunk, key_columns):
+    """Numeric count columns of an ingestion chunk (codes, keys and existing percentages excluded)"""
+    return [col for col in chunk.columns
+            if col not in key_columns
+            and pd.api.types.is_numeric_dtype(chunk[col])
+            and not str(col).lower().endswith(' code')
+            and not str(col).startswith('Unnamed')
+            and not str(col).endswith(('%', '_pct'))]
+
+def ingest_subdistrict_data(path, chunksize=None):
+    """Stream a sub-district or village level count file and roll it up to sub-district, district and state tables"""
+    global subdistrict_data, subdistrict_percentage_cols, shared_matrices, _publish_pending
+    subdistrict_keys = INGESTION_SETTINGS['subdistrict_columns'] + INGESTION_SETTINGS['district_columns']
+    try:
+        # Running sums per sub-district: memory depends on the number of sub-districts, not rows
+        totals = None
+        count_columns = None
+        rows = 0
+        for chunk in read_chunks(path, chunksize or INGESTION_SETTINGS['chunksize']):
+            if count_columns is None:
+                count_columns = _count_columns(chunk, subdistrict_keys)
+            chunk_sums = chunk.groupby(subdistrict_keys, sort=False, dropna=False)[count_columns].sum()
+            totals = chunk_sums if totals is None else totals.add(chunk_sums, fill_value=0)
+            rows += len(chunk)
+        
+        if totals is None:
+            raise ValueError(f"No rows found in {path}")
+        
+        subdistricts = totals.reset_index()
+        subdistrict_table = aggregate_counts(subdistricts, subdistrict_keys, rules=DISTRICT_PERCENTAGE_RULES,
+                                             suffix='_%', sum_columns=count_columns)
+        district_table = aggregate_counts(subdistricts, INGESTION_SETTINGS['district_columns'],
+                                          rules=DISTRICT_PERCENTAGE_RULES, suffix='_%', sum_columns=count_columns)
+        state_table = aggregate_counts(subdistricts, INGESTION_SETTINGS['state_columns'],
+                                       rules=PERCENTAGE_RULES, suffix='_pct', sum_columns=count_columns)
+    except Exception as e:
+        print(f"❌ Error ingesting {path}: {e}")
+        return False
+    
+    # Swapped in under the same lock as a watcher reload, and published as one snapshot
+    with _store_lock:
+        previous, previous_columns = data_store, subdistrict_percentage_cols
+        try:
+            with batch_loads():
+                table_percentage_cols = [col for col in subdistrict_table.columns if str(col).endswith('_%')]
+                subdistrict_table = compact_table(subdistrict_table[subdistrict_keys + table_percentage_cols],
+                                                  "Sub-district table")
+                subdistrict_data, subdistrict_matrix = share_table_columns(
+                    subdistrict_table, table_percentage_cols, 'subdistrict', INGESTION_SETTINGS['subdistrict_columns'][0])
+                subdistrict_percentage_cols = table_percentage_cols
+                shared_matrices = dict(shared_matrices, subdistrict=subdistrict_matrix)
+                set_district_table(district_table)
+                set_state_table(state_table)
+                # The ingested tables stand in for the state and district CSVs as they are now,
+                # so a reload only replaces them once one of those files changes again
+                _mark_loaded(STATE_DATA_FILE, True)
+                _mark_loaded(DISTRICT_DATA_FILE, True)
+                publish_data_store()
+        except Exception as e:
+            _restore_from_store(previous)
+            subdistrict_percentage_cols = previous_columns
+            _publish_pending = False
+            print(f"❌ Error ingesting {path}: {e}")
+            return False
+        
+        print(f"✅ Sub-district data ingested: {rows} rows -> {len(subdistrict_data)} sub-districts, "
+              f"{len(district_data)} districts, {len(state_data)} states")
+    return True
 
 def create_state_file_mapping():
     """Create mapping for state names to their geojson files"""
@@ -82,58 +277,147 @@ def create_state_file_mapping():
         print(f"❌ Error creating state mappings: {e}")
         return False
 
+def build_attribute_catalog():
+    """Rebuild the frozen attribute catalog from the currently loaded columns"""
+    set_catalog(build_catalog(pct_cols, district_percentage_cols))
+
+def publish_data_store():
+    """Swap in a new DataStore snapshot of the loaded tables and bump the dataset version"""
+    global data_store, _publish_pending
+    with _store_lock:
+        # A reload or batch of loads publishes once, after all changed files have been rebuilt
+        if _reload_depth:
+            _publish_pending = True
+            return data_store
+        _publish_pending = False
+        build_attribute_catalog()
+        data_store = DataStore(
+            version=data_store.version + 1,
+            india_geo=india_geo,
+            state_data=state_data,
+            district_data=district_data,
+            subdistrict_data=subdistrict_data,
+            pct_cols=pct_cols,
+            district_percentage_cols=district_percentage_cols,
+            state_aggregates=state_aggregates,
+            national_aggregates=national_aggregates,
+            matrices=MappingProxyType(dict(shared_matrices))
+        )
+        store = data_store
+    for listener in _reload_listeners:
+        try:
+            listener(store)
+        except Exception as e:
+            print(f"❌ Error in data reload listener {getattr(listener, '__name__', listener)}: {e}")
+    return store
+
+@contextmanager
+def batch_loads():
+    """Publish the tables loaded inside the block as one snapshot (nothing if no file was loaded)"""
+    global _reload_depth
+    with _store_lock:
+        _reload_depth += 1
+        try:
+            yield
+        finally:
+            _reload_depth -= 1
+        if _publish_pending and not _reload_depth:
+            publish_data_store()
+
+def _restore_from_store(store):
+    """Reset the build variables to a published snapshot after a failed reload"""
+    global india_geo, state_data, district_data, subdistrict_data, pct_cols, district_percentage_cols
+    global state_aggregates, national_aggregates, shared_matrices
+    india_geo = store.india_geo
+    state_data = store.state_data
+    district_data = store.district_data
+    subdistrict_data = store.subdistrict_data
+    pct_cols = store.pct_cols
+    district_percentage_cols = store.district_percentage_cols
+    state_aggregates = store.state_aggregates
+    national_aggregates = store.national_aggregates
+    shared_matrices = dict(store.matrices)
+
+def add_reload_listener(listener):
+    """Call listener(store) after every published snapshot, e.g. to rebuild data-dependent figures"""
+    _reload_listeners.append(listener)
+
+def get_watched_files():
+    """Data files whose changes trigger a reload"""
+    return [STATE_DATA_FILE, DISTRICT_DATA_FILE, INDIA_GEOJSON_FILE, *CSV_TO_GEOJSON_MAPPING.values()]
+
+def _load_changed_files(paths):
+    """Run the loader of every changed file; returns the files that failed to load"""
+    failed = []
+    for path in paths:
+        if path == STATE_DATA_FILE:
+            success = load_state_data()
+        elif path == DISTRICT_DATA_FILE:
+            success = load_district_data()
+        elif path == INDIA_GEOJSON_FILE:
+            success = load_geojson_data()
+        else:
+            with _state_geo_lock:
+                state_geo_cache.pop(path, None)  # State GeoJSON is re-read on next use
+            publish_data_store()
+            success = True
+        if not success:
+            failed.append(path)
+    return failed
+
+def reload_data_files(changed_files):
+    """Rebuild everything derived from the changed files and publish it as one new snapshot
+
+    Files that fail to load (e.g. a half-written CSV) keep their previous
+    tables; the other files are still published. Returns the failed files.
+    """
+    global _reload_depth, _publish_pending
+    with _store_lock:
+        previous = data_store
+        failed = []
+        loading = list(changed_files)
+        _reload_depth += 1
+        try:
+            while loading:
+                newly_failed = _load_changed_files(loading)
+                if not newly_failed:
+                    break
+                # Roll back to the published snapshot and load the files that did not fail again
+                failed += newly_failed
+                _restore_from_store(previous)
+                _publish_pending = False
+                for path in loading:
+                    _loaded_signatures.pop(path, None)
+                loading = [path for path in loading if path not in failed]
+        finally:
+            _reload_depth -= 1
+        
+        if failed:
+            print(f"⚠️ Reload of {', '.join(failed)} failed - keeping their previous data")
+        # Nothing to publish when every file was already loaded at its current signature
+        if not loading or not _publish_pending:
+            return failed
+        store = publish_data_store()
+    print(f"🔄 Data reloaded ({', '.join(loading)}) - dataset version {store.version}")
+    return failed
+
 def categorize_attributes():
     """Categorize percentage columns into logical groups"""
-    global pct_cols
-    
-    categories = ATTRIBUTE_CATEGORIES.copy()
-    
-    # Categorize state data columns
-    for col in pct_cols:
-        col_lower = col.lower()
-        if any(x in col_lower for x in ['male', 'female']):
-            categories["🏠 Demographics"].append(col)
-        elif any(x in col_lower for x in ['literate', 'education', 'primary', 'secondary', 'graduate']):
-            categories["📚 Education & Literacy"].append(col)
-        elif any(x in col_lower for x in ['worker', 'employment', 'cultivator', 'agricultural']):
-            categories["💼 Employment"].append(col)
-        elif any(x in col_lower for x in ['sc', 'st', 'caste']):
-            categories["🏛️ Social Categories"].append(col)
-        elif any(x in col_lower for x in ['hindu', 'muslim', 'christian', 'sikh', 'buddhist', 'jain', 'religion']):
-            categories["🕊️ Religion"].append(col)
-        elif any(x in col_lower for x in ['household', 'lpg', 'electric', 'internet', 'computer', 'bicycle', 'car', 'tv', 'telephone']):
-            categories["🏡 Household Amenities"].append(col)
-        elif any(x in col_lower for x in ['water', 'latrine', 'drinking']):
-            categories["💧 Water & Sanitation"].append(col)
-        elif any(x in col_lower for x in ['power_parity', 'rs_']):
-            categories["💰 Economic Indicators"].append(col)
-        elif any(x in col_lower for x in ['age_group']):
-            categories["📊 Age Groups"].append(col)
-    
-    # Remove empty categories
-    categories = {k: v for k, v in categories.items() if v}
-    return categories
+    return {category: list(columns) for category, columns in get_catalog().categories.items()}
 
 def filter_district_categories():
     """Filter district categories based on available columns"""
-    global district_data
-    
-    filtered_categories = {}
-    for category, attributes in DISTRICT_ATTRIBUTE_CATEGORIES.items():
-        available_attrs = [attr for attr in attributes if attr in district_data.columns]
-        if available_attrs:
-            filtered_categories[category] = available_attrs
-    
-    return filtered_categories
+    return {category: list(columns) for category, columns in get_catalog().district_categories.items()}
 
 def load_all_data():
     """Load all required data files"""
     print("🚀 Loading data files...")
     
     success = True
-    success &= load_geojson_data()
-    success &= load_state_data()
-    success &= load_district_data()
+    with batch_loads():
+        success &= load_geojson_data()
+        success &= load_state_data()
+        success &= load_district_data()
     success &= create_state_file_mapping()
     
     if success:
@@ -144,15 +428,24 @@ def load_all_data():
     
     return success
 
-# Export data access functions
+# Export data access functions (all read the current DataStore snapshot)
+def get_data_store():
+    return data_store
+
+def get_dataset_version():
+    return data_store.version
+
 def get_india_geo():
-    return india_geo
+    return data_store.india_geo
 
 def get_state_data():
-    return state_data
+    return data_store.state_data
 
 def get_district_data():
-    return district_data
+    return data_store.district_data
+
+def get_subdistrict_data():
+    return data_store.subdistrict_data
 
 def get_state_file_map():
     return state_file_map
@@ -161,7 +454,20 @@ def get_state_dropdown_options():
     return state_dropdown_options
 
 def get_pct_cols():
-    return pct_cols
+    return data_store.pct_cols
 
 def get_district_percentage_cols():
-    return district_percentage_cols
+    return data_store.district_percentage_cols
+
+def get_shared_matrix(name):
+    """Shared attribute matrix ('state', 'district', 'subdistrict' or 'state_correlation') or None"""
+    return data_store.matrices.get(name)
+
+def get_state_aggregates():
+    return data_store.state_aggregates
+
+def get_national_percentage(column):
+    """Population-weighted national value for a state (_pct) or district (_%) column"""
+    if data_store.national_aggregates is None:
+        return None
+    return data_store.national_aggregates.get(column)
@@ -0,0 +1,110 @@
+# ===========================================
+# NATIONAL DISTRICT LAYER
+# ===========================================
+# Merges every state GeoJSON into one all-India district layer for the
+# national district choropleth. Coordinates are quantized to a grid of
+# NATIONAL_MAP_SETTINGS['quantization'] degrees (about 1 km, below one pixel
+# at national zoom) and split into shared arcs (data/topology.py), and each
+# arc is simplified once with Douglas-Peucker. Districts of the same state
+# share their boundary vertices, so their simplified borders stay identical;
+# borders between states were digitized separately and may differ by up to
+# the simplification tolerance.
+#
+# The layer is not served on its own: it becomes the 'districts' object of
+# the boundary topology (data/boundaries.py), which is rebuilt when a state
+# file changes.
+#
+# Usage:
+#   python -m data.national_map [--output india_districts.geojson]
+
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from config.settings import NATIONAL_MAP_SETTINGS
+from data.adjacency import geojson_files
+from data.geometry import get_geometry_metrics, VIEW_PADDING
+from data.loader import load_state_geojson
+from data.topology import quantize_ring, split_arcs, simplify_arcs, assemble_ring
+
+def _polygons(geometry):
+    """Polygons (lists of rings) of a Polygon or MultiPolygon geometry"""
+    coordinates = geometry.get('coordinates') or []
+    return [coordinates] if geometry.get('type') == 'Polygon' else coordinates
+
+def build_national_geojson(grid=None, tolerance=None):
+    """One MultiPolygon feature per dt_code from all state files, quantized and simplified"""
+    grid = grid or NATIONAL_MAP_SETTINGS['quantization']
+    tolerance = NATIONAL_MAP_SETTINGS['tolerance'] if tolerance is None else tolerance
+
+    # Quantized rings of every polygon, remembering which feature and polygon they belong to
+    districts, rings, owners = {}, [], []
+    polygon_count = 0
+    for state, path in geojson_files().items():
+        for feature in load_state_geojson(path).get('features', []):
+            properties = feature.get('properties') or {}
+            code = pd.to_numeric(properties.get('dt_code'), errors='coerce')
+            if pd.isna(code) or code <= 0:
+                continue
+            code = int(code)
+            districts.setdefault(code, {
+                'type': 'Feature',
+                'properties': {'dt_code': str(code), 'district': properties.get('district'),
+                               'st_nm': properties.get('st_nm'), 'state': state},
+                'geometry': {'type': 'MultiPolygon', 'coordinates': []}
+            })
+            for polygon in _polygons(feature.get('geometry') or {}):
+                polygon_count += 1
+                for position, ring in enumerate(polygon):
+                    quantized = quantize_ring(ring, grid) if len(ring) > 1 else None
+                    if quantized is not None:
+                        rings.append(quantized)
+                        owners.append((code, polygon_count, position == 0))
+
+    # Boundaries shared by neighbours are simplified once, so both sides stay identical
+    arcs, references = split_arcs(rings)
+    simplified = simplify_arcs(arcs, tolerance / grid)
+    decimals = max(int(np.ceil(-np.log10(grid))), 0)
+    polygons = {}
+    for ring, refs, (code, polygon_id, outer) in zip(rings, references, owners):
+        result = assemble_ring(simplified, refs)
+        if len(np.unique(result, axis=0)) < 3:
+            if not outer:
+                continue
+            # Tiny districts keep their quantized outline rather than disappear
+            result = np.vstack([ring, ring[:1]])
+        if outer or polygon_id in polygons:
+            polygons.setdefault(polygon_id, (code, []))[1].append(np.round(result * grid, decimals).tolist())
+
+    for code, polygon in polygons.values():
+        districts[code]['geometry']['coordinates'].append(polygon)
+    return {'type': 'FeatureCollection',
+            'features': [districts[code] for code in sorted(districts) if districts[code]['geometry']['coordinates']]}
+
+def national_view(padding=VIEW_PADDING):
+    """Plotly geo axis ranges framing all districts"""
+    districts = get_geometry_metrics().districts
+    min_lon, max_lon = districts['min_lon'].min(), districts['max_lon'].max()
+    min_lat, max_lat = districts['min_lat'].min(), districts['max_lat'].max()
+    pad_lon, pad_lat = (max_lon - min_lon) * padding, (max_lat - min_lat) * padding
+    return {
+        'fitbounds': False,
+        'lonaxis': {'range': [round(float(min_lon - pad_lon), 3), round(float(max_lon + pad_lon), 3)]},
+        'lataxis': {'range': [round(float(min_lat - pad_lat), 3), round(float(max_lat + pad_lat), 3)]},
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Merge the state GeoJSON files into one simplified national district layer")
+    parser.add_argument('--output', default=None, help="Write the layer as GeoJSON to this file")
+    parser.add_argument('--quantization', type=float, default=None, help="Grid size in degrees")
+    parser.add_argument('--tolerance', type=float, default=None, help="Simplification tolerance in degrees")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    layer = build_national_geojson(args.quantization, args.tolerance)
+    encoded = json.dumps(layer, separators=(',', ':'))
+    print(f"✅ {len(layer['features'])} districts, {len(encoded) / 1024:.0f} KB in {time.perf_counter() - started:.2f}s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+        print(f"✅ Layer written to {args.output}")
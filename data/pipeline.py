@@ -0,0 +1,130 @@
+# ===========================================
+# PERCENTAGE DERIVATION PIPELINE
+# ===========================================
+# Turns a raw district count extract (CSV, Parquet or Excel) into the two
+# tables the dashboard reads: district rows with '_%' columns and state rows
+# with summed counts and '_pct' columns. Input is streamed in chunks; each
+# chunk gets all of its percentage columns from one vectorized divide.
+#
+# Usage:
+#   python -m data.pipeline districts.csv --district-output districtwise.csv --state-output statewise.csv
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from config.settings import PERCENTAGE_RULES, DISTRICT_PERCENTAGE_RULES, PIPELINE_SETTINGS
+from data.aggregation import compile_rules, derive_percentages, aggregate_counts
+
+CSV_EXTENSIONS = ('.csv', '.csv.gz')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+def _extension(path):
+    """Lower-case file extension, keeping '.csv.gz' together"""
+    path = str(path).lower()
+    return '.csv.gz' if path.endswith('.csv.gz') else os.path.splitext(path)[1]
+
+def read_chunks(path, chunksize=None):
+    """Yield the input table in chunks; Excel files are read in one piece"""
+    chunksize = chunksize or PIPELINE_SETTINGS['chunksize']
+    extension = _extension(path)
+
+    if extension in CSV_EXTENSIONS:
+        yield from pd.read_csv(path, chunksize=chunksize)
+    elif extension in PARQUET_EXTENSIONS:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            yield pd.read_parquet(path)
+            return
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif extension in EXCEL_EXTENSIONS:
+        yield pd.read_excel(path)
+    else:
+        raise ValueError(f"Unsupported input format: {path}")
+
+def write_table(frame, path, append=False):
+    """Write a table by extension; only CSV supports appending chunks"""
+    extension = _extension(path)
+    if extension in CSV_EXTENSIONS:
+        frame.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+    elif append:
+        raise ValueError(f"Cannot append to {path}")
+    elif extension in PARQUET_EXTENSIONS:
+        frame.to_parquet(path, index=False)
+    elif extension in EXCEL_EXTENSIONS:
+        frame.to_excel(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {path}")
+
+def add_percentages(frame, rules=None, suffix=None):
+    """Append one percentage column per applicable rule, computed in a single array operation"""
+    rules = DISTRICT_PERCENTAGE_RULES if rules is None else rules
+    suffix = PIPELINE_SETTINGS['district_suffix'] if suffix is None else suffix
+    count_columns, numerators, numerator_index, denominator_index = compile_rules(frame.columns, rules)
+
+    values = frame[count_columns].to_numpy(dtype=float)
+    percentages = pd.DataFrame(derive_percentages(values, numerator_index, denominator_index),
+                               columns=[num + suffix for num in numerators], index=frame.index)
+    return pd.concat([frame.drop(columns=percentages.columns, errors='ignore'), percentages], axis=1)
+
+def run_pipeline(source, district_output=None, state_output=None, chunksize=None):
+    """Stream a raw district extract and write the district and state percentage tables
+
+    Returns (district_rows, state_table).
+    """
+    group_column = PIPELINE_SETTINGS['group_column']
+    stream_district = district_output is not None and _extension(district_output) in CSV_EXTENSIONS
+    started = time.perf_counter()
+
+    district_chunks = []
+    partial_sums = []
+    count_columns = None
+    district_rows = 0
+
+    for index, chunk in enumerate(read_chunks(source, chunksize)):
+        chunk = chunk.loc[:, ~chunk.columns.astype(str).str.startswith('Unnamed')]
+        raw = chunk[[col for col in chunk.columns if not str(col).endswith(('%', '_pct'))]]
+
+        district = add_percentages(raw)
+        district_rows += len(district)
+        if stream_district:
+            write_table(district, district_output, append=index > 0)
+        elif district_output is not None:
+            district_chunks.append(district)
+
+        # Per-chunk state sums are tiny; they are summed again once all chunks are in
+        if count_columns is None:
+            count_columns = [col for col in raw.columns
+                             if col != group_column and pd.api.types.is_numeric_dtype(raw[col])]
+        partial_sums.append(raw.groupby(group_column, sort=False)[count_columns].sum().reset_index())
+
+    if count_columns is None:
+        raise ValueError(f"No rows found in {source}")
+
+    state = aggregate_counts(pd.concat(partial_sums, ignore_index=True), group_column,
+                             rules=PERCENTAGE_RULES, suffix=PIPELINE_SETTINGS['state_suffix'],
+                             sum_columns=count_columns)
+    integer_columns = [col for col in count_columns if np.allclose(state[col], state[col].round())]
+    state[integer_columns] = state[integer_columns].round().astype('int64')
+
+    if district_chunks:
+        write_table(pd.concat(district_chunks, ignore_index=True), district_output)
+    if state_output is not None:
+        write_table(state, state_output)
+
+    print(f"✅ Percentage pipeline: {district_rows} districts, {len(state)} states "
+          f"in {time.perf_counter() - started:.2f}s")
+    return district_rows, state
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Derive district and state percentage tables from raw counts")
+    parser.add_argument('source', help="Raw district counts (.csv, .csv.gz, .parquet or .xlsx)")
+    parser.add_argument('--district-output', help="District table with '_%%' columns")
+    parser.add_argument('--state-output', help="State table with summed counts and '_pct' columns")
+    parser.add_argument('--chunksize', type=int, default=PIPELINE_SETTINGS['chunksize'])
+    args = parser.parse_args()
+    run_pipeline(args.source, args.district_output, args.state_output, args.chunksize)
@@ -0,0 +1,273 @@
+# ===========================================
+# POINT DATASETS AND DISTRICT LOOKUP
+# ===========================================
+# Maps latitude/longitude points (schools, health centres, ...) to the
+# district polygon containing them, in batches of millions.
+#
+# The index is a uniform lookup raster over India: every cell whose centre
+# lies inside a district and which no boundary passes through stores that
+# dt_code, so most points resolve with a single array lookup. Points in
+# boundary cells are ray cast exactly, against only the polygon edges that
+# cross their raster row (edges are indexed by row, CSR style). Both steps
+# are vectorized over all points.
+#
+# Every point file in POINT_SETTINGS['directory'] becomes two district
+# attributes when the district table is loaded: <Layer>_Count and
+# <Layer>_Rate (points per POINT_SETTINGS['rate_per'] people).
+#
+# Usage:
+#   python -m data.points schools.csv [--lat latitude] [--lon longitude]
+
+import argparse
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import POINT_SETTINGS, CSV_TO_GEOJSON_MAPPING
+from data.catalog import POINT_COUNT_SUFFIX, POINT_RATE_SUFFIX
+from data.geometry import pack_rings, next_vertex_index
+from data.loader import load_state_geojson
+from data.pipeline import read_chunks, CSV_EXTENSIONS, PARQUET_EXTENSIONS, EXCEL_EXTENSIONS, _extension
+
+OUTSIDE = -1        # Raster value: no district
+BOUNDARY = -2       # Raster value: a boundary crosses the cell, test exactly
+
+PointIndex = namedtuple('PointIndex', [
+    'signature',        # (GeoJSON file, mtime) pairs the index was built from
+    'origin',           # (lon, lat) of the raster's lower-left corner
+    'cell',             # Raster cell size in degrees
+    'raster',           # (rows x cols) dt_code per cell, OUTSIDE or BOUNDARY
+    'band_indptr',      # CSR row pointers: raster row -> edges crossing it
+    'band_edges',       # Edge ids per raster row
+    'edges',            # (edges x 4) x1, y1, x2, y2
+    'edge_ring',        # Ring id per edge
+    'ring_code',        # Position in `codes` per ring
+    'ring_sign',        # +1 outer ring, -1 hole
+    'codes',            # dt_code per position
+])
+
+_index = None
+_index_lock = threading.Lock()
+
+def _signature():
+    """GeoJSON files the index depends on, with their modification times"""
+    return tuple((path, os.path.getmtime(path)) for path in CSV_TO_GEOJSON_MAPPING.values() if os.path.exists(path))
+
+def _expand(starts, counts):
+    """Concatenated ranges start .. start + count for every (start, count)"""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+def _resolve(owner, ring, size, index):
+    """dt_code per owner (point or cell) from the rings containing it; holes cancel their outer ring"""
+    result = np.full(size, OUTSIDE, dtype=np.int64)
+    if len(owner) == 0:
+        return result
+    key = owner.astype(np.int64) * len(index.codes) + index.ring_code[ring]
+    keys, inverse = np.unique(key, return_inverse=True)
+    coverage = np.bincount(inverse, weights=index.ring_sign[ring])
+    inside = keys[coverage > 0]
+    result[inside // len(index.codes)] = index.codes[inside % len(index.codes)]
+    return result
+
+def _fill_raster(index, shape):
+    """dt_code of every cell centre, by scanline intervals of every ring along each raster row"""
+    lon0, lat0 = index.origin
+    x1, y1, x2, y2 = index.edges.T
+    low, high = np.minimum(y1, y2), np.maximum(y1, y2)
+
+    # Rows whose centre line crosses each edge (half-open, so shared vertices count once)
+    first = np.ceil((low - lat0) / index.cell - 0.5).astype(np.int64)
+    counts = np.maximum(np.ceil((high - lat0) / index.cell - 0.5).astype(np.int64) - first, 0)
+    edge = np.repeat(np.arange(len(x1)), counts)
+    row = _expand(first, counts)
+    y = lat0 + (row + 0.5) * index.cell
+    x = x1[edge] + (y - y1[edge]) * (x2[edge] - x1[edge]) / (y2[edge] - y1[edge])
+    ring = index.edge_ring[edge]
+
+    # Consecutive crossings of a ring on a row bound its interior spans
+    order = np.lexsort((x, row, ring))
+    ring, row, x = ring[order], row[order], x[order]
+    group = ring * shape[0] + row
+    rank = np.arange(len(group)) - np.searchsorted(group, group)
+    span = np.flatnonzero((rank % 2 == 0) & np.r_[group[1:] == group[:-1], False])
+
+    start = np.ceil((x[span] - lon0) / index.cell - 0.5).astype(np.int64)
+    counts = np.maximum(np.ceil((x[span + 1] - lon0) / index.cell - 0.5).astype(np.int64) - start, 0)
+    cells = np.repeat(row[span], counts) * shape[1] + _expand(start, counts)
+    return _resolve(cells, np.repeat(ring[span], counts), shape[0] * shape[1], index).reshape(shape)
+
+def _boundary_cells(index, shape):
+    """Cells any polygon edge passes through, plus their neighbours (covers corner clips)"""
+    lon0, lat0 = index.origin
+    x1, y1, x2, y2 = index.edges.T
+    samples = np.ceil(np.hypot(x2 - x1, y2 - y1) / (index.cell / 2)).astype(np.int64) + 1
+    edge = np.repeat(np.arange(len(x1)), samples)
+    t = (np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)) / np.repeat(np.maximum(samples - 1, 1), samples)
+    rows = np.clip(((y1[edge] + t * (y2 - y1)[edge] - lat0) / index.cell).astype(np.int64), 0, shape[0] - 1)
+    cols = np.clip(((x1[edge] + t * (x2 - x1)[edge] - lon0) / index.cell).astype(np.int64), 0, shape[1] - 1)
+
+    touched = np.zeros(shape, dtype=bool)
+    touched[rows, cols] = True
+    padded = np.pad(touched, 1)
+    marked = np.zeros(shape, dtype=bool)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            marked |= padded[dr:dr + shape[0], dc:dc + shape[1]]
+    return marked
+
+def build_point_index(geojsons=None, cell=None):
+    """Build the lookup raster and row-banded edge index from {state: GeoJSON}"""
+    cell = cell or POINT_SETTINGS['grid_degrees']
+    if geojsons is None:
+        geojsons = {state: load_state_geojson(path) for state, path in CSV_TO_GEOJSON_MAPPING.items()
+                    if os.path.exists(path)}
+    packed = pack_rings(geojsons)
+    following, ring_of_point = next_vertex_index(packed)
+    edges = np.column_stack([packed.points, packed.points[following]])
+    codes, ring_code = np.unique(packed.codes, return_inverse=True)
+
+    lon0 = np.floor(packed.points[:, 0].min() / cell) * cell
+    lat0 = np.floor(packed.points[:, 1].min() / cell) * cell
+    shape = (int(np.ceil((packed.points[:, 1].max() - lat0) / cell)) + 1,
+             int(np.ceil((packed.points[:, 0].max() - lon0) / cell)) + 1)
+
+    # Edges per raster row they span
+    low = np.floor((np.minimum(edges[:, 1], edges[:, 3]) - lat0) / cell).astype(np.int64)
+    high = np.floor((np.maximum(edges[:, 1], edges[:, 3]) - lat0) / cell).astype(np.int64)
+    counts = high - low + 1
+    rows = _expand(low, counts)
+    band_edges = np.repeat(np.arange(len(edges)), counts)[np.argsort(rows, kind='stable')]
+    band_indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=shape[0]))]
+
+    index = PointIndex(None, (lon0, lat0), cell, None, band_indptr, band_edges.astype(np.int32), edges,
+                       ring_of_point, ring_code, np.where(packed.holes, -1.0, 1.0), codes)
+    raster = _fill_raster(index, shape)
+    raster[_boundary_cells(index, shape)] = BOUNDARY
+    return index._replace(raster=raster.astype(np.int16))
+
+def get_point_index():
+    """Point lookup index for the current GeoJSON files (rebuilt when any of them changes)"""
+    global _index
+    signature = _signature()
+    with _index_lock:
+        if _index is None or _index.signature != signature:
+            started = time.perf_counter()
+            _index = build_point_index()._replace(signature=signature)
+            print(f"✅ Point lookup index built: {_index.raster.shape[0]}x{_index.raster.shape[1]} cells, "
+                  f"{(_index.raster == BOUNDARY).mean():.1%} on boundaries in {time.perf_counter() - started:.2f}s")
+        return _index
+
+def _ray_cast(index, lon, lat, rows):
+    """Exact dt_code of points by counting edge crossings of a ray towards +x, per ring"""
+    result = np.full(len(lon), OUTSIDE, dtype=np.int64)
+    counts = index.band_indptr[rows + 1] - index.band_indptr[rows]
+    # Chunks of points whose candidate edges fit in POINT_SETTINGS['chunk_elements'] pairs
+    cumulative = np.cumsum(counts)
+    limits = np.arange(1, cumulative[-1] // POINT_SETTINGS['chunk_elements'] + 1) * POINT_SETTINGS['chunk_elements']
+    bounds = np.unique(np.r_[0, np.searchsorted(cumulative, limits), len(lon)])
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chunk = np.arange(start, stop)
+        owner = np.repeat(chunk - start, counts[chunk])
+        edge = index.band_edges[_expand(index.band_indptr[rows[chunk]], counts[chunk])]
+        x1, y1, x2, y2 = index.edges[edge].T
+        px, py = lon[chunk][owner], lat[chunk][owner]
+        straddles = (y1 <= py) != (y2 <= py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crosses = straddles & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+        owner, ring = owner[crosses], index.edge_ring[edge[crosses]]
+
+        # A point is inside a ring when it crosses that ring an odd number of times
+        pairs, times = np.unique(owner.astype(np.int64) * len(index.ring_code) + ring, return_counts=True)
+        inside = pairs[times % 2 == 1]
+        result[chunk] = _resolve(inside // len(index.ring_code), inside % len(index.ring_code), len(chunk), index)
+    return result
+
+def locate(lat, lon, index=None):
+    """dt_code of the district containing each point (-1 outside every district)"""
+    index = index or get_point_index()
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    lon0, lat0 = index.origin
+    rows = np.floor((lat - lat0) / index.cell)
+    cols = np.floor((lon - lon0) / index.cell)
+    valid = (rows >= 0) & (rows < index.raster.shape[0]) & (cols >= 0) & (cols < index.raster.shape[1])
+
+    codes = np.full(len(lat), OUTSIDE, dtype=np.int64)
+    rows, cols = rows[valid].astype(np.int64), cols[valid].astype(np.int64)
+    codes[valid] = index.raster[rows, cols]
+
+    # Sorted by raster row so each chunk of the exact test shares edge bands
+    boundary = np.flatnonzero(codes == BOUNDARY)
+    if len(boundary):
+        boundary_rows = np.floor((lat[boundary] - lat0) / index.cell).astype(np.int64)
+        order = np.argsort(boundary_rows, kind='stable')
+        boundary, boundary_rows = boundary[order], boundary_rows[order]
+        codes[boundary] = _ray_cast(index, lon[boundary], lat[boundary], boundary_rows)
+    return codes
+
+def count_points(lat, lon, index=None):
+    """Number of points per dt_code (districts without points are omitted)"""
+    codes = locate(lat, lon, index)
+    codes = codes[codes != OUTSIDE]
+    values, counts = np.unique(codes, return_counts=True)
+    return pd.Series(counts, index=values, name='count')
+
+def count_point_file(path, lat_column=None, lon_column=None):
+    """Stream a point file (CSV, Parquet or Excel) and count its points per dt_code"""
+    lat_column = lat_column or POINT_SETTINGS['lat_column']
+    lon_column = lon_column or POINT_SETTINGS['lon_column']
+    total = pd.Series(dtype=np.int64)
+    for chunk in read_chunks(path):
+        counts = count_points(pd.to_numeric(chunk[lat_column], errors='coerce'),
+                              pd.to_numeric(chunk[lon_column], errors='coerce'))
+        total = total.add(counts, fill_value=0)
+    return total.astype(np.int64)
+
+def layer_name(path):
+    """Attribute prefix for a point file, e.g. 'health centres.csv' -> 'Health_Centres'"""
+    stem = os.path.basename(str(path))
+    stem = stem[:-len(_extension(stem))] if _extension(stem) else stem
+    return re.sub(r'\W+', '_', stem).strip('_').title()
+
+def point_files(directory=None):
+    """Supported point files in the point directory, sorted by name"""
+    directory = directory or POINT_SETTINGS['directory']
+    if not os.path.isdir(directory):
+        return []
+    extensions = CSV_EXTENSIONS + PARQUET_EXTENSIONS + EXCEL_EXTENSIONS
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if _extension(name) in extensions]
+
+def point_layer_columns(district_table):
+    """<Layer>_Count and <Layer>_Rate columns for every point file, aligned with a district table"""
+    columns = {}
+    codes = pd.to_numeric(district_table['District code'], errors='coerce')
+    for path in point_files():
+        try:
+            counts = codes.map(count_point_file(path)).fillna(0)
+            name = layer_name(path)
+            columns[name + POINT_COUNT_SUFFIX] = counts
+            if 'Population' in district_table.columns:
+                population = pd.to_numeric(district_table['Population'], errors='coerce')
+                columns[name + POINT_RATE_SUFFIX] = (counts / population.where(population > 0)
+                                                     * POINT_SETTINGS['rate_per'])
+            print(f"✅ Point layer {name}: {int(counts.sum())} points in {int((counts > 0).sum())} districts")
+        except Exception as e:
+            print(f"⚠️ Could not load point file {path}: {e}")
+    return pd.DataFrame(columns, index=district_table.index)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Count the points of a file per district")
+    parser.add_argument('source', help="Point file (CSV, Parquet or Excel)")
+    parser.add_argument('--lat', default=None, help="Latitude column (default: POINT_SETTINGS['lat_column'])")
+    parser.add_argument('--lon', default=None, help="Longitude column (default: POINT_SETTINGS['lon_column'])")
+    args = parser.parse_args()
+    get_point_index()
+    started = time.perf_counter()
+    result = count_point_file(args.source, args.lat, args.lon)
+    print(result.sort_values(ascending=False).to_string())
+    print(f"✅ {int(result.sum())} points in {len(result)} districts in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,161 @@
+# ===========================================
+# RANK AND PERCENTILE MATRICES
+# ===========================================
+# Ranks every entity (state or district) on every attribute once per dataset
+# version, nationally and within its state. Afterwards "where does this
+# district stand" is an array lookup and top-k/bottom-k is a slice of a
+# precomputed sort order, instead of a sort per request.
+#
+# Rank 1 is the highest value; ties share the best rank. Percentile is the
+# share of other entities with a lower value (top = 100, bottom = 0). Missing
+# values have rank 0 and a NaN percentile.
+
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from data.loader import get_data_store, get_shared_matrix
+
+RankMatrix = namedtuple('RankMatrix', [
+    'version',              # Dataset version the ranks were built from
+    'entities',             # Row label (state name / district code) per row position
+    'positions',            # Row label -> row position
+    'columns',              # Attribute column -> column position
+    'values',               # (entities x attributes) attribute values
+    'rank',                 # National rank per entity and attribute
+    'percentile',           # National percentile per entity and attribute
+    'order',                # (attributes x entities) row positions, highest value first, NaN last
+    'valid_counts',         # Non-NaN entities per attribute
+    'groups',               # Group (state) name per row position, or None
+    'group_rank',           # Rank within the entity's group
+    'group_percentile',     # Percentile within the entity's group
+    'group_count',          # Non-NaN entities in the entity's group per attribute
+    'group_order',          # (attributes x entities) row positions by group, highest value first within each
+    'group_slices',         # Group name -> (start, stop) into group_order
+])
+
+RankInfo = namedtuple('RankInfo', ['value', 'rank', 'percentile', 'count',
+                                   'group_rank', 'group_percentile', 'group_count'])
+
+_rank_matrices = {}
+_rank_lock = threading.Lock()
+
+def _ranks(frame):
+    """Competition ranks (1 = highest) and percentiles for each column of a frame"""
+    rank = frame.rank(method='min', ascending=False)
+    # Entities strictly below = valid count - entities at or above the value
+    at_or_above = frame.rank(method='max', ascending=False)
+    counts = frame.notna().sum()
+    percentile = (counts - at_or_above) / (counts - 1).clip(lower=1) * 100
+    return rank.fillna(0).to_numpy(dtype=np.int32), percentile.to_numpy(dtype=np.float32)
+
+def _ranks_by_group(grouped):
+    """Within-group competition ranks, percentiles and valid counts"""
+    rank = grouped.rank(method='min', ascending=False)
+    at_or_above = grouped.rank(method='max', ascending=False)
+    counts = grouped.transform('count')
+    percentile = (counts - at_or_above) / (counts - 1).clip(lower=1) * 100
+    return (rank.fillna(0).to_numpy(dtype=np.int32), percentile.to_numpy(dtype=np.float32),
+            counts.to_numpy(dtype=np.int32))
+
+def _descending_order(values):
+    """Row positions per attribute, highest value first and NaN last"""
+    keys = np.where(np.isnan(values), np.inf, -values)
+    return np.argsort(keys, axis=0, kind='stable').T
+
+def build_rank_matrix(values, entities, columns, groups=None):
+    """Rank and percentile matrices for an entities x attributes array"""
+    values = np.asarray(values, dtype=np.float32)
+    frame = pd.DataFrame(values, columns=list(columns))
+    rank, percentile = _ranks(frame)
+
+    group_rank = group_percentile = group_count = group_order = None
+    group_slices = {}
+    if groups is not None:
+        groups = np.asarray(groups, dtype=object)
+        grouped = frame.groupby(groups, sort=False)
+        group_rank, group_percentile, group_count = _ranks_by_group(grouped)
+
+        # Sort by group first, then by descending value inside the group
+        codes, names = pd.factorize(groups)
+        keys = np.where(np.isnan(values), np.inf, -values)
+        group_order = np.stack([np.lexsort((keys[:, i], codes)) for i in range(values.shape[1])])
+        sorted_codes = codes[group_order[0]] if len(codes) else codes
+        for code, name in enumerate(names):
+            start, stop = np.searchsorted(sorted_codes, [code, code + 1])
+            group_slices[name] = (int(start), int(stop))
+
+    entities = tuple(entities)
+    return RankMatrix(
+        version=None,
+        entities=entities,
+        positions={entity: i for i, entity in enumerate(entities)},
+        columns={column: i for i, column in enumerate(columns)},
+        values=values,
+        rank=rank,
+        percentile=percentile,
+        order=_descending_order(values),
+        valid_counts=(~np.isnan(values)).sum(axis=0),
+        groups=groups,
+        group_rank=group_rank,
+        group_percentile=group_percentile,
+        group_count=group_count,
+        group_order=group_order,
+        group_slices=group_slices,
+    )
+
+def get_rank_matrix(name='district'):
+    """Rank matrix for the 'district' or 'state' table of the current dataset version"""
+    store = get_data_store()
+    with _rank_lock:
+        cached = _rank_matrices.get(name)
+        if cached is not None and cached.version == store.version:
+            return cached
+
+        matrix = get_shared_matrix(name)
+        if matrix is None:
+            return None
+        groups = None
+        if name == 'district':
+            groups = store.district_data['State name'].astype(str).to_numpy()
+        ranks = build_rank_matrix(matrix.values, matrix.rows, matrix.columns, groups)._replace(version=store.version)
+        _rank_matrices[name] = ranks
+        return ranks
+
+def rank_of(ranks, entity, column):
+    """Where an entity stands on one attribute, nationally and within its group (O(1))"""
+    row, col = ranks.positions[entity], ranks.columns[column]
+    group_rank = group_percentile = group_count = None
+    if ranks.groups is not None:
+        group_rank = int(ranks.group_rank[row, col])
+        group_percentile = float(ranks.group_percentile[row, col])
+        group_count = int(ranks.group_count[row, col])
+    return RankInfo(float(ranks.values[row, col]), int(ranks.rank[row, col]), float(ranks.percentile[row, col]),
+                    int(ranks.valid_counts[col]), group_rank, group_percentile, group_count)
+
+def top_k(ranks, column, k=10, group=None, bottom=False):
+    """Row positions of the k highest (or lowest) entities on an attribute, optionally within a group"""
+    col = ranks.columns[column]
+    if group is None:
+        valid = ranks.order[col, :ranks.valid_counts[col]]
+    else:
+        start, stop = ranks.group_slices.get(group, (0, 0))
+        if start == stop:
+            return ranks.group_order[col, :0]
+        # Missing values sort last within each group
+        valid = ranks.group_order[col, start:start + ranks.group_count[ranks.group_order[col, start], col]]
+    return valid[::-1][:k] if bottom else valid[:k]
+
+def entity_profile(ranks, entity):
+    """Value, ranks and percentiles of one entity on every attribute"""
+    row = ranks.positions[entity]
+    profile = pd.DataFrame({
+        'value': ranks.values[row],
+        'rank': ranks.rank[row],
+        'percentile': ranks.percentile[row],
+        'count': ranks.valid_counts,
+    }, index=list(ranks.columns))
+    if ranks.groups is not None:
+        profile['group_rank'] = ranks.group_rank[row]
+        profile['group_percentile'] = ranks.group_percentile[row]
+    return profile
@@ -0,0 +1,75 @@
+# ===========================================
+# SHARED ATTRIBUTE MATRICES
+# ===========================================
+# Numeric attribute matrices (district x attribute, state x attribute and the
+# state correlation matrix) are written once to content-addressed .npy files
+# and memory-mapped read-only by every worker process. The OS page cache
+# holds a single copy, so extra WSGI workers add almost no memory for data;
+# each worker only keeps its small row/column label views.
+
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import SHARED_MATRIX_SETTINGS
+
+SharedMatrix = namedtuple('SharedMatrix', ['name', 'values', 'rows', 'columns', 'path'])
+
+def shared_directory():
+    """Directory holding the memory-mapped matrices (created on first use)"""
+    directory = SHARED_MATRIX_SETTINGS['directory'] or os.path.join(tempfile.gettempdir(), 'indiadatahub_shared')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def _content_digest(values, rows, columns):
+    """Hash of the matrix bytes and labels, so identical data maps to the same file in every worker"""
+    digest = hashlib.sha1(values.tobytes())
+    digest.update(repr((values.shape, values.dtype.str, list(rows), list(columns))).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _remove_stale(name, keep):
+    """Delete older versions of a matrix (mapped views in other processes stay valid on POSIX)"""
+    directory = shared_directory()
+    for filename in os.listdir(directory):
+        if filename.startswith(f"{name}-") and filename.endswith('.npy') and filename != keep:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+def share_matrix(name, values, rows, columns):
+    """Publish a 2-D matrix as a read-only memory map shared by all processes"""
+    values = np.ascontiguousarray(values, dtype=np.dtype(SHARED_MATRIX_SETTINGS['dtype']))
+    rows, columns = tuple(rows), tuple(columns)
+    if not SHARED_MATRIX_SETTINGS['enabled']:
+        return SharedMatrix(name, values, rows, columns, None)
+
+    try:
+        filename = f"{name}-{_content_digest(values, rows, columns)}.npy"
+        path = os.path.join(shared_directory(), filename)
+        if not os.path.exists(path):
+            # Write under a per-process name and rename, so readers never see a partial file
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as f:
+                np.save(f, values)
+            os.replace(temporary, path)
+            _remove_stale(name, filename)
+        return SharedMatrix(name, np.load(path, mmap_mode='r'), rows, columns, path)
+    except OSError as e:
+        print(f"⚠️ Could not share {name} matrix, keeping a private copy: {e}")
+        return SharedMatrix(name, values, rows, columns, None)
+
+def share_table_columns(frame, columns, name, row_column=None):
+    """Back a table's attribute columns with a shared matrix; returns (table, matrix)"""
+    rows = frame[row_column] if row_column else frame.index
+    matrix = share_matrix(name, frame[columns].to_numpy(), rows, columns)
+    shared = pd.DataFrame(matrix.values, columns=list(columns), index=frame.index, copy=False)
+    return pd.concat([frame.drop(columns=list(columns)), shared], axis=1), matrix
+
+def matrix_lookup(matrix, rows=None, columns=None):
+    """Small per-request slice of a shared matrix by row/column labels"""
+    row_index = [matrix.rows.index(row) for row in rows] if rows is not None else slice(None)
+    column_index = [matrix.columns.index(col) for col in columns] if columns is not None else slice(None)
+    return np.asarray(matrix.values[row_index][:, column_index])
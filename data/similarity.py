@@ -0,0 +1,140 @@
+# ===========================================
+# DISTRICT SIMILARITY SEARCH
+# ===========================================
+# "Find districts like this one": k-nearest neighbours over the z-scored
+# district x attribute matrix. Attribute weights come from a chosen subset
+# of attributes and/or per-category weights; weighting is folded into the
+# matrix once, so every metric runs on plain vectors. For each (metric,
+# weighting) the neighbours of every district are computed in one exact,
+# blocked NumPy pass and kept, so a query is a row lookup.
+
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from config.settings import SIMILARITY_SETTINGS
+from data.catalog import get_catalog
+from data.loader import get_data_store, get_shared_matrix
+
+SIMILARITY_METRICS = ('euclidean', 'manhattan', 'cosine')
+
+NeighbourIndex = namedtuple('NeighbourIndex', [
+    'version',          # Dataset version the index was built from
+    'rows',             # Row label (district code) per row position
+    'positions',        # Row label -> row position
+    'metric',           # Distance metric
+    'weights',          # Weight per attribute column
+    'neighbours',       # (rows x k) row positions of the nearest rows, nearest first
+    'distances',        # (rows x k) distances to those rows
+])
+
+_indexes = OrderedDict()
+_index_lock = threading.Lock()
+
+def zscore(values):
+    """Standardize each column to mean 0 and unit variance; missing values become the mean (0)"""
+    values = np.asarray(values, dtype=np.float32)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1
+    return np.nan_to_num((values - mean) / std, nan=0.0).astype(np.float32)
+
+def attribute_weights(columns, attributes=None, category_weights=None):
+    """Weight per column from an attribute subset and/or {district category: weight}
+
+    With category weights each category's weight is spread over its columns,
+    so large categories do not outweigh small ones.
+    """
+    columns = list(columns)
+    weights = np.ones(len(columns), dtype=np.float32)
+    if category_weights:
+        weights[:] = 0
+        position = {column: i for i, column in enumerate(columns)}
+        for category, weight in category_weights.items():
+            members = [position[col] for col in get_catalog().district_categories.get(category, ()) if col in position]
+            if members:
+                weights[members] = weight / len(members)
+    if attributes:
+        weights[~np.isin(columns, list(attributes))] = 0
+    return weights
+
+def _weighted(standardized, weights, metric):
+    """Fold attribute weights into the matrix so the plain metric gives the weighted distance"""
+    if metric == 'manhattan':
+        return standardized * weights
+    weighted = standardized * np.sqrt(weights)
+    if metric == 'cosine':
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        weighted = weighted / np.where(norms > 0, norms, 1)
+    return weighted
+
+def _block_distances(block, matrix, metric):
+    """Distances from each row of a block to every row of the matrix"""
+    if metric == 'euclidean':
+        squared = (block ** 2).sum(axis=1)[:, None] + (matrix ** 2).sum(axis=1)[None, :] - 2 * block @ matrix.T
+        return np.sqrt(np.maximum(squared, 0))
+    if metric == 'cosine':
+        return 1 - block @ matrix.T
+    if metric == 'manhattan':
+        # One attribute at a time keeps the temporary at block x rows
+        distances = np.zeros((len(block), len(matrix)), dtype=np.float32)
+        for column in range(matrix.shape[1]):
+            distances += np.abs(block[:, column, None] - matrix[None, :, column])
+        return distances
+    raise ValueError(f"Unsupported similarity metric: {metric}")
+
+def nearest_neighbours(matrix, metric, k):
+    """Exact k nearest rows (excluding the row itself) for every row, in row blocks"""
+    n = len(matrix)
+    k = min(k, n - 1)
+    block_size = max(1, SIMILARITY_SETTINGS['block_elements'] // max(n, 1))
+
+    neighbours = np.empty((n, k), dtype=np.int32)
+    distances = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = _block_distances(matrix[start:stop], matrix, metric)
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k < n else np.argsort(block, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind='stable')
+        neighbours[start:stop] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:stop] = np.take_along_axis(nearest_distances, order, axis=1)
+    return neighbours, distances
+
+def get_neighbour_index(metric=None, attributes=None, category_weights=None, name='district'):
+    """Neighbour index for the current dataset version and weighting (built once, then cached)"""
+    metric = metric or SIMILARITY_SETTINGS['metric']
+    if metric not in SIMILARITY_METRICS:
+        raise ValueError(f"Unsupported similarity metric: {metric}")
+    store = get_data_store()
+    key = (name, store.version, metric,
+           tuple(sorted(attributes or ())), tuple(sorted((category_weights or {}).items())))
+
+    with _index_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+
+        matrix = get_shared_matrix(name)
+        if matrix is None:
+            return None
+        weights = attribute_weights(matrix.columns, attributes, category_weights)
+        # Attributes with zero weight do not affect any distance
+        weighted = _weighted(zscore(matrix.values)[:, weights > 0], weights[weights > 0], metric)
+        neighbours, distances = nearest_neighbours(weighted, metric, SIMILARITY_SETTINGS['neighbours'])
+
+        index = NeighbourIndex(store.version, matrix.rows, {row: i for i, row in enumerate(matrix.rows)},
+                               metric, weights, neighbours, distances)
+        _indexes[key] = index
+        # Indexes of older dataset versions are never asked for again
+        for stale in [old for old in _indexes if old[1] != store.version]:
+            del _indexes[stale]
+        while len(_indexes) > SIMILARITY_SETTINGS['cache_size']:
+            _indexes.popitem(last=False)
+        return index
+
+def find_similar(row, k=10, metric=None, attributes=None, category_weights=None, name='district'):
+    """The k most similar rows to a district code: (row positions, distances), nearest first"""
+    index = get_neighbour_index(metric, attributes, category_weights, name)
+    position = index.positions[row]
+    return index.neighbours[position, :k], index.distances[position, :k]
@@ -0,0 +1,162 @@
+# ===========================================
+# SPATIAL AUTOCORRELATION AND HOTSPOTS
+# ===========================================
+# Global Moran's I and local Moran's I (LISA) for any district attribute,
+# using row-standardized contiguity weights from the district adjacency
+# graph. Significance comes from permutation tests that are vectorized over
+# all permutations at once and split across worker threads (NumPy releases
+# the GIL). Results are cached per (dataset version, attribute).
+#
+# LISA classes: High-High (hotspot), Low-Low (coldspot), High-Low and
+# Low-High (spatial outliers); everything else is not significant.
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config.settings import SPATIAL_STATS_SETTINGS
+from data.adjacency import get_adjacency
+from data.loader import get_data_store, get_shared_matrix
+
+LISA_CLASSES = ('Not significant', 'High-High', 'Low-Low', 'High-Low', 'Low-High')
+
+SpatialWeights = namedtuple('SpatialWeights', ['codes', 'indptr', 'indices', 'cardinality'])
+
+MoranResult = namedtuple('MoranResult', [
+    'attribute',        # District column analysed
+    'codes',            # dt_code per analysed district (districts with a value)
+    'moran_i',          # Global Moran's I
+    'expected_i',       # E[I] under no autocorrelation, -1 / (n - 1)
+    'p_value',          # Pseudo p-value of the global statistic
+    'local_i',          # Local Moran's I per district
+    'local_p',          # Pseudo p-value per district
+    'classes',          # LISA class index (into LISA_CLASSES) per district
+    'permutations',
+])
+
+_results = {}
+_results_lock = threading.Lock()
+
+def spatial_weights(codes, adjacency=None):
+    """Contiguity weights restricted to the given dt_codes, in their order"""
+    adjacency = adjacency or get_adjacency()
+    codes = np.asarray(codes, dtype=np.int64)
+    remap = np.full(len(adjacency.codes), -1, dtype=np.int64)
+    present = np.isin(codes, adjacency.codes)
+    remap[np.searchsorted(adjacency.codes, codes[present])] = np.flatnonzero(present)
+
+    # Expand the CSR rows, keep edges whose ends are both analysed, and re-pack in the new order
+    degree = np.diff(adjacency.indptr)
+    rows = remap[np.repeat(np.arange(len(adjacency.codes)), degree)]
+    cols = remap[adjacency.indices]
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[keep], cols[keep]
+    order = np.lexsort((cols, rows))
+    cardinality = np.bincount(rows, minlength=len(codes))
+    indptr = np.r_[0, np.cumsum(cardinality)]
+    return SpatialWeights(codes, indptr, cols[order], cardinality)
+
+def spatial_lag(weights, values):
+    """Mean of the neighbours' values per district (row-standardized W @ values); 0 without neighbours"""
+    values = np.asarray(values)
+    sums = np.zeros((len(weights.codes),) + values.shape[1:], dtype=float)
+    # CSR rows are contiguous, so one reduceat over the rows that have neighbours sums them all
+    connected = weights.cardinality > 0
+    if connected.any():
+        sums[connected] = np.add.reduceat(values[weights.indices], weights.indptr[:-1][connected], axis=0)
+    divisor = np.maximum(weights.cardinality, 1).reshape((-1,) + (1,) * (values.ndim - 1))
+    return sums / divisor
+
+def _global_i(weights, z):
+    """Moran's I of standardized values; z may hold one column per permutation"""
+    connected = weights.cardinality > 0
+    lag = spatial_lag(weights, z)
+    n, s0 = len(z), connected.sum()
+    return n / s0 * (z * lag).sum(axis=0) / (z ** 2).sum(axis=0)
+
+def _parallel(function, total, *args):
+    """Run function(count, seed, *args) over chunks of `total` permutations on worker threads"""
+    workers = SPATIAL_STATS_SETTINGS['workers'] or os.cpu_count() or 1
+    chunks = [len(chunk) for chunk in np.array_split(np.arange(total), workers) if len(chunk)]
+    seeds = np.random.SeedSequence(SPATIAL_STATS_SETTINGS['seed']).spawn(len(chunks))
+    if len(chunks) == 1:
+        return [function(chunks[0], seeds[0], *args)]
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        return list(pool.map(lambda job: function(job[0], job[1], *args), zip(chunks, seeds)))
+
+def _global_permutations(count, seed, weights, z):
+    """Moran's I of `count` random relabellings of z"""
+    rng = np.random.default_rng(seed)
+    shuffled = z[np.argsort(rng.random((len(z), count)), axis=0)]
+    return _global_i(weights, shuffled)
+
+def _local_permutations(count, seed, weights, z):
+    """Conditional permutation counts: how often a random neighbourhood is at least as extreme
+
+    One random draw of neighbour ids per permutation is shared by every
+    district (ids >= i are shifted past i, so a district never neighbours
+    itself); districts are processed in groups of equal cardinality.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(z)
+    max_k = int(weights.cardinality.max())
+    random_ids = np.argsort(rng.random((count, n - 1)), axis=1)[:, :max_k]
+
+    lag = spatial_lag(weights, z)
+    observed = z * lag
+    larger = np.zeros(n, dtype=np.int64)
+    for k in np.unique(weights.cardinality[weights.cardinality > 0]):
+        districts = np.flatnonzero(weights.cardinality == k)
+        ids = random_ids[None, :, :k]
+        ids = ids + (ids >= districts[:, None, None])
+        permuted = z[districts, None] * z[ids].mean(axis=2)
+        extreme = np.where(observed[districts, None] >= 0,
+                           permuted >= observed[districts, None], permuted <= observed[districts, None])
+        larger[districts] = extreme.sum(axis=1)
+    return larger
+
+def morans_i(values, codes, attribute=None, permutations=None):
+    """Global and local Moran's I with permutation p-values for district values keyed by dt_code"""
+    permutations = permutations or SPATIAL_STATS_SETTINGS['permutations']
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    values, codes = values[valid], np.asarray(codes)[valid]
+
+    weights = spatial_weights(codes)
+    z = (values - values.mean()) / (values.std() or 1)
+    moran = _global_i(weights, z)
+
+    simulated = np.concatenate(_parallel(_global_permutations, permutations, weights, z))
+    extreme = (simulated >= moran).sum() if moran >= simulated.mean() else (simulated <= moran).sum()
+    p_value = (extreme + 1) / (permutations + 1)
+
+    lag = spatial_lag(weights, z)
+    local_i = z * lag
+    local_extreme = np.sum(_parallel(_local_permutations, permutations, weights, z), axis=0)
+    local_p = np.where(weights.cardinality > 0, (local_extreme + 1) / (permutations + 1), 1.0)
+
+    significant = local_p <= SPATIAL_STATS_SETTINGS['significance']
+    classes = np.select(
+        [significant & (z > 0) & (lag > 0), significant & (z < 0) & (lag < 0),
+         significant & (z > 0) & (lag < 0), significant & (z < 0) & (lag > 0)],
+        [1, 2, 3, 4], 0)
+    return MoranResult(attribute, codes, float(moran), -1 / (len(z) - 1), float(p_value),
+                       local_i, local_p, classes, permutations)
+
+def district_hotspots(attribute):
+    """Cached Moran's I / LISA result for a district attribute of the current dataset"""
+    version = get_data_store().version
+    key = (version, attribute)
+    with _results_lock:
+        if key in _results:
+            return _results[key]
+
+    matrix = get_shared_matrix('district')
+    values = np.asarray(matrix.values[:, matrix.columns.index(attribute)])
+    result = morans_i(values, matrix.rows, attribute)
+    with _results_lock:
+        for stale in [old for old in _results if old[0] != version]:
+            del _results[stale]
+        _results[key] = result
+    return result
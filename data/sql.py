@@ -0,0 +1,270 @@
+# ===========================================
+# EMBEDDED SQL ENGINE
+# ===========================================
+# Registers the current DataStore tables with an in-process SQL engine so
+# callbacks and ad-hoc analysis can express filters, top-k and group-bys as
+# SQL instead of hand-written pandas. DuckDB is used when installed (tables
+# are registered as zero-copy views over the DataFrames and queries run
+# vectorized). Otherwise SQLite is used, which costs a full copy of every
+# table a query touches per dataset version, and every result is converted
+# back into a DataFrame, so callbacks that only need a plain row slice of a
+# DataStore table should filter the frame directly instead.
+# Placeholders are '?' in both engines.
+#
+# Tables are built lazily, the first time a query names them, so a reload
+# never copies (or, for district_geometry, reads the state GeoJSONs for) a
+# table nobody queries. With SQLite each table lives in its own shared-cache
+# in-memory database that the thread connections ATTACH.
+#
+# Each thread queries through its own connection (a DuckDB cursor, or a
+# SQLite connection with the tables attached), so queries from concurrent
+# callbacks run in parallel; the lock only guards building tables and the
+# result cache. Statements are compiled once per thread connection by the
+# engine's statement cache.
+#
+# Tables: states, districts, subdistricts, state_aggregates, district_geometry,
+#         district_metrics, state_metrics
+#
+# Usage:
+#   python -m data.sql "SELECT \"State name\", COUNT(*) FROM districts GROUP BY 1"
+
+import argparse
+import itertools
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import SQL_SETTINGS, CSV_TO_GEOJSON_MAPPING
+from data.geometry import get_geometry_metrics
+from data.loader import get_data_store, load_state_geojson
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+Database = namedtuple('Database', [
+    'version',      # Dataset version the tables are built from
+    'engine',       # 'duckdb' or 'sqlite'
+    'store',        # DataStore snapshot of that version
+    'names',        # Names of the tables that can be queried
+    'tables',       # Table name -> Table, filled in as queries need them (None if the build failed)
+    'keeper',       # DuckDB connection the thread cursors come from (None for SQLite)
+])
+
+Table = namedtuple('Table', [
+    'frame',        # DataFrame registered with DuckDB (None for SQLite)
+    'uri',          # SQLite shared-cache URI of the table's own database (None for DuckDB)
+    'keeper',       # SQLite connection keeping that database alive
+])
+
+_lock = threading.RLock()
+_database = None
+_builds = itertools.count()
+_local = threading.local()
+_result_cache = OrderedDict()
+_statements = {}
+_table_builders = {}
+
+def engine_name():
+    """SQL engine in use: 'duckdb' when available (or requested), otherwise 'sqlite'"""
+    engine = SQL_SETTINGS['engine']
+    if engine == 'duckdb' and duckdb is None:
+        raise ImportError("SQL_SETTINGS['engine'] is 'duckdb' but duckdb is not installed")
+    if engine == 'sqlite' or duckdb is None:
+        return 'sqlite'
+    return 'duckdb'
+
+def quote_identifier(name):
+    """Quote a column or table name for SQL (census columns contain spaces and '%')"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def register_table(name, builder):
+    """Add a derived table; builder(store) returns a DataFrame and is re-run for each dataset version"""
+    with _lock:
+        _table_builders[name] = builder
+        _reset()
+
+def _feature_bounds(geometry):
+    """(min_lon, min_lat, max_lon, max_lat) of a GeoJSON geometry"""
+    coordinates = []
+    stack = [geometry.get('coordinates', [])]
+    while stack:
+        item = stack.pop()
+        if item and isinstance(item[0], (int, float)):
+            coordinates.append(item[:2])
+        else:
+            stack.extend(item)
+    if not coordinates:
+        return (np.nan, np.nan, np.nan, np.nan)
+    points = np.asarray(coordinates, dtype=float)
+    return (*points.min(axis=0), *points.max(axis=0))
+
+def district_geometry_table(store):
+    """One row per district polygon in the state GeoJSON files, with its bounding box"""
+    rows = []
+    for state, geojson_file in CSV_TO_GEOJSON_MAPPING.items():
+        if not os.path.exists(geojson_file):
+            continue
+        for feature in load_state_geojson(geojson_file).get('features', []):
+            properties = feature.get('properties', {})
+            rows.append((pd.to_numeric(properties.get('dt_code'), errors='coerce'), properties.get('district'),
+                         state, properties.get('st_nm'), geojson_file,
+                         *_feature_bounds(feature.get('geometry') or {})))
+    return pd.DataFrame(rows, columns=['dt_code', 'district', 'State name', 'st_nm', 'geojson_file',
+                                       'min_lon', 'min_lat', 'max_lon', 'max_lat'])
+
+def _store_frames(store):
+    """DataStore tables to expose, by table name"""
+    return {name: frame for name, frame in {
+        'states': store.state_data,
+        'districts': store.district_data,
+        'subdistricts': store.subdistrict_data,
+        'state_aggregates': store.state_aggregates,
+    }.items() if frame is not None}
+
+def _sqlite_frame(frame):
+    """SQLite has no categorical type; store category columns as plain values"""
+    categorical = [col for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return frame
+    return frame.assign(**{col: frame[col].astype(object) for col in categorical})
+
+def _reset():
+    """Drop the database and cached results (rebuilt on the next query)"""
+    global _database
+    # Not closed here: threads may still be querying it. It is released once
+    # every thread has moved on to the next database.
+    _database = None
+    _result_cache.clear()
+
+register_table('district_geometry', district_geometry_table)
+register_table('district_metrics', lambda store: get_geometry_metrics().districts)
+register_table('state_metrics', lambda store: get_geometry_metrics().states)
+
+def _bind():
+    """Database of the current DataStore snapshot, replaced when the dataset version changes"""
+    global _database
+    store = get_data_store()
+    if _database is not None and _database.version == store.version:
+        return _database
+
+    _reset()
+    engine = engine_name()
+    _database = Database(store.version, engine, store, (*_store_frames(store), *_table_builders), {},
+                         duckdb.connect(':memory:') if engine == 'duckdb' else None)
+    return _database
+
+def _build_table(database, name):
+    """Materialize one table of a database for its engine (None if it cannot be built)"""
+    try:
+        frames = _store_frames(database.store)
+        frame = frames[name] if name in frames else _table_builders[name](database.store)
+    except Exception as e:
+        print(f"⚠️ Could not build SQL table {name}: {e}")
+        return None
+    if database.engine == 'duckdb':
+        return Table(frame, None, None)
+    # A fresh name per build, as threads may still hold the previous version's tables open
+    uri = f"file:census_{os.getpid()}_{next(_builds)}_{name}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    _sqlite_frame(frame).to_sql(name, keeper, index=False)
+    return Table(None, uri, keeper)
+
+def _referenced_tables(database, sql):
+    """Tables of a database named in a query"""
+    return [name for name in database.names if re.search(rf'(?<!\w){re.escape(name)}(?!\w)', sql)]
+
+def _thread_connection(database, names):
+    """This thread's connection to a database, with the given tables available"""
+    current = getattr(_local, 'connection', None)
+    if current is None or current[0] is not database:
+        if current is not None:
+            current[1].close()
+        if database.engine == 'duckdb':
+            connection = database.keeper.cursor()
+        else:
+            connection = sqlite3.connect(':memory:', uri=True)
+        current = _local.connection = (database, connection, set())
+    _, connection, attached = current
+    for name in names:
+        table = database.tables.get(name)
+        if table is None or name in attached:
+            continue
+        if database.engine == 'duckdb':
+            connection.register(name, table.frame)
+        else:
+            connection.execute('ATTACH DATABASE ? AS ' + quote_identifier(f"table_{name}"), (table.uri,))
+        attached.add(name)
+    return connection
+
+def list_tables():
+    """Names of the tables that can be queried for the current dataset version"""
+    with _lock:
+        return _bind().names
+
+def query(sql, params=()):
+    """Run a SQL query against the current tables and return a DataFrame
+
+    Results are cached per (dataset version, sql, params) and shared between
+    callers, so treat the returned frame as read-only.
+    """
+    params = tuple(params)
+    with _lock:
+        database = _bind()
+        key = (database.version, sql, params)
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key]
+        names = _referenced_tables(database, sql)
+        for name in names:
+            if name not in database.tables:
+                database.tables[name] = _build_table(database, name)
+
+    connection = _thread_connection(database, names)
+    if database.engine == 'duckdb':
+        result = connection.execute(sql, params).df()
+    else:
+        result = pd.read_sql_query(sql, connection, params=params)
+
+    with _lock:
+        _result_cache[key] = result
+        if len(_result_cache) > SQL_SETTINGS['cache_size']:
+            _result_cache.popitem(last=False)
+        return result
+
+def prepare(name, sql):
+    """Register a named parameterized statement for execute() (compiled on first use per thread connection)"""
+    _statements[name] = sql
+    return name
+
+def execute(name, *params):
+    """Run a statement registered with prepare() with the given parameters"""
+    if name not in _statements:
+        raise KeyError(f"Unknown SQL statement: {name}")
+    return query(_statements[name], params)
+
+def clear_cache():
+    """Forget cached query results"""
+    with _lock:
+        _result_cache.clear()
+
+def _cli_value(value):
+    """Command-line parameter as a number when it looks like one"""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+if __name__ == '__main__':
+    from data.loader import load_all_data
+    parser = argparse.ArgumentParser(description="Run an ad-hoc SQL query over the census tables")
+    parser.add_argument('sql', help="Query, e.g. 'SELECT * FROM districts LIMIT 5'")
+    parser.add_argument('params', nargs='*', help="Values for '?' placeholders")
+    args = parser.parse_args()
+    load_all_data()
+    print(f"🔎 {engine_name()} tables: {', '.join(list_tables())}")
+    print(query(args.sql, [_cli_value(value) for value in args.params]).to_string())
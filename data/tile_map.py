@@ -0,0 +1,178 @@
+# ===========================================
+# TILE MAP LAYOUT
+# ===========================================
+# Lays out states and districts as equal-sized hexagons for the tile map
+# mode of the maps. Every state or district gets one cell of a pointy-top
+# hexagon grid whose spacing makes the tiles cover about the same area as
+# the real polygons (data/geometry.py), and is assigned so that the total
+# squared displacement from the polygon centroids is small:
+#   - optimally with SciPy (linear_sum_assignment) when it is installed,
+#   - otherwise cheapest pairs first, then improved by moving to free
+#     cells and swapping with neighbours while the total cost drops.
+#
+# The layout is computed once per dataset version and is a tiny lookup, one
+# (col, row) per entity: states nationally, districts nationally and the
+# districts of each state on their own grid.
+#
+# Usage:
+#   python -m data.tile_map [--output tile_layout.json]
+
+import argparse
+import json
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config.settings import TILE_MAP_SETTINGS
+from data.loader import get_data_store
+from data.geometry import get_geometry_metrics
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+SQRT3 = np.sqrt(3)
+KM_PER_DEGREE = 111.32      # Length of a degree of latitude
+
+TileLayout = namedtuple('TileLayout', [
+    'version',          # Dataset version the layout was computed for
+    'states',           # State name, label, col, row, x, y
+    'districts',        # dt_code, State name, col, row, x, y on the national grid
+    'state_districts',  # Same columns, each state's districts on their own grid
+])
+
+_layout = None
+_layout_lock = threading.Lock()
+
+def hex_center(cols, rows):
+    """Plot coordinates of hexagon cells (odd rows shifted right by half a cell)"""
+    return cols + 0.5 * (rows % 2), rows * SQRT3 / 2
+
+def _greedy_assignment(cost):
+    """Column per row of a cost matrix, each column used once: cheapest pairs first, then local moves and swaps"""
+    points, cells = cost.shape
+    k = min(TILE_MAP_SETTINGS['candidates'], cells)
+    candidates = np.argsort(cost, axis=1)[:, :k]
+    cell = np.full(points, -1)
+    owner = np.full(cells, -1)
+    for flat in np.argsort(np.take_along_axis(cost, candidates, axis=1), axis=None, kind='stable'):
+        point, choice = divmod(int(flat), k)
+        target = candidates[point, choice]
+        if cell[point] < 0 and owner[target] < 0:
+            cell[point], owner[target] = target, point
+
+    # Points whose candidates were all taken go to the nearest free cell
+    for point in np.flatnonzero(cell < 0):
+        free = np.flatnonzero(owner < 0)
+        target = free[np.argmin(cost[point, free])]
+        cell[point], owner[target] = target, point
+
+    for _ in range(TILE_MAP_SETTINGS['passes']):
+        improved = False
+        for point in range(points):
+            for target in candidates[point]:
+                current, other = cell[point], owner[target]
+                if other == point:
+                    continue
+                delta = cost[point, target] - cost[point, current]
+                if other >= 0:
+                    delta += cost[other, current] - cost[other, target]
+                if delta < -1e-9:
+                    cell[point], owner[target], owner[current] = target, point, other
+                    if other >= 0:
+                        cell[other] = current
+                    improved = True
+        if not improved:
+            break
+    return cell
+
+def assign_cells(px, py):
+    """Distinct hexagon cell (col, row) per point given in cell units"""
+    margin = TILE_MAP_SETTINGS['margin']
+    rows = np.arange(-margin, int(np.ceil(py.max() / (SQRT3 / 2))) + margin + 1)
+    cols = np.arange(-margin, int(np.ceil(px.max())) + margin + 1)
+    grid_col, grid_row = (axis.ravel() for axis in np.meshgrid(cols, rows))
+    cx, cy = hex_center(grid_col, grid_row)
+    cost = (px[:, None] - cx) ** 2 + (py[:, None] - cy) ** 2
+    if linear_sum_assignment is not None:
+        _, cell = linear_sum_assignment(cost)
+    else:
+        cell = _greedy_assignment(cost)
+    return grid_col[cell], grid_row[cell]
+
+def layout_tiles(frame):
+    """Hexagon cell and plot position per row of a geometry metrics table"""
+    lon, lat = frame['centroid_lon'].to_numpy(dtype=float), frame['centroid_lat'].to_numpy(dtype=float)
+    if len(frame) == 1:
+        cols, rows = np.zeros(1, dtype=int), np.zeros(1, dtype=int)
+    else:
+        # Equirectangular projection; tiles together cover the polygons' area
+        x, y = lon * np.cos(np.radians(lat.mean())), lat
+        area = frame['area_km2'].sum() / KM_PER_DEGREE ** 2
+        spacing = np.sqrt(area / (len(frame) * SQRT3 / 2)) * TILE_MAP_SETTINGS['spacing']
+        cols, rows = assign_cells((x - x.min()) / spacing, (y - y.min()) / spacing)
+        # Shift rows by an even count so the odd-row offset is preserved
+        cols, rows = cols - cols.min(), rows - (rows.min() - rows.min() % 2)
+    x, y = hex_center(cols, rows)
+    return frame.assign(col=cols, row=rows, x=x, y=y)
+
+def state_label(name):
+    """Short tile label of a state: initials of a multi-word name, else its first three letters"""
+    words = [word for word in str(name).replace('&', ' ').split() if word.upper() != 'AND']
+    return ''.join(word[0] for word in words).upper() if len(words) > 1 else str(name)[:3].upper()
+
+def build_tile_layout(metrics):
+    """State, national district and per-state district layouts from geometry metrics"""
+    states = metrics.states[['State name', 'area_km2', 'centroid_lon', 'centroid_lat']].dropna()
+    states = layout_tiles(states.assign(label=states['State name'].map(state_label)))
+    districts = metrics.districts[['dt_code', 'State name', 'area_km2', 'centroid_lon', 'centroid_lat']].dropna()
+    state_districts = pd.concat([layout_tiles(group) for _, group in districts.groupby('State name', observed=True)],
+                                ignore_index=True)
+    columns = ['col', 'row', 'x', 'y']
+    return (states[['State name', 'label', *columns]].reset_index(drop=True),
+            layout_tiles(districts)[['dt_code', 'State name', *columns]].reset_index(drop=True),
+            state_districts[['dt_code', 'State name', *columns]])
+
+def get_tile_layout():
+    """Tile layouts for the current dataset (computed once per version)"""
+    global _layout
+    store = get_data_store()
+    with _layout_lock:
+        if _layout is None or _layout.version != store.version:
+            _layout = TileLayout(store.version, *build_tile_layout(get_geometry_metrics()))
+        return _layout
+
+def state_tiles(names=None):
+    """State tiles (x, y, label) indexed by state name, optionally renamed through a {CSV name: name} mapping"""
+    tiles = get_tile_layout().states.set_index('State name')
+    if names is not None:
+        tiles = tiles[tiles.index.isin(list(names))].rename(index=names)
+    return tiles
+
+def district_tiles(state=None):
+    """District tiles (x, y) indexed by dt_code as text: the national grid, or one state's own grid"""
+    layout = get_tile_layout()
+    tiles = layout.districts if state is None else layout.state_districts[layout.state_districts['State name'] == state]
+    return tiles.set_index(tiles['dt_code'].astype(str))
+
+def tile_lookup(layout):
+    """Compact {'states': {name: [col, row]}, 'districts': {dt_code: [col, row]}} lookup"""
+    def cells(frame, key):
+        return {str(name): [int(col), int(row)] for name, col, row in zip(frame[key], frame['col'], frame['row'])}
+    return {'states': cells(layout.states, 'State name'), 'districts': cells(layout.districts, 'dt_code')}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute the hexagon tile layout of states and districts")
+    parser.add_argument('--output', default=None, help="Write the lookup as JSON to this file")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    result = get_tile_layout()
+    method = "optimal assignment" if linear_sum_assignment is not None else "greedy assignment with swaps"
+    print(f"✅ {len(result.states)} state and {len(result.districts)} district tiles ({method}) "
+          f"in {time.perf_counter() - started:.2f}s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(tile_lookup(result), f, separators=(',', ':'))
+        print(f"✅ Lookup written to {args.output}")
@@ -0,0 +1,252 @@
+# ===========================================
+# SHARED-ARC TOPOLOGY
+# ===========================================
+# Splits polygon rings into arcs the way TopoJSON does: coordinates are
+# quantized to an integer grid, every vertex where the set of neighbouring
+# rings changes is a junction, and the boundary between two junctions is one
+# arc stored once no matter how many rings use it. Simplifying an arc
+# therefore changes both districts that share it identically, so simplified
+# maps have no slivers or gaps between neighbours.
+#
+# Rings refer to arcs by index; a negative reference ~i means arc i traversed
+# backwards (the TopoJSON convention).
+
+import numpy as np
+import pandas as pd
+
+def quantize_ring(ring, grid):
+    """Ring as integer grid coordinates, without repeated or closing vertices (None if < 3 remain)"""
+    points = np.round(np.asarray(ring, dtype=float)[:, :2] / grid).astype(np.int64)
+    points = points[np.any(points != np.roll(points, 1, axis=0), axis=1)]
+    return points if len(points) >= 3 else None
+
+def find_junctions(rings):
+    """Per ring, a boolean mask of the vertices where shared boundaries start or end"""
+    lengths = np.array([len(ring) for ring in rings])
+    points = np.concatenate(rings)
+    ring_id = np.repeat(np.arange(len(rings)), lengths)
+    low = points.min(axis=0)
+    key = (points[:, 0] - low[0]) * (points[:, 1].max() - low[1] + 1) + (points[:, 1] - low[1])
+
+    # Neighbouring vertices of every occurrence, as an unordered pair
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    position = np.arange(len(points)) - np.repeat(starts, lengths)
+    previous = key[np.repeat(starts, lengths) + (position - 1) % np.repeat(lengths, lengths)]
+    following = key[np.repeat(starts, lengths) + (position + 1) % np.repeat(lengths, lengths)]
+    pairs = pd.DataFrame({'key': key, 'low': np.minimum(previous, following),
+                          'high': np.maximum(previous, following), 'ring': ring_id})
+
+    # A vertex is a junction when its occurrences disagree on their neighbours, or a ring visits it twice
+    grouped = pairs.groupby('key')
+    junction = (grouped['low'].transform('nunique') > 1) | (grouped['high'].transform('nunique') > 1) \
+        | pairs.duplicated(['key', 'ring'], keep=False)
+    return np.split(junction.to_numpy(), np.cumsum(lengths)[:-1])
+
+def _canonical(arc):
+    """Hashable key of an arc and whether it is stored reversed"""
+    forward, backward = arc.tobytes(), arc[::-1].tobytes()
+    return (forward, False) if forward <= backward else (backward, True)
+
+def _canonical_ring(ring):
+    """A junction-free closed ring rotated to its smallest vertex, in a fixed direction"""
+    start = np.lexsort((ring[:, 1], ring[:, 0]))[0]
+    rotated = np.roll(ring, -start, axis=0)
+    closed = np.vstack([rotated, rotated[:1]])
+    reversed_ring = np.vstack([rotated[:1], rotated[1:][::-1], rotated[:1]])
+    return (closed, False) if closed.tobytes() <= reversed_ring.tobytes() else (reversed_ring, True)
+
+def split_arcs(rings):
+    """Split integer rings into shared arcs; returns (arcs, arc references per ring)"""
+    arcs, index, references = [], {}, []
+
+    def add(arc, reversed_arc=None):
+        key, backwards = _canonical(arc) if reversed_arc is None else (arc.tobytes(), reversed_arc)
+        if key not in index:
+            index[key] = len(arcs)
+            arcs.append(arc[::-1] if backwards and reversed_arc is None else arc)
+        return ~index[key] if backwards else index[key]
+
+    for ring, junction in zip(rings, find_junctions(rings)):
+        cuts = np.flatnonzero(junction)
+        if len(cuts) == 0:
+            closed, backwards = _canonical_ring(ring)
+            references.append([add(closed, backwards)])
+            continue
+        rotated = np.roll(ring, -cuts[0], axis=0)
+        cuts = np.r_[cuts - cuts[0], len(ring)]
+        closed = np.vstack([rotated, rotated[:1]])
+        references.append([add(closed[start:stop + 1]) for start, stop in zip(cuts[:-1], cuts[1:])])
+    return arcs, references
+
+def douglas_peucker(points, tolerance):
+    """Mask of the vertices kept by Douglas-Peucker simplification (endpoints always kept)"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    if len(points) < 3:
+        return keep
+    points = points.astype(float)
+    stack = [(0, len(points) - 1)]
+    if np.array_equal(points[0], points[-1]):
+        # A closed arc is first split at its vertex furthest from the start
+        furthest = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        keep[furthest] = True
+        stack = [(0, furthest), (furthest, len(points) - 1)]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start < 2:
+            continue
+        segment = points[stop] - points[start]
+        offsets = points[start + 1:stop] - points[start]
+        length = np.hypot(*segment)
+        if length > 0:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        else:
+            distances = np.hypot(*offsets.T)
+        furthest = int(np.argmax(distances))
+        if distances[furthest] > tolerance:
+            middle = start + 1 + furthest
+            keep[middle] = True
+            stack.extend([(start, middle), (middle, stop)])
+    return keep
+
+def simplify_arcs(arcs, tolerance):
+    """Douglas-Peucker simplified copy of every arc (tolerance in grid units)"""
+    return [arc[douglas_peucker(arc, tolerance)] for arc in arcs]
+
+def assemble_ring(arcs, references):
+    """Closed integer ring from its arc references"""
+    parts = [arcs[ref] if ref >= 0 else arcs[~ref][::-1] for ref in references]
+    # Consecutive arcs share their joining vertex
+    return np.vstack([parts[0]] + [part[1:] for part in parts[1:]])
+
+def _features_polygons(feature):
+    """Polygons (lists of rings) of a GeoJSON feature"""
+    geometry = feature.get('geometry') or {}
+    coordinates = geometry.get('coordinates') or []
+    return [coordinates] if geometry.get('type') == 'Polygon' else coordinates if geometry.get('type') == 'MultiPolygon' else []
+
+def encode_topology(layers, quantization):
+    """Encode {object name: (GeoJSON, simplification tolerance in degrees)} as one TopoJSON topology
+
+    Coordinates share one transform: a grid of `quantization` degrees whose
+    origin is a whole degree, so layers that were already snapped to a coarser
+    grid keep their exact vertices. Arcs are delta encoded.
+    """
+    features = [feature for geojson, _ in layers.values() for feature in geojson.get('features', [])]
+    all_points = np.concatenate([np.asarray(ring, dtype=float)[:, :2] for feature in features
+                                 for polygon in _features_polygons(feature) for ring in polygon if len(ring) > 1])
+    origin = np.floor(all_points.min(axis=0))
+
+    arcs, objects = [], {}
+    for name, (geojson, tolerance) in layers.items():
+        # Quantized rings of the layer, with (feature, polygon, is outer ring) for each
+        rings, owners = [], []
+        for feature_id, feature in enumerate(geojson.get('features', [])):
+            for polygon_id, polygon in enumerate(_features_polygons(feature)):
+                for position, ring in enumerate(polygon):
+                    quantized = quantize_ring(np.asarray(ring, dtype=float)[:, :2] - origin, quantization) \
+                        if len(ring) > 1 else None
+                    if quantized is not None:
+                        rings.append(quantized)
+                        owners.append((feature_id, polygon_id, position == 0))
+
+        layer_arcs, references = split_arcs(rings) if rings else ([], [])
+        if tolerance:
+            layer_arcs = simplify_arcs(layer_arcs, tolerance / quantization)
+        offset = len(arcs)
+        arcs.extend(layer_arcs)
+
+        geometries = [{'type': 'MultiPolygon', 'arcs': [], 'properties': feature.get('properties') or {}}
+                      for feature in geojson.get('features', [])]
+        polygons = {}
+        for refs, (feature_id, polygon_id, outer) in zip(references, owners):
+            ring = assemble_ring(layer_arcs, refs)
+            if not outer and len(np.unique(ring, axis=0)) < 3:
+                continue
+            shifted = [ref + offset if ref >= 0 else ~(~ref + offset) for ref in refs]
+            if outer or (feature_id, polygon_id) in polygons:
+                polygons.setdefault((feature_id, polygon_id), []).append(shifted)
+        for (feature_id, _), polygon in polygons.items():
+            geometries[feature_id]['arcs'].append(polygon)
+        objects[name] = {'type': 'GeometryCollection',
+                         'geometries': [geometry for geometry in geometries if geometry['arcs']]}
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [quantization, quantization], 'translate': origin.tolist()},
+        'objects': objects,
+        'arcs': [np.vstack([arc[:1], np.diff(arc, axis=0)]).tolist() for arc in arcs],
+    }
+
+def coarsen_topology(topology, tolerance, quantization):
+    """Lower-resolution copy of a topology: every arc simplified and snapped to a coarser grid
+
+    The arcs and geometries are kept, so shared borders stay shared and the
+    copy never has more arcs than the original. `quantization` must be a
+    multiple of the topology's grid (both grids start at the same whole
+    degree). Polygons and holes that collapse on the coarse grid are dropped
+    (each geometry keeps at least its first polygon), and so are the arcs no
+    geometry uses any more.
+    """
+    scale = topology['transform']['scale'][0]
+    factor = quantization / scale
+    arcs = []
+    for arc in simplify_arcs(decode_arcs(topology), tolerance / scale):
+        snapped = np.round(arc / factor).astype(np.int64)
+        arcs.append(snapped[np.r_[True, np.any(np.diff(snapped, axis=0) != 0, axis=1)]])
+
+    def solid(references):
+        return len(np.unique(assemble_ring(arcs, references), axis=0)) >= 3
+
+    objects = {}
+    for name, collection in topology['objects'].items():
+        geometries = []
+        for geometry in collection['geometries']:
+            polygons = [[ring for position, ring in enumerate(polygon) if position == 0 or solid(ring)]
+                        for polygon in geometry['arcs'] if solid(polygon[0])]
+            geometries.append(dict(geometry, arcs=polygons or geometry['arcs'][:1]))
+        objects[name] = dict(collection, geometries=geometries)
+
+    # Renumber the arcs still in use
+    used = sorted({ref if ref >= 0 else ~ref for collection in objects.values()
+                   for geometry in collection['geometries'] for polygon in geometry['arcs']
+                   for ring in polygon for ref in ring})
+    position = {old: new for new, old in enumerate(used)}
+    for collection in objects.values():
+        for geometry in collection['geometries']:
+            geometry['arcs'] = [[[position[ref] if ref >= 0 else ~position[~ref] for ref in ring] for ring in polygon]
+                                for polygon in geometry['arcs']]
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [quantization, quantization], 'translate': topology['transform']['translate']},
+        'objects': objects,
+        'arcs': [np.vstack([arcs[i][:1], np.diff(arcs[i], axis=0)]).tolist() for i in used],
+    }
+
+def decode_arcs(topology):
+    """Absolute integer coordinates of every delta-encoded arc"""
+    return [np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) for arc in topology['arcs']]
+
+def decode_topology(topology, name, arcs=None, where=None):
+    """GeoJSON FeatureCollection of one topology object
+
+    `where` optionally keeps only the features whose property equals a value,
+    or is one of a set/frozenset of values, e.g. {'dt_code': frozenset(codes)}.
+    """
+    arcs = arcs if arcs is not None else decode_arcs(topology)
+    scale = np.asarray(topology['transform']['scale'], dtype=float)
+    translate = np.asarray(topology['transform']['translate'], dtype=float)
+    decimals = max(int(np.ceil(-np.log10(scale.min()))), 0)
+
+    features = []
+    for geometry in topology['objects'][name]['geometries']:
+        properties = geometry.get('properties') or {}
+        if where and any(properties.get(key) not in value if isinstance(value, (set, frozenset))
+                         else properties.get(key) != value for key, value in where.items()):
+            continue
+        polygons = geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']]
+        coordinates = [[np.round(assemble_ring(arcs, refs) * scale + translate, decimals).tolist() for refs in polygon]
+                       for polygon in polygons]
+        features.append({'type': 'Feature', 'properties': properties,
+                         'geometry': {'type': 'MultiPolygon', 'coordinates': coordinates}})
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,59 @@
+# ===========================================
+# DATA FILE WATCHER
+# ===========================================
+# Polls the data files' modification times from a daemon thread and hands
+# changed files to reload_data_files(), which rebuilds them off the request
+# path and swaps in a new DataStore snapshot. A file is only reloaded once
+# its mtime/size have been stable for one poll, so half-written files are
+# skipped. A file that fails to reload is retried once it changes again;
+# the other files of the same poll are published without it.
+
+import threading
+import time
+from config.settings import RELOAD_SETTINGS
+from data.loader import get_watched_files, reload_data_files, file_signature
+
+_watcher_thread = None
+
+def _watch(interval):
+    """Poll loop: reload files whose signature changed and then stayed put for one poll"""
+    files = get_watched_files()
+    loaded = {path: file_signature(path) for path in files}
+    pending = {}
+    failed = {}     # Signature a file failed to reload at; retried once it changes again
+
+    while True:
+        time.sleep(interval)
+        ready = []
+        for path in files:
+            signature = file_signature(path)
+            if signature == loaded[path]:
+                pending.pop(path, None)
+                failed.pop(path, None)
+            elif signature == failed.get(path):
+                pending.pop(path, None)
+            elif signature is not None and pending.get(path) == signature:
+                ready.append(path)
+            else:
+                pending[path] = signature
+
+        if ready:
+            failures = reload_data_files(ready)
+            for path in ready:
+                # A file that failed stays out of later reloads until it changes again
+                if path in failures:
+                    failed[path] = pending.pop(path)
+                else:
+                    loaded[path] = pending.pop(path)
+
+def start_data_watcher(interval=None):
+    """Start the background data watcher once (no-op when disabled in RELOAD_SETTINGS)"""
+    global _watcher_thread
+    if not RELOAD_SETTINGS['enabled'] or _watcher_thread is not None:
+        return _watcher_thread
+
+    interval = interval or RELOAD_SETTINGS['interval']
+    _watcher_thread = threading.Thread(target=_watch, args=(interval,), name='data-watcher', daemon=True)
+    _watcher_thread.start()
+    print(f"✅ Data hot reload enabled (polling every {interval:g}s)")
+    return _watcher_thread
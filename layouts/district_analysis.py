@@ -3,7 +3,13 @@
 # ===========================================
 
 from dash import html, dcc
-from config.settings import COLORS
+from config.settings import (COLORS, DISTRICT_ATTRIBUTE_CATEGORIES, CLUSTER_SETTINGS, MAP_MODE_OPTIONS,
+                             CLASSIFICATION_OPTIONS)
+from data.filters import FILTER_OPERATORS
+from data.similarity import SIMILARITY_METRICS
+
+# Number of conditions offered by the district query builder
+FILTER_CONDITION_ROWS = 3
 
 def create_district_analysis_layout():
     """Create the beautiful District Analysis tab layout"""
@@ -41,6 +47,44 @@ def create_district_analysis_layout():
                         style={'borderRadius': '12px'}
                     )
                 ], style={'marginBottom': '1.5rem'}),
+                
+                html.Div([
+                    dcc.Checklist(
+                        id="district-hotspot-toggle",
+                        options=[{"label": " 🔥 Overlay hotspots and coldspots (LISA) for the selected metric", "value": "hotspots"}],
+                        value=[],
+                        style={'color': 'white', 'fontWeight': '600'}
+                    )
+                ], style={'marginBottom': '1.5rem'}),
+                
+                html.Div([
+                    html.Label("🧬 Color Map by Typology", style={'color': 'white', 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    html.Div([
+                        dcc.Dropdown(
+                            id="district-cluster-category",
+                            options=[{"label": category, "value": category} for category in DISTRICT_ATTRIBUTE_CATEGORIES],
+                            placeholder="Off - color the map by the selected metric",
+                            style={'flex': '1', 'borderRadius': '12px'}
+                        ),
+                        dcc.RadioItems(
+                            id="district-cluster-scope",
+                            options=[{"label": " All India", "value": "national"},
+                                     {"label": " Within state", "value": "state"}],
+                            value="national",
+                            inline=True,
+                            style={'color': 'white', 'marginLeft': '1rem'},
+                            labelStyle={'marginRight': '1rem'}
+                        )
+                    ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '0.75rem'}),
+                    dcc.Slider(
+                        id="district-cluster-k",
+                        min=2,
+                        max=CLUSTER_SETTINGS['max_k'],
+                        step=1,
+                        value=CLUSTER_SETTINGS['default_k'],
+                        marks={k: {"label": str(k), "style": {'color': 'white'}} for k in range(2, CLUSTER_SETTINGS['max_k'] + 1)}
+                    )
+                ], style={'marginBottom': '1.5rem'}),
             ])
             
         ], style={
@@ -65,10 +109,45 @@ def create_district_analysis_layout():
                         'borderRadius': '10px',
                         'color': 'white'
                     }),
-                    html.H3("District Choropleth Map", style={'margin': 0, 'color': COLORS['dark']})
+                    html.H3("District Choropleth Map", style={'margin': 0, 'color': COLORS['dark']}),
+                    dcc.RadioItems(
+                        id="district-map-mode",
+                        options=MAP_MODE_OPTIONS,
+                        value="polygons",
+                        inline=True,
+                        style={'marginLeft': 'auto', 'color': COLORS['dark'], 'fontWeight': '600'},
+                        labelStyle={'marginLeft': '1rem'}
+                    )
                 ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
                 
                 html.Div([
+                    html.Label("🎨 Colour Classes", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    html.Div([
+                        dcc.Dropdown(
+                            id="district-map-classes",
+                            options=CLASSIFICATION_OPTIONS,
+                            value="continuous",
+                            clearable=False,
+                            style={'borderRadius': '12px', 'minWidth': '240px'}
+                        ),
+                        dcc.RadioItems(
+                            id="district-class-scope",
+                            options=[{"label": " All India", "value": "national"},
+                                     {"label": " Within state", "value": "state"}],
+                            value="national",
+                            inline=True,
+                            style={'color': COLORS['dark'], 'marginLeft': '1rem'},
+                            labelStyle={'marginRight': '1rem'}
+                        )
+                    ], style={'display': 'flex', 'alignItems': 'center'})
+                ], style={'marginBottom': '1rem'}),
+                
+                html.Div([
+                    # Set when the map was drawn coarse first and the full geometry should follow
+                    dcc.Store(id="district-map-refine"),
+                    # Enabled while the typologies on the map are still being clustered
+                    dcc.Interval(id="district-cluster-poll", interval=CLUSTER_SETTINGS['poll_interval'] * 1000,
+                                 disabled=True),
                     dcc.Graph(
                         id="district-map",
                         style={'height': '500px'},
@@ -77,6 +156,61 @@ def create_district_analysis_layout():
                 ], style={'background': 'white', 'borderRadius': '16px', 'padding': '1rem', 'margin': '1rem 0', 'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.1)'})
             ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)', 'gridColumn': 'span 2'}),
             
+            # All-India District Map Card
+            html.Div([
+                html.Div([
+                    html.Span("🇮🇳", style={
+                        'fontSize': '1.5rem',
+                        'marginRight': '1rem',
+                        'padding': '10px',
+                        'background': COLORS['gradient_1'],
+                        'borderRadius': '10px',
+                        'color': 'white'
+                    }),
+                    html.H3("All-India District Map", style={'margin': 0, 'color': COLORS['dark']}),
+                    dcc.RadioItems(
+                        id="national-district-mode",
+                        options=MAP_MODE_OPTIONS,
+                        value="polygons",
+                        inline=True,
+                        style={'marginLeft': 'auto', 'color': COLORS['dark'], 'fontWeight': '600'},
+                        labelStyle={'marginLeft': '1rem'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
+                
+                html.Div([
+                    html.Label("📈 Select Metric", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    dcc.Dropdown(
+                        id="national-district-attribute",
+                        placeholder="Choose a metric to colour every district...",
+                        style={'borderRadius': '12px'}
+                    )
+                ], style={'marginBottom': '1rem'}),
+                
+                html.Div([
+                    html.Label("🎨 Colour Classes", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    html.Div([
+                        dcc.Dropdown(
+                            id="national-district-classes",
+                            options=CLASSIFICATION_OPTIONS,
+                            value="continuous",
+                            clearable=False,
+                            style={'borderRadius': '12px', 'minWidth': '240px'}
+                        )
+                    ], style={'display': 'flex', 'alignItems': 'center'})
+                ], style={'marginBottom': '1rem'}),
+                
+                html.Div([
+                    # Server figure with a boundary reference; the graph gets it with the boundaries decoded
+                    dcc.Store(id="national-district-figure"),
+                    dcc.Graph(
+                        id="national-district-map",
+                        style={'height': '650px'},
+                        config={'displayModeBar': False}
+                    )
+                ], style={'background': 'white', 'borderRadius': '16px', 'padding': '1rem', 'margin': '1rem 0', 'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.1)'})
+            ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)', 'gridColumn': 'span 2'}),
+            
         ], style={'display': 'grid', 'gridTemplateColumns': 'repeat(2, 1fr)', 'gap': '2rem', 'padding': '1rem'}),
         
         # District Rankings and Performance
@@ -130,6 +264,85 @@ def create_district_analysis_layout():
             
         ], style={'display': 'grid', 'gridTemplateColumns': 'repeat(auto-fit, minmax(400px, 1fr))', 'gap': '2rem', 'padding': '1rem'}),
         
+        # District Profile Section
+        html.Div([
+            html.Div([
+                html.Div([
+                    html.Span("🪪", style={
+                        'fontSize': '1.5rem',
+                        'marginRight': '1rem',
+                        'padding': '10px',
+                        'background': COLORS['gradient_4'],
+                        'borderRadius': '10px',
+                        'color': 'white'
+                    }),
+                    html.H3("District Profile", style={'margin': 0, 'color': COLORS['dark']})
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
+                
+                html.Div([
+                    html.Label("📍 Select District", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    dcc.Dropdown(
+                        id="district-profile-dropdown",
+                        placeholder="First select a state...",
+                        style={'borderRadius': '12px'}
+                    )
+                ], style={'marginBottom': '1.5rem'}),
+                
+                html.Div(id="district-profile-card", style={
+                    'maxHeight': '600px',
+                    'overflowY': 'auto'
+                })
+                
+            ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)'})
+        ], style={'padding': '1rem'}),
+        
+        # Similar Districts Section
+        html.Div([
+            html.Div([
+                html.Div([
+                    html.Span("🧭", style={
+                        'fontSize': '1.5rem',
+                        'marginRight': '1rem',
+                        'padding': '10px',
+                        'background': COLORS['gradient_1'],
+                        'borderRadius': '10px',
+                        'color': 'white'
+                    }),
+                    html.H3("Similar Districts", style={'margin': 0, 'color': COLORS['dark']})
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
+                
+                html.P("Districts across India most like the district selected in the profile above.", style={'color': '#64748b', 'marginBottom': '1rem'}),
+                
+                html.Div([
+                    html.Div([
+                        html.Label("📐 Distance", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                        dcc.Dropdown(
+                            id="district-similar-metric",
+                            options=[{"label": metric.title(), "value": metric} for metric in SIMILARITY_METRICS],
+                            value=SIMILARITY_METRICS[0],
+                            clearable=False,
+                            style={'width': '180px'}
+                        )
+                    ], style={'flex': '0 0 auto', 'marginRight': '1rem'}),
+                    
+                    html.Div([
+                        html.Label("🧮 Compare On", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                        dcc.Dropdown(
+                            id="district-similar-categories",
+                            multi=True,
+                            placeholder="All metrics (or pick categories, each weighted equally)...",
+                        )
+                    ], style={'flex': '1'})
+                ], style={'display': 'flex', 'alignItems': 'end', 'marginBottom': '1.5rem'}),
+                
+                html.Div(id="district-similar-results", style={
+                    'maxHeight': '600px',
+                    'overflowY': 'auto'
+                })
+                
+            ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)'})
+        ], style={'padding': '1rem'}),
+        
         # District Data Table Section
         html.Div([
             html.Div([
@@ -195,8 +408,74 @@ def create_district_analysis_layout():
             ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)'})
         ], style={'padding': '1rem'}),
         
+        # District Query Builder Section
+        html.Div([
+            html.Div([
+                html.Div([
+                    html.Span("🧩", style={
+                        'fontSize': '1.5rem',
+                        'marginRight': '1rem',
+                        'padding': '10px',
+                        'background': COLORS['gradient_3'],
+                        'borderRadius': '10px',
+                        'color': 'white'
+                    }),
+                    html.H3("District Query Builder", style={'margin': 0, 'color': COLORS['dark']})
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
+                
+                html.P("Find districts across India that meet all of the conditions below.", style={'color': '#64748b', 'marginBottom': '1rem'}),
+                
+                # Condition rows (empty rows are ignored)
+                html.Div([create_filter_condition_row(i) for i in range(1, FILTER_CONDITION_ROWS + 1)]),
+                
+                # Matching districts
+                html.Div([
+                    html.Div(id="district-filter-results", style={
+                        'background': 'white', 
+                        'borderRadius': '12px', 
+                        'padding': '1rem', 
+                        'boxShadow': '0 4px 15px rgba(0, 0, 0, 0.1)',
+                        'maxHeight': '600px',
+                        'overflowY': 'auto'
+                    })
+                ], style={'background': 'white', 'borderRadius': '16px', 'padding': '1rem', 'margin': '1rem 0', 'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.1)'})
+                
+            ], style={'background': 'white', 'borderRadius': '16px', 'padding': '2rem', 'margin': '1.5rem', 'boxShadow': '0 10px 30px rgba(0, 0, 0, 0.1)'})
+        ], style={'padding': '1rem'}),
+        
     ])
 
+def create_filter_condition_row(row):
+    """One 'attribute / operator / value' condition of the district query builder"""
+    return html.Div([
+        dcc.Dropdown(
+            id=f"district-filter-attribute-{row}",
+            placeholder="Choose a metric...",
+            style={'flex': '1', 'borderRadius': '8px'}
+        ),
+        dcc.Dropdown(
+            id=f"district-filter-operator-{row}",
+            options=[{"label": op, "value": op} for op in FILTER_OPERATORS],
+            value='>',
+            clearable=False,
+            style={'width': '90px', 'marginLeft': '1rem'}
+        ),
+        dcc.Input(
+            id=f"district-filter-value-{row}",
+            type="number",
+            placeholder="Value (%)",
+            debounce=True,
+            style={
+                'width': '140px',
+                'marginLeft': '1rem',
+                'padding': '8px',
+                'borderRadius': '8px',
+                'border': '2px solid #e2e8f0',
+                'fontSize': '14px'
+            }
+        )
+    ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '0.75rem'})
+
 def create_comparison_layout():
     """Create the beautiful Comparison tab layout"""
     return html.Div([
@@ -12,6 +12,9 @@ def create_main_layout():
         # Hidden div to store active tab state
         html.Div(id='active-tab', children='state', style={'display': 'none'}),
         
+        # Download bandwidth measured in the browser (assets/bandwidth.js), picks the map geometry tier
+        dcc.Store(id='client-bandwidth', storage_type='session'),
+        
         # Beautiful Header Section
         html.Div([
             html.Div([
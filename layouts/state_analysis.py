@@ -3,7 +3,7 @@
 # ===========================================
 
 from dash import html, dcc
-from config.settings import COLORS
+from config.settings import COLORS, MAP_MODE_OPTIONS, CLASSIFICATION_OPTIONS
 
 def create_state_analysis_layout():
     """Create the beautiful State Analysis tab layout"""
@@ -65,10 +65,33 @@ def create_state_analysis_layout():
                         'borderRadius': '10px',
                         'color': 'white'
                     }),
-                    html.H3("India Choropleth Map", style={'margin': 0, 'color': COLORS['dark']})
+                    html.H3("India Choropleth Map", style={'margin': 0, 'color': COLORS['dark']}),
+                    dcc.RadioItems(
+                        id="india-map-mode",
+                        options=MAP_MODE_OPTIONS,
+                        value="polygons",
+                        inline=True,
+                        style={'marginLeft': 'auto', 'color': COLORS['dark'], 'fontWeight': '600'},
+                        labelStyle={'marginLeft': '1rem'}
+                    )
                 ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '1.5rem', 'paddingBottom': '1rem', 'borderBottom': '2px solid #f1f5f9'}),
                 
                 html.Div([
+                    html.Label("🎨 Colour Classes", style={'color': COLORS['dark'], 'fontWeight': '600', 'marginBottom': '0.5rem', 'display': 'block'}),
+                    html.Div([
+                        dcc.Dropdown(
+                            id="india-map-classes",
+                            options=CLASSIFICATION_OPTIONS,
+                            value="continuous",
+                            clearable=False,
+                            style={'borderRadius': '12px', 'minWidth': '240px'}
+                        )
+                    ], style={'display': 'flex', 'alignItems': 'center'})
+                ], style={'marginBottom': '1rem'}),
+                
+                html.Div([
+                    # Server figure with a boundary reference; the graph gets it with the boundaries decoded
+                    dcc.Store(id="india-map-figure"),
                     dcc.Graph(
                         id="india-map",
                         style={'height': '500px'},
@@ -0,0 +1,105 @@
+# ===========================================
+# RESPONSE COMPRESSION AND ETAG CACHING
+# ===========================================
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from flask import Response, abort, request
+from config.settings import COMPRESSION_SETTINGS, CSV_TO_GEOJSON_MAPPING, TOPOLOGY_SETTINGS
+
+# Brotli is optional - gzip is always available from the standard library
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressed bodies keyed by (content hash, encoding)
+_compressed_cache = OrderedDict()
+
+# Boundary files that may be fetched through the /data/ endpoint
+DATA_FILES = {'india.json', TOPOLOGY_SETTINGS['output'],
+              TOPOLOGY_SETTINGS['coarse_output'], *CSV_TO_GEOJSON_MAPPING.values()}
+_data_file_cache = {}
+
+def _choose_encoding():
+    """Pick the best content encoding accepted by the client"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def _compress(body, digest, encoding):
+    """Compress a response body, reusing earlier results for identical content"""
+    key = (digest, encoding)
+    if key in _compressed_cache:
+        _compressed_cache.move_to_end(key)
+        return _compressed_cache[key]
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=COMPRESSION_SETTINGS['brotli_quality'])
+    else:
+        compressed = gzip.compress(body, compresslevel=COMPRESSION_SETTINGS['gzip_level'], mtime=0)
+
+    _compressed_cache[key] = compressed
+    if len(_compressed_cache) > COMPRESSION_SETTINGS['cache_entries']:
+        _compressed_cache.popitem(last=False)
+    return compressed
+
+def _wants_etag():
+    """Check whether the current request targets an ETag-enabled endpoint"""
+    if request.method != 'GET':
+        return False
+    return any(request.path.startswith(prefix) for prefix in COMPRESSION_SETTINGS['etag_paths'])
+
+def compress_response(response):
+    """Add content-hash ETags and gzip/brotli encoding to eligible responses"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSION_SETTINGS['mimetypes']):
+        return response
+
+    body = response.get_data()
+    encoding = _choose_encoding() if len(body) >= COMPRESSION_SETTINGS['min_size'] else None
+    digest = hashlib.sha1(body).hexdigest()
+
+    # ETag covers the encoded representation, so each encoding gets its own tag
+    if _wants_etag():
+        response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if encoding:
+        response.set_data(_compress(body, digest, encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+
+    return response
+
+def serve_data_file(filename):
+    """Serve a boundary file from disk, re-reading it only when it changes"""
+    if filename not in DATA_FILES or not os.path.exists(filename):
+        abort(404)
+
+    mtime = os.path.getmtime(filename)
+    cached = _data_file_cache.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(filename, 'rb') as f:
+            cached = (mtime, f.read())
+        _data_file_cache[filename] = cached
+
+    mimetype = 'application/json' if filename.endswith('.topojson') else 'application/geo+json'
+    return Response(cached[1], mimetype=mimetype)
+
+def register_compression(server):
+    """Attach compression, ETag handling and the /data/ endpoint to the Flask server"""
+    server.add_url_rule('/data/<path:filename>', 'data_file', serve_data_file)
+    server.after_request(compress_response)
+
+    encodings = 'brotli + gzip' if brotli is not None else 'gzip'
+    print(f"✅ Response compression enabled ({encodings}, min {COMPRESSION_SETTINGS['min_size']} bytes)")
@@ -0,0 +1,234 @@
+# ===========================================
+# LEAN FIGURE BUILDER
+# ===========================================
+# Builds plotly figure dicts straight from NumPy arrays, skipping the
+# dataframe reshaping/validation done by plotly.express and the follow-up
+# update_layout/update_traces calls on hot callback paths.
+
+import functools
+import numpy as np
+import plotly.colors
+import plotly.io as pio
+from config.settings import CHART_LAYOUTS, TILE_MAP_SETTINGS
+
+# Default red/amber/green performance tiers used by the ranking charts
+PERFORMANCE_TIERS = ((0.7, '#10b981'), (0.4, '#f59e0b'))
+LOW_PERFORMANCE_COLOR = '#ef4444'
+
+SQRT3 = np.sqrt(3)
+
+@functools.lru_cache(maxsize=None)
+def base_layout(chart_type):
+    """Return the cached base layout for a chart type, with its template resolved once"""
+    layout = dict(CHART_LAYOUTS[chart_type])
+    layout['template'] = pio.templates[layout['template']].to_plotly_json()
+    return layout
+
+def merge_layout(base, overrides):
+    """Recursively merge layout overrides into a base layout without mutating either"""
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_layout(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+@functools.lru_cache(maxsize=None)
+def _named_colorscale(name):
+    """Resolve a named colorscale such as 'RdYlBu_r' once"""
+    return plotly.colors.get_colorscale(name)
+
+def resolve_colorscale(colorscale):
+    """Resolve a colorscale name or list of colors to plotly.js [position, color] pairs"""
+    if isinstance(colorscale, str):
+        return _named_colorscale(colorscale)
+    if colorscale and isinstance(colorscale[0], str):
+        return plotly.colors.make_colorscale(list(colorscale))
+    return colorscale
+
+def categorical_colorscale(colors):
+    """Stepped colorscale giving integer codes 0..n-1 one flat colour each (use cmin=-0.5, cmax=n-0.5)"""
+    steps = len(colors)
+    scale = []
+    for i, color in enumerate(colors):
+        scale.extend([[i / steps, color], [(i + 1) / steps, color]])
+    return scale
+
+def tier_colors(values, tiers=PERFORMANCE_TIERS, default=LOW_PERFORMANCE_COLOR):
+    """Colour each value by where it sits between the min and max of the array"""
+    values = np.asarray(values, dtype=float)
+    low, high = values.min(), values.max()
+    normalized = (values - low) / (high - low) if high != low else np.full(values.shape, 0.5)
+    return np.select([normalized > threshold for threshold, _ in tiers],
+                     [color for _, color in tiers], default).tolist()
+
+def _build(chart_type, traces, overrides, layout):
+    """Assemble the figure dict from traces and merged layout overrides"""
+    merged = merge_layout(base_layout(chart_type), overrides)
+    if layout:
+        merged = merge_layout(merged, layout)
+    traces = [{key: value for key, value in trace.items() if value is not None} for trace in traces]
+    return {'data': traces, 'layout': merged}
+
+def choropleth_figure(geojson, locations, values, featureidkey, title, colorscale,
+                      hovertext=None, hovertemplate=None, colorbar=None, showscale=True,
+                      marker_line=None, layout=None):
+    """Build a choropleth figure dict from location keys and a value array"""
+    trace = {
+        'type': 'choropleth',
+        'geojson': geojson,
+        'featureidkey': featureidkey,
+        'locations': list(locations),
+        'z': np.asarray(values, dtype=float),
+        'coloraxis': 'coloraxis',
+        'geo': 'geo',
+        'name': '',
+        'hovertext': list(hovertext) if hovertext is not None else None,
+        'hovertemplate': hovertemplate,
+        'marker': {'line': marker_line or {'color': 'rgba(255,255,255,0.8)', 'width': 0.5}}
+    }
+    overrides = {
+        'title': {'text': title},
+        'coloraxis': {
+            'colorscale': resolve_colorscale(colorscale),
+            'showscale': showscale,
+            'colorbar': colorbar or {}
+        }
+    }
+    return _build('choropleth', [trace], overrides, layout)
+
+def classed_choropleth(figure, classes, labels):
+    """Copy of a choropleth figure coloured by discrete classes instead of a continuous scale
+
+    `classes` holds the class index (NaN for no data) of every location and
+    `labels` the legend text of each class. Class colours are sampled from
+    the figure's colour scale; the hover keeps showing the actual values.
+    """
+    steps = len(labels)
+    scale = figure['layout']['coloraxis']['colorscale']
+    colors = plotly.colors.sample_colorscale(scale, [0.5] if steps == 1 else list(np.linspace(0, 1, steps)))
+    data = []
+    for trace in figure['data']:
+        if trace.get('type') == 'choropleth' and not data:
+            trace = dict(trace, z=np.asarray(classes, dtype=float), customdata=trace['z'],
+                         hovertemplate=(trace.get('hovertemplate') or '').replace('%{z', '%{customdata'))
+        data.append(trace)
+    colorbar = dict(figure['layout']['coloraxis'].get('colorbar') or {},
+                    tickvals=list(range(steps)), ticktext=list(labels))
+    coloraxis = dict(figure['layout']['coloraxis'], colorscale=categorical_colorscale(colors),
+                     cmin=-0.5, cmax=steps - 0.5, colorbar=colorbar)
+    return dict(figure, data=data, layout=dict(figure['layout'], coloraxis=coloraxis))
+
+def topology_reference(figure, name, url, coarse_url=None):
+    """Copy of a figure whose choropleth traces reference a topology object instead of carrying GeoJSON
+
+    assets/topology.js fetches each topology once per page and puts the decoded
+    layer back before the figure reaches its graph. With a coarse URL the coarse
+    layer is painted first and replaced once the full one (if any) has loaded.
+    """
+    data = []
+    for trace in figure['data']:
+        if trace.get('type') == 'choropleth':
+            trace = {key: value for key, value in trace.items() if key != 'geojson'}
+            trace['topology'] = {'url': url, 'coarse': coarse_url, 'object': name}
+        data.append(trace)
+    return dict(figure, data=data)
+
+def choropleth_as_tiles(figure, tiles):
+    """Re-render a choropleth figure dict as a map of hexagon tiles
+
+    `tiles` is a frame of hexagon centres (x, y and an optional label column)
+    indexed by the choropleth's locations. Colours, colour axis, hover text and
+    title of the first choropleth trace carry over; locations without a tile
+    and overlay traces are left out.
+    """
+    choropleth = next(trace for trace in figure['data'] if trace.get('type') == 'choropleth')
+    located = tiles.reindex([str(location) for location in choropleth['locations']])
+    has_tile = located['x'].notna().to_numpy()
+    x, y = located['x'].to_numpy(dtype=float)[has_tile], located['y'].to_numpy(dtype=float)[has_tile]
+    z = np.asarray(choropleth['z'], dtype=float)[has_tile]
+    hovertext = np.asarray(choropleth['hovertext'], dtype=object)[has_tile] if choropleth.get('hovertext') is not None else None
+    labels = located['label'].to_numpy(dtype=object)[has_tile] if 'label' in located else None
+    customdata = np.asarray(choropleth['customdata'], dtype=float)[has_tile] if choropleth.get('customdata') is not None else None
+
+    # Marker size from the pixel height of the plot; the y axis fixes the scale
+    layout = base_layout('tile_map')
+    height = figure['layout'].get('height', layout['height'])
+    pad = 2 / SQRT3 * 0.5 + 0.1
+    y_range = [float(tiles['y'].min()) - pad, float(tiles['y'].max()) + pad]
+    unit = (height - layout['margin']['t'] - layout['margin']['b']) / (y_range[1] - y_range[0])
+    marker = {'symbol': 'hexagon', 'size': unit * 2 / SQRT3 * TILE_MAP_SETTINGS['fill'],
+              'line': {'color': 'rgba(255,255,255,0.9)', 'width': 0.5}}
+
+    traces = []
+    for subset, colored in ((np.isfinite(z), True), (~np.isfinite(z), False)):
+        if not subset.any():
+            continue
+        traces.append({
+            'type': 'scatter',
+            'mode': 'markers+text' if labels is not None else 'markers',
+            'x': x[subset],
+            'y': y[subset],
+            'text': labels[subset].tolist() if labels is not None else None,
+            'textfont': {'size': 9, 'color': '#111827'} if labels is not None else None,
+            'hovertext': hovertext[subset].tolist() if hovertext is not None else None,
+            'customdata': customdata[subset] if customdata is not None else None,
+            'hovertemplate': (choropleth.get('hovertemplate') or '').replace('%{z', '%{marker.color')
+                             if colored else "<b>%{hovertext}</b><br>No data<extra></extra>",
+            'marker': dict(marker, color=z[subset], coloraxis='coloraxis') if colored else dict(marker, color='#e2e8f0'),
+            'name': ''
+        })
+    overrides = {
+        'title': figure['layout'].get('title', {}),
+        'coloraxis': figure['layout'].get('coloraxis', {}),
+        'height': height,
+        'xaxis': {'range': [float(tiles['x'].min()) - pad, float(tiles['x'].max()) + pad]},
+        'yaxis': {'range': y_range}
+    }
+    return _build('tile_map', traces, overrides, None)
+
+def bar_figure(categories, values, colors, title, hovertemplate, xaxis_title='',
+               text=None, textfont=None, marker_line=None, layout=None):
+    """Build a horizontal bar figure dict (categories on the y axis)"""
+    trace = {
+        'type': 'bar',
+        'orientation': 'h',
+        'y': list(categories),
+        'x': np.asarray(values, dtype=float),
+        'marker': {
+            'color': colors,
+            'line': marker_line or {'color': 'rgba(255,255,255,0.8)', 'width': 1}
+        },
+        'hovertemplate': hovertemplate,
+        'text': text,
+        'textposition': 'outside' if text is not None else None,
+        'textfont': textfont
+    }
+    overrides = {'title': {'text': title}, 'xaxis': {'title': {'text': xaxis_title}}}
+    return _build('bar', [trace], overrides, layout)
+
+def scatter_figure(x, y, color, title, colorscale, hovertext=None, hovertemplate=None,
+                   xaxis_title='', yaxis_title='', colorbar_title='', marker=None, layout=None):
+    """Build a markers-only scatter figure dict coloured on a continuous scale"""
+    trace = {
+        'type': 'scatter',
+        'mode': 'markers',
+        'x': np.asarray(x, dtype=float),
+        'y': np.asarray(y, dtype=float),
+        'hovertext': list(hovertext) if hovertext is not None else None,
+        'hovertemplate': hovertemplate,
+        'marker': dict(marker or {}, color=np.asarray(color, dtype=float), coloraxis='coloraxis'),
+        'name': '',
+        'showlegend': False
+    }
+    overrides = {
+        'title': {'text': title},
+        'xaxis': {'title': {'text': xaxis_title}},
+        'yaxis': {'title': {'text': yaxis_title}},
+        'coloraxis': {
+            'colorscale': resolve_colorscale(colorscale),
+            'colorbar': {'title': {'text': colorbar_title}}
+        }
+    }
+    return _build('scatter', [trace], overrides, layout)
@@ -3,7 +3,8 @@
 # ===========================================
 
 from dash import html
-from data.loader import get_state_data
+import pandas as pd
+from data.loader import get_state_data, get_national_percentage
 from utils.helpers import get_short_label
 
 def generate_insights(selected_attribute, state_data=None):
@@ -19,12 +20,15 @@ def generate_insights(selected_attribute, state_data=None):
             
         # Prepare data for analysis
         insights_data = state_data[['State name', selected_attribute]].dropna()
-        insights_data = insights_data.groupby('State name')[selected_attribute].mean().reset_index()
+        insights_data = insights_data.groupby('State name', observed=True)[selected_attribute].mean().reset_index()
         
         # Calculate key statistics
         best_state = insights_data.loc[insights_data[selected_attribute].idxmax()]
         worst_state = insights_data.loc[insights_data[selected_attribute].idxmin()]
-        national_avg = insights_data[selected_attribute].mean()
+        # Population-weighted national figure; falls back to the mean of state values
+        national_avg = get_national_percentage(selected_attribute)
+        if national_avg is None or pd.isna(national_avg):
+            national_avg = insights_data[selected_attribute].mean()
         performance_gap = best_state[selected_attribute] - worst_state[selected_attribute]
         above_avg_states = len(insights_data[insights_data[selected_attribute] > national_avg])
         total_states = len(insights_data)
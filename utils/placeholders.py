@@ -0,0 +1,113 @@
+# ===========================================
+# CACHED PLACEHOLDER AND ERROR FIGURES
+# ===========================================
+# Placeholder figures are identical for every user, so they are built once
+# (at import, i.e. app startup) and returned by dictionary lookup instead of
+# constructing a new go.Figure on every empty selection or tab switch.
+
+import functools
+import plotly.graph_objects as go
+from config.settings import FONT_FAMILY
+
+# (chart id, message kind) -> (title, message, height)
+PLACEHOLDER_SPECS = {
+    ('state-rankings', 'no-selection'): (
+        "🏆 State Rankings - Select an attribute to see rankings",
+        "Choose a category and attribute to see beautiful state rankings! 📊", 500),
+    ('box-plot', 'no-selection'): (
+        "📦 Distribution Summary - Select an attribute to analyze",
+        "Choose a category and attribute to see distribution analysis! 📊", 400),
+    ('top-states-pie', 'no-selection'): (
+        "🥧 Top 7 States - Select an attribute to see leaders",
+        "Choose a category and attribute to see top performing states! 🏆", 400),
+    ('correlation-heatmap', 'no-selection'): (
+        "🔥 Correlation Heatmap - Select an attribute to see relationships",
+        "Choose an attribute to see stunning correlation analysis! 🔥📊", 400),
+    ('district-map', 'no-selection'): (
+        "🗺️ District Map - Select a state to visualize",
+        "Choose a state to see beautiful district-level visualization! 🗺️📊", 500),
+    ('district-rankings', 'no-selection'): (
+        "🏆 District Rankings - Select a state to analyze",
+        "Choose a state and metric to see district rankings! 🏆📊", 400),
+    ('district-scatter', 'no-selection'): (
+        "📊 Performance Matrix - Select a state to analyze",
+        "Choose a state to see district performance analysis! 📊", 400),
+    ('comparison-bar-chart', 'no-selection'): (
+        "📊 State Comparison - Select 2+ states and an attribute",
+        "🎯 Choose 2-5 states and a demographic attribute for beautiful comparison!", 400),
+    ('comparison-radar-chart', 'no-selection'): (
+        "🕸️ Multi-Dimensional Radar - Select 2+ states and a category",
+        "🎯 Choose 2-5 states and a category for multi-dimensional comparison!", 400),
+    ('comparison-gap-chart', 'coming-soon'): (
+        "📈 Performance Gap Analysis - Cards 3 & 4 Coming Next!",
+        "🎯 Cards 3 & 4 implementation in progress...", 400),
+}
+
+# chart id -> (title template, message) shown once a state is picked but no metric yet
+METRIC_PROMPT_SPECS = {
+    'district-rankings': ("🏆 District Rankings for {state} - Select a metric",
+                          "Select a metric to see district rankings!"),
+    'district-scatter': ("📊 Performance Matrix for {state} - Select a metric",
+                         "Select a metric to see performance analysis!"),
+}
+
+def _annotation(text, size, color):
+    """Centered paper-referenced message annotation"""
+    return dict(
+        text=text,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5,
+        xanchor='center', yanchor='middle',
+        font=dict(size=size, color=color),
+        showarrow=False
+    )
+
+def _message_figure(title, message=None, height=400, title_size=18, title_color="#64748b",
+                    message_size=16, message_color="#94a3b8", title_weight="bold"):
+    """Build an empty figure with a title and an optional centered message, as a plotly dict"""
+    fig = go.Figure()
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        title_font_size=title_size,
+        title_font_weight=title_weight,
+        title_font_color=title_color,
+        height=height,
+        template="plotly_white",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font_family=FONT_FAMILY,
+        annotations=[_annotation(message, message_size, message_color)] if message else []
+    )
+    return fig.to_plotly_json()
+
+# Built once at startup; the returned dicts are shared and must not be mutated
+_registry = {
+    key: _message_figure(title, message, height)
+    for key, (title, message, height) in PLACEHOLDER_SPECS.items()
+}
+_registry[('india-map', 'loading')] = _message_figure("🗺️ India Map Loading...", height=500, title_weight="normal",
+                                                      title_color="#2d3748")
+
+def register_placeholder(chart, kind, figure):
+    """Add a prebuilt figure (e.g. the default India map) to the registry"""
+    if isinstance(figure, go.Figure):
+        figure = figure.to_plotly_json()
+    _registry[(chart, kind)] = figure
+
+def placeholder_figure(chart, kind='no-selection'):
+    """Look up the prebuilt placeholder for a chart"""
+    return _registry[(chart, kind)]
+
+@functools.lru_cache(maxsize=256)
+def metric_prompt_figure(chart, state):
+    """Placeholder asking for a metric once a state is chosen, built once per state"""
+    title, message = METRIC_PROMPT_SPECS[chart]
+    return _message_figure(title.format(state=state), message, height=400,
+                           title_size=16, message_size=14)
+
+@functools.lru_cache(maxsize=256)
+def error_figure(title, detail=None, height=400, title_color="#2d3748"):
+    """Error figure with an optional red detail message, built once per distinct error"""
+    return _message_figure(title, detail, height=height, title_weight="normal", title_color=title_color,
+                           message_size=14, message_color="#ef4444")
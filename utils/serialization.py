@@ -0,0 +1,135 @@
+# ===========================================
+# COMPACT FIGURE SERIALIZATION
+# ===========================================
+
+import base64
+import functools
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from config.settings import SERIALIZATION_SETTINGS
+
+# Use orjson for every Dash response when it is installed
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
+
+# Trace attributes that plotly.js accepts as base64 typed arrays
+TYPED_ARRAY_KEYS = {
+    'x', 'y', 'z', 'r', 'lat', 'lon', 'values', 'customdata',
+    'color', 'size', 'width', 'base', 'opacity'
+}
+
+# Narrowest-first integer types supported by plotly.js typed arrays
+INTEGER_DTYPES = ['i1', 'u1', 'i2', 'u2', 'i4', 'u4']
+
+def _as_numeric_array(value):
+    """Return value as a numeric NumPy array, or None if it is not numeric"""
+    if isinstance(value, dict):
+        # Already a typed-array spec (plotly >= 6 encodes NumPy input as float64)
+        if 'bdata' not in value or 'dtype' not in value:
+            return None
+        array = np.frombuffer(base64.b64decode(value['bdata']), dtype=np.dtype(value['dtype']).newbyteorder('<'))
+        if 'shape' in value:
+            array = array.reshape([int(n) for n in str(value['shape']).split(',')])
+        return array
+
+    if not isinstance(value, (list, tuple, np.ndarray)) and not hasattr(value, 'to_numpy'):
+        return None
+
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return None  # Ragged nested lists
+    return array if array.dtype.kind in 'iuf' else None
+
+def _narrowest_dtype(array):
+    """Pick the smallest plotly.js dtype that represents the array without visible loss"""
+    finite = array[np.isfinite(array)] if array.dtype.kind == 'f' else array
+    if finite.size == 0:
+        return 'f4'
+
+    # Whole numbers without NaNs fit into an integer type
+    if finite.size == array.size and np.array_equal(finite, np.round(finite)):
+        low, high = finite.min(), finite.max()
+        for code in INTEGER_DTYPES:
+            info = np.iinfo(np.dtype(code))
+            if info.min <= low and high <= info.max:
+                return code
+
+    error = np.abs(finite.astype(np.float32).astype(np.float64) - finite.astype(np.float64))
+    return 'f4' if error.max() <= SERIALIZATION_SETTINGS['float32_atol'] else 'f8'
+
+def encode_typed_array(array):
+    """Encode a numeric array as a plotly.js typed-array spec"""
+    dtype = np.dtype(_narrowest_dtype(array)).newbyteorder('<')
+    spec = {
+        'dtype': dtype.str[1:],
+        'bdata': base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode('ascii')
+    }
+    if array.ndim > 1:
+        spec['shape'] = ', '.join(str(n) for n in array.shape)
+    return spec
+
+def _compact_node(node):
+    """Return a copy of a trace (or nested trace attribute) with numeric arrays encoded"""
+    compact = {}
+    for key, value in node.items():
+        if key == 'geojson':
+            compact[key] = value  # Plain GeoJSON, never typed arrays
+        elif key in TYPED_ARRAY_KEYS:
+            array = _as_numeric_array(value)
+            if array is not None and array.size >= SERIALIZATION_SETTINGS['min_array_length']:
+                compact[key] = encode_typed_array(array)
+            elif isinstance(value, dict) and 'bdata' not in value:
+                compact[key] = _compact_node(value)
+            else:
+                compact[key] = value
+        elif isinstance(value, dict):
+            compact[key] = _compact_node(value)
+        else:
+            compact[key] = value
+    return compact
+
+def compact_figure(figure):
+    """Convert a figure to a plotly JSON dict with compact typed arrays"""
+    if isinstance(figure, go.Figure):
+        figure = figure.to_plotly_json()
+    elif not isinstance(figure, dict) or 'data' not in figure:
+        return figure
+
+    compact = dict(figure)
+    compact['data'] = [_compact_node(trace) for trace in figure.get('data', [])]
+    return compact
+
+def round_geojson(geojson, decimals=None):
+    """Round GeoJSON coordinates in place so they serialize as short numbers"""
+    if decimals is None:
+        decimals = SERIALIZATION_SETTINGS['geojson_decimals']
+
+    def _round(coords):
+        # A position is a flat list of numbers; a ring/line is a list of positions
+        if coords and isinstance(coords[0], (int, float)):
+            return [round(c, decimals) for c in coords]
+        if coords and coords[0] and isinstance(coords[0][0], (int, float)):
+            return np.round(np.asarray(coords, dtype=float), decimals).tolist()
+        return [_round(c) for c in coords]
+
+    features = geojson.get('features', [geojson])
+    for feature in features:
+        geometry = feature.get('geometry') or {}
+        if 'coordinates' in geometry:
+            geometry['coordinates'] = _round(geometry['coordinates'])
+    return geojson
+
+def compact_figure_output(callback):
+    """Decorator: compact every figure returned by a Dash callback"""
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        result = callback(*args, **kwargs)
+        if isinstance(result, (list, tuple)):
+            return type(result)(compact_figure(item) for item in result)
+        return compact_figure(result)
+    return wrapper